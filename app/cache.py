@@ -0,0 +1,121 @@
+"""
+In-process read-through cache for small reference tables
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Optional
+
+from sqlalchemy import select
+
+from app import models, schemas
+from app.pagination import decode_cursor, encode_cursor
+
+# Seconds a snapshot is trusted; bounds staleness across workers, since
+# writes only invalidate the cache of the worker that handled them
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "60"))
+# Distinct (limit, after) list pages kept as pre-serialized bytes
+MAX_CACHED_PAGES = 256
+
+
+class ReferenceCache:
+    """
+    Snapshot of a whole reference table, loaded on first use.
+
+    Lookups and list pages are served from memory until the snapshot expires
+    or a write handler calls invalidate(). List pages are cached as the final
+    JSON bytes, so a hit involves neither the database nor Pydantic. Pass a
+    primary session: a snapshot loaded from a lagging replica would be served
+    for the whole TTL.
+    """
+
+    def __init__(self, model, schema, ttl: float = REFERENCE_CACHE_TTL):
+        self.model = model
+        self.schema = schema
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshot = None
+
+    def invalidate(self):
+        """Drop the snapshot; call after committing a write to the table"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _fresh(self, snapshot) -> bool:
+        return snapshot is not None and (self.ttl <= 0 or time.monotonic() - snapshot["loaded_at"] < self.ttl)
+
+    def _load(self, db) -> dict:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        generation = self._generation
+        table = self.model.__table__
+        rows = [
+            self.schema.model_validate(dict(row)).model_dump(mode="json")
+            for row in db.execute(select(*table.columns).order_by(table.c.id)).mappings()
+        ]
+        snapshot = {
+            "loaded_at": time.monotonic(),
+            "rows": rows,
+            "ids": [row["id"] for row in rows],
+            "by_id": {row["id"]: row for row in rows},
+            "pages": {},
+        }
+        with self._lock:
+            # Don't install a snapshot that a concurrent write already outdated
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, db, row_id: int) -> Optional[dict]:
+        """Return one row as a JSON-ready dict, or None if it does not exist"""
+        return self._load(db)["by_id"].get(row_id)
+
+    def exists(self, db, row_id: int) -> bool:
+        return row_id in self._load(db)["by_id"]
+
+    def page(self, db, limit: int, after: Optional[str]) -> bytes:
+        """Return one keyset page (ordered by id) as serialized JSON"""
+        snapshot = self._load(db)
+        pages = snapshot["pages"]
+        key = (limit, after)
+        body = pages.get(key)
+        if body is not None:
+            return body
+
+        start = 0
+        if after:
+            start = bisect_right(snapshot["ids"], decode_cursor(after, (self.model.id,))[0])
+        items = snapshot["rows"][start:start + limit]
+        next_cursor = None
+        if start + limit < len(snapshot["rows"]):
+            next_cursor = encode_cursor([items[-1]["id"]])
+        body = json.dumps(
+            {"items": items, "next_cursor": next_cursor}, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        if len(pages) >= MAX_CACHED_PAGES:
+            pages.clear()
+        pages[key] = body
+        return body
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rows": len(snapshot["rows"]) if snapshot is not None else 0,
+            "fresh": self._fresh(snapshot),
+        }
+
+
+areas = ReferenceCache(models.Area, schemas.Area)
+degrees = ReferenceCache(models.Degree, schemas.Degree)
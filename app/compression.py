@@ -0,0 +1,306 @@
+"""
+Response compression negotiated from Accept-Encoding: gzip always, brotli and
+zstd when their packages are installed
+"""
+import os
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encodings offered, in order of preference when a client accepts several
+COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()
+]
+# Bodies smaller than this many bytes are sent as they are
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "5")),
+    "br": int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+    "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+}
+# Whole bodies at least this large are compressed off the event loop
+THREADPOOL_MIN_SIZE = 256 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync-flush every chunk so streamed output reaches the client as it is produced
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+ENCODERS = {"gzip": _Gzip}
+if brotli is not None:
+    ENCODERS["br"] = _Brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _Zstd
+
+
+def available_encodings(encodings: Optional[List[str]] = None) -> List[str]:
+    """The configured encodings whose packages are installed, in preference order"""
+    return [name for name in (encodings or COMPRESSION_ENCODINGS) if name in ENCODERS]
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """
+    Pick an encoding from ``offered`` for an Accept-Encoding header: the
+    highest q-value wins, ties go to the earlier entry in ``offered``
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in offered:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    """Whether a response may be compressed at all, whatever the client accepts"""
+    if "content-encoding" in headers:
+        return False
+    if "no-transform" in headers.get("cache-control", "").lower():
+        return False
+    return headers.get("content-type", "").lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionStats:
+    """Per-route compression counters; only updated from the event loop, so no locking"""
+
+    def __init__(self):
+        self.routes: Dict[str, dict] = {}
+
+    def record(self, route: str, encoding: Optional[str], bytes_in: int, bytes_out: int, cpu_seconds: float):
+        """Count one eligible response; ``encoding`` is None when it went out uncompressed"""
+        entry = self.routes.get(route)
+        if entry is None:
+            entry = self.routes[route] = {
+                "compressed": 0, "uncompressed": 0, "uncompressed_bytes": 0,
+                "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0,
+            }
+        if encoding is None:
+            entry["uncompressed"] += 1
+            entry["uncompressed_bytes"] += bytes_in
+            return
+        entry["compressed"] += 1
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out
+        entry["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> dict:
+        """Counters per route template; ratio is bytes in per byte out over compressed responses"""
+        return {
+            route: {**entry, "ratio": round(entry["bytes_in"] / entry["bytes_out"], 3) if entry["bytes_out"] else None}
+            for route, entry in sorted(self.routes.items())
+        }
+
+
+stats = CompressionStats()
+
+
+def route_path(scope) -> str:
+    """Template of the route that handled a request, e.g. /api/v1/students/{student_id}"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _compress_body(encoder_class, level: int, body: bytes):
+    started = time.thread_time()
+    compressed = encoder_class(level).finish(body)
+    return compressed, time.thread_time() - started
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing eligible responses. Bodies under
+    ``minimum_size`` are left alone, streamed responses are compressed chunk
+    by chunk once that much has been produced, and 304s, HEAD requests,
+    already-encoded and ``Cache-Control: no-transform`` responses are passed
+    through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        encodings: Optional[List[str]] = None,
+        levels: Optional[Dict[str, int]] = None,
+        stats: CompressionStats = stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+        self.levels = {**COMPRESSION_LEVELS, **(levels or {})}
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        await self.app(scope, receive, _Responder(self, scope, send, encoding).send)
+
+
+class _Responder:
+    """Send wrapper for one response"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: Optional[str]):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start = None
+        self.passthrough = False
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.encoder = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def send(self, message):
+        if self.passthrough:
+            await self.downstream(message)
+        elif message["type"] == "http.response.start":
+            await self._on_start(message)
+        elif message["type"] == "http.response.body":
+            await self._on_body(message)
+        else:
+            await self.downstream(message)
+
+    async def _on_start(self, message):
+        headers = Headers(raw=message["headers"])
+        if message["status"] in (204, 304) or not is_compressible(headers):
+            self.passthrough = True
+            await self.downstream(message)
+            return
+        MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+        length = headers.get("content-length")
+        if self.encoding is None or (length is not None and int(length) < self.middleware.minimum_size):
+            self.passthrough = True
+            self._record(None, int(length or 0), int(length or 0))
+            await self.downstream(message)
+            return
+        self.start = message
+
+    async def _on_body(self, message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            await self._stream(body, more_body)
+            return
+
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if not more_body:
+            await self._send_whole(b"".join(self.buffer))
+        elif self.buffered >= self.middleware.minimum_size:
+            # Enough of a streamed body to be worth it: switch to chunked compression
+            self.encoder = ENCODERS[self.encoding](self.middleware.levels[self.encoding])
+            headers = self._encoded_headers()
+            del headers["content-length"]
+            await self.downstream(self.start)
+            body, self.buffer = b"".join(self.buffer), []
+            await self._stream(body, True)
+
+    async def _send_whole(self, body: bytes):
+        if len(body) < self.middleware.minimum_size:
+            self._record(None, len(body), len(body))
+            await self.downstream(self.start)
+            await self.downstream({"type": "http.response.body", "body": body})
+            return
+
+        encoder_class = ENCODERS[self.encoding]
+        level = self.middleware.levels[self.encoding]
+        if len(body) >= THREADPOOL_MIN_SIZE:
+            compressed, cpu_seconds = await run_in_threadpool(_compress_body, encoder_class, level, body)
+        else:
+            compressed, cpu_seconds = _compress_body(encoder_class, level, body)
+        self._record(self.encoding, len(body), len(compressed), cpu_seconds)
+        self._encoded_headers()["content-length"] = str(len(compressed))
+        await self.downstream(self.start)
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    async def _stream(self, body: bytes, more_body: bool):
+        started = time.thread_time()
+        chunk = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        if not more_body:
+            self._record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+        if chunk or not more_body:
+            await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["content-encoding"] = self.encoding
+        # The encoded body is a different representation; a strong validator would lie about it
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+        return headers
+
+    def _record(self, encoding: Optional[str], bytes_in: int, bytes_out: int, cpu_seconds: float = 0.0):
+        self.middleware.stats.record(route_path(self.scope), encoding, bytes_in, bytes_out, cpu_seconds)
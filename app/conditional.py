@@ -0,0 +1,77 @@
+"""
+Conditional GET support: ETag / Last-Modified validators and 304 responses
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; the server default stores UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether the client sent validators worth checking before loading the row"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def entity_etag(row_id: int, modified_at: Optional[datetime]) -> str:
+    """Strong ETag for a single row, derived from its id and last change"""
+    stamp = int(_as_utc(modified_at).timestamp() * 1_000_000) if modified_at else 0
+    return f'"{row_id}-{stamp:x}"'
+
+
+def collection_etag(request: Request, versions: Iterable, has_more: bool) -> str:
+    """
+    ETag for one page of a list, from the page's (id, created_at, updated_at)
+    rows, whether a next page exists, and the query string, so filters and
+    cursors get their own tags.
+    """
+    digest = hashlib.blake2b(request.url.query.encode(), digest_size=16)
+    digest.update(b"+" if has_more else b".")
+    for version in versions:
+        modified_at = version.updated_at or version.created_at
+        digest.update(f"{version.id}:{modified_at.isoformat() if modified_at else ''};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str, modified_at: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since as RFC 9110 requires"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: a W/ prefix on either side still matches
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return _as_utc(modified_at).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def validator_headers(etag: str, modified_at: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag}
+    if modified_at is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(modified_at), usegmt=True)
+    return headers
+
+
+def set_validators(response: Response, etag: str, modified_at: Optional[datetime] = None):
+    response.headers.update(validator_headers(etag, modified_at))
+
+
+def not_modified_response(etag: str, modified_at: Optional[datetime] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, modified_at))
@@ -0,0 +1,166 @@
+"""
+Shared set-based and single-statement write helpers
+"""
+import re
+from enum import Enum
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+# Constraint name -> (status code, detail) reported when a write violates it
+ConstraintErrors = Dict[str, Tuple[int, str]]
+
+_SQLITE_UNIQUE = re.compile(r"UNIQUE constraint failed: (.+)")
+
+
+class OnConflict(str, Enum):
+    """What a bulk create does with names that already exist"""
+    fail = "fail"
+    skip = "skip"
+    upsert = "upsert"
+
+
+def dialect_name(db) -> str:
+    """Dialect name of a Session or AsyncSession"""
+    return getattr(db, "sync_session", db).get_bind().dialect.name
+
+
+def insert(db, model):
+    """INSERT construct for the session's dialect, with ON CONFLICT support"""
+    if dialect_name(db) == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def bulk_insert_names_statement(db, model, names: Sequence[str], on_conflict: OnConflict):
+    """
+    Build one multi-row INSERT ... ON CONFLICT (name) ... RETURNING for a
+    name-keyed reference table.
+
+    Existing names are left alone for fail/skip (so the caller can tell which
+    were skipped) and returned unchanged for upsert.
+    """
+    stmt = insert(db, model).values([{"name": name} for name in names])
+    if on_conflict == OnConflict.upsert:
+        # A no-op update so existing rows come back through RETURNING
+        stmt = stmt.on_conflict_do_update(index_elements=[model.name], set_={"name": stmt.excluded.name})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[model.name])
+    return stmt.returning(*model.__table__.columns)
+
+
+def unique_names(names: Sequence[str], on_conflict: OnConflict, label: str) -> List[str]:
+    """Drop repeated names from a bulk payload, which fail mode rejects"""
+    unique = list(dict.fromkeys(names))
+    if on_conflict == OnConflict.fail and len(unique) != len(names):
+        seen = set()
+        duplicate = next(name for name in names if name in seen or seen.add(name))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{label} with name '{duplicate}' appears more than once"
+        )
+    return unique
+
+
+def split_returned(names: Sequence[str], rows: Sequence):
+    """Order RETURNING rows like the input and list the names that were skipped"""
+    by_name = {row.name: row for row in rows}
+    items = [by_name[name] for name in names if name in by_name]
+    skipped = [name for name in names if name not in by_name]
+    return items, skipped
+
+
+def constraint_name(db, error: IntegrityError, model, values: dict) -> Optional[str]:
+    """
+    Name of the constraint behind an IntegrityError.
+
+    psycopg2 and asyncpg report it directly. SQLite only reports the columns
+    of a unique violation, which the naming convention turns back into the
+    name, and nothing at all for a foreign key violation, so the referenced
+    rows are looked up here, on the error path only.
+    """
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    # The asyncpg adapter chains the driver exception
+    name = getattr(error.orig.__cause__, "constraint_name", None)
+    if name:
+        return name
+
+    match = _SQLITE_UNIQUE.search(str(error.orig))
+    if match:
+        columns = [column.strip().split(".")[-1] for column in match.group(1).split(",")]
+        return f"{model.__tablename__}_{'_'.join(columns)}_key"
+    if "FOREIGN KEY" in str(error.orig):
+        # In name order, so the lookups are the same on every run
+        for fk in sorted(model.__table__.foreign_key_constraints, key=lambda fk: fk.name):
+            element = fk.elements[0]
+            if element.parent.name not in values:
+                continue
+            referred = element.column
+            if db.execute(select(referred).where(referred == values[element.parent.name])).first() is None:
+                return fk.name
+    return None
+
+
+def _execute_one(db, stmt, model, values: dict, errors: ConstraintErrors):
+    """Run a single-row statement, turning known constraint violations into HTTP errors"""
+    try:
+        return db.execute(stmt).first()
+    except IntegrityError as error:
+        db.rollback()
+        name = constraint_name(db, error, model, values)
+        if name not in errors:
+            raise
+        status_code, detail = errors[name]
+        raise HTTPException(status_code=status_code, detail=detail) from None
+
+
+def insert_one(db, model, values: dict, errors: ConstraintErrors):
+    """INSERT one row and return it via RETURNING, in a single statement"""
+    stmt = insert(db, model).values(**values).returning(*model.__table__.columns)
+    return _execute_one(db, stmt, model, values, errors)
+
+
+def update_one(db, model, row_id: int, values: dict, errors: ConstraintErrors):
+    """UPDATE one row by id and return it via RETURNING; None if it does not exist"""
+    columns = model.__table__.columns
+    if not values:
+        # Nothing to change, and an UPDATE would still bump updated_at
+        return db.execute(select(*columns).where(model.id == row_id)).first()
+    stmt = update(model).where(model.id == row_id).values(**values).returning(*columns)
+    return _execute_one(db, stmt, model, values, errors)
+
+
+def update_one_with_previous(db, model, row_id: int, values: dict, previous: Sequence[str], errors: ConstraintErrors):
+    """
+    update_one() that also returns the values the ``previous`` columns had
+    before the update; (None, None) if the row does not exist.
+
+    On PostgreSQL this is one statement: the UPDATE joins the row locked FOR
+    UPDATE and returns its old columns next to the new ones. SQLite cannot
+    return columns of a joined table, so there the old row is read first.
+    """
+    table = model.__table__
+    old_row = select(table.c.id, *[table.c[name] for name in previous]).where(table.c.id == row_id).with_for_update()
+    if dialect_name(db) != "postgresql" or not values:
+        old = db.execute(old_row).first()
+        if old is None:
+            return None, None
+        return update_one(db, model, row_id, values, errors), old
+
+    old_row = old_row.subquery("previous")
+    stmt = (
+        update(model)
+        .where(table.c.id == old_row.c.id)
+        .values(**values)
+        .returning(*table.columns, *[old_row.c[name].label(f"previous_{name}") for name in previous])
+    )
+    row = _execute_one(db, stmt, model, values, errors)
+    if row is None:
+        return None, None
+    return row, SimpleNamespace(**{name: row._mapping[f"previous_{name}"] for name in previous})
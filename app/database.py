@@ -2,25 +2,102 @@
 Database configuration and session management
 """
 import os
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import MetaData, create_engine, event, exc, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 
+from app import metrics, querylog, replicas
+from app.pool import engine_options
+
 # Load environment variables
 load_dotenv()
 
-# Database URL
-DATABASE_URL = f"postgresql://{os.getenv('PG_DB_USER')}:{os.getenv('PG_DB_PASSWORD')}@{os.getenv('PG_DB_HOST')}:{os.getenv('PG_DB_PORT')}/{os.getenv('PG_DB_NAME')}"
+# Database URL: DATABASE_URL when set (e.g. sqlite:///app.db), else built from the PG_DB_* variables
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{os.getenv('PG_DB_USER')}:{os.getenv('PG_DB_PASSWORD')}@{os.getenv('PG_DB_HOST')}:{os.getenv('PG_DB_PORT')}/{os.getenv('PG_DB_NAME')}"
+# Async drivers per backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str):
+    """The same database, through the backend's async driver"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def _options(url: str, is_async: bool = False) -> dict:
+    return engine_options(is_async=is_async, dialect=make_url(url).get_backend_name())
+
+
+# Serve the routers from an asyncpg AsyncEngine instead of the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+def _configure_engine(sync_engine):
+    if sync_engine.dialect.name == "sqlite":
+        # SQLite leaves foreign keys unchecked unless asked, per connection
+        @event.listens_for(sync_engine, "connect")
+        def _enforce_foreign_keys(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys = ON")
+            cursor.close()
+
+    metrics.instrument_engine(sync_engine)
+    if querylog.QUERY_LOG_MODE != "off":
+        querylog.instrument_engine(sync_engine)
+
 
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_options(DATABASE_URL))
+_configure_engine(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory, only built in async mode
+async_engine = create_async_engine(async_url(DATABASE_URL), **_options(DATABASE_URL, is_async=True)) if DB_ASYNC else None
+if async_engine is not None:
+    _configure_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+) if DB_ASYNC else None
+
+
+def _replica(index: int, url: str) -> replicas.Replica:
+    replica = replicas.Replica(
+        f"replica{index}",
+        create_engine(url, **_options(url)),
+        create_async_engine(async_url(url), **_options(url, is_async=True)) if DB_ASYNC else None,
+    )
+    for sync_engine in filter(None, (replica.engine, replica.async_engine and replica.async_engine.sync_engine)):
+        _configure_engine(sync_engine)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _on_error(context, replica=replica):
+            # A replica that went away mid-request is skipped by later reads
+            if context.is_disconnect:
+                replica.mark_down()
+    return replica
+
+
+# Read replicas for GET handlers (none: every read goes to the primary)
+read_replicas = replicas.ReplicaSet([_replica(index, url) for index, url in enumerate(replicas.PG_DB_REPLICA_URLS)])
+# Errors meaning a replica cannot be reached, rather than a bad query
+REPLICA_CONNECT_ERRORS = (exc.OperationalError, exc.InterfaceError, OSError)
+
+# Constraint names follow Postgres' defaults, so integrity errors can be
+# mapped back to API errors by name on every dialect and existing database
+NAMING_CONVENTION = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "%(table_name)s_%(column_0_N_name)s_key",
+    "fk": "%(table_name)s_%(column_0_N_name)s_fkey",
+    "pk": "%(table_name)s_pkey",
+}
+
 # Create base class for models
-Base = declarative_base()
+Base = declarative_base(metadata=MetaData(naming_convention=NAMING_CONVENTION))
 
 # Dependency to get database session
 def get_db():
@@ -29,3 +106,84 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _read_connection(read_primary: bool, is_async: bool):
+    """
+    A connection for reads: to the next healthy replica, or the primary if
+    there are none, none can be reached, or the client wrote recently
+    """
+    if not read_primary:
+        for replica in read_replicas.candidates(is_async=is_async):
+            target = replica.async_engine.sync_engine if is_async else replica.engine
+            try:
+                # The session's own connection, so an unreachable replica falls through to the next one
+                connection = target.connect()
+            except REPLICA_CONNECT_ERRORS:
+                replica.mark_down()
+                continue
+            replica.reads += 1
+            return connection
+    read_replicas.primary_reads += 1
+    return (async_engine.sync_engine if is_async else engine).connect()
+
+
+class ReadSession(Session):
+    """
+    Session for reads that connects on the first query, so a request answered
+    without one (e.g. from a cache) never checks out a connection. It is bound
+    to the connection it picked the replica with, and closes it on close().
+    """
+
+    def get_bind(self, mapper=None, **kw):
+        if "read_connection" not in self.info:
+            self.info["read_connection"] = _read_connection(self.info["read_primary"], self.info["is_async"])
+        return self.info["read_connection"]
+
+    def close(self):
+        super().close()
+        connection = self.info.pop("read_connection", None)
+        if connection is not None:
+            connection.close()
+
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    sync_session_class=ReadSession, autoflush=False, expire_on_commit=False
+) if DB_ASYNC else None
+
+
+def read_session(request: Request = None):
+    """A session for reads, on a replica unless the client wrote recently"""
+    read_primary = request is not None and replicas.reads_from_primary(request.cookies)
+    return ReadSessionLocal(info={"read_primary": read_primary, "is_async": False})
+
+
+def async_read_session(request: Request = None):
+    """read_session for the async engines"""
+    read_primary = request is not None and replicas.reads_from_primary(request.cookies)
+    return AsyncReadSessionLocal(info={"read_primary": read_primary, "is_async": True})
+
+
+# Dependency to get a database session for reads, on a replica when configured
+def get_read_db(request: Request):
+    db = read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency to get an async database session for reads
+async def get_async_read_db(request: Request):
+    db = async_read_session(request)
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,171 @@
+"""
+Geohash encoding and distance helpers for location search
+"""
+import math
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, Integer, case, cast, func, literal_column, null
+from sqlalchemy.sql.elements import ColumnElement
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision of the geohash stored on each row (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+# Upper bound on the number of prefixes a single search may scan
+MAX_COVER_CELLS = 16
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _bits(precision: int):
+    """Return (lat_bits, lon_bits) for a geohash of the given length"""
+    total = precision * 5
+    return total // 2, total - total // 2
+
+
+def _cell_index(value: float, lower: float, span: float, bits: int) -> int:
+    cells = 1 << bits
+    return min(cells - 1, max(0, int((value - lower) / span * cells)))
+
+
+def _hash_from_indices(lat_idx: int, lon_idx: int, precision: int) -> str:
+    """Interleave cell indices into a geohash string (longitude bit first)"""
+    lat_bits, lon_bits = _bits(precision)
+    chars = []
+    value = 0
+    for i in range(precision * 5):
+        if i % 2 == 0:
+            lon_bits -= 1
+            bit = (lon_idx >> lon_bits) & 1
+        else:
+            lat_bits -= 1
+            bit = (lat_idx >> lat_bits) & 1
+        value = (value << 1) | bit
+        if i % 5 == 4:
+            chars.append(_BASE32[value])
+            value = 0
+    return "".join(chars)
+
+
+def encode(latitude: Optional[float], longitude: Optional[float], precision: int = GEOHASH_PRECISION) -> Optional[str]:
+    """Encode a coordinate as a geohash; None if the location is unknown"""
+    if latitude is None or longitude is None:
+        return None
+    lat_bits, lon_bits = _bits(precision)
+    return _hash_from_indices(
+        _cell_index(latitude, -90.0, 180.0, lat_bits),
+        _cell_index(longitude, -180.0, 360.0, lon_bits),
+        precision,
+    )
+
+
+def _cell_index_sql(value, lower: float, span: float, bits: int, dialect: str):
+    """_cell_index() as SQL: clamping before flooring gives the same cell"""
+    if not isinstance(value, ColumnElement):
+        return _cell_index(value, lower, span, bits)
+    cells = 1 << bits
+    scaled = (value - literal_column(repr(lower))) / literal_column(repr(span)) * literal_column(str(cells))
+    if dialect == "postgresql":
+        return cast(func.floor(func.least(func.greatest(scaled, 0), cells - 1)), BigInteger)
+    # SQLite: scalar min/max; the cast truncates, which floors non-negative values
+    return cast(func.min(func.max(scaled, 0), cells - 1), BigInteger)
+
+
+def encode_sql(latitude, longitude, dialect: str, precision: int = GEOHASH_PRECISION):
+    """
+    encode() as a SQL expression, for writes where a coordinate is only known
+    to the database. Either argument may be a column or a plain value; the
+    result matches encode() on PostgreSQL and SQLite.
+    """
+    if latitude is None or longitude is None:
+        return null()
+    lat_bits, lon_bits = _bits(precision)
+    lat_idx = _cell_index_sql(latitude, -90.0, 180.0, lat_bits, dialect)
+    lon_idx = _cell_index_sql(longitude, -180.0, 360.0, lon_bits, dialect)
+
+    # The bit walk of _hash_from_indices, with known bits folded into constants
+    chars = []
+    for start in range(0, precision * 5, 5):
+        known = 0
+        terms = []
+        for i in range(start, start + 5):
+            weight = 1 << (4 - i % 5)
+            if i % 2 == 0:
+                lon_bits -= 1
+                index, shift = lon_idx, lon_bits
+            else:
+                lat_bits -= 1
+                index, shift = lat_idx, lat_bits
+            if isinstance(index, int):
+                known += ((index >> shift) & 1) * weight
+            else:
+                terms.append(index.bitwise_rshift(shift).bitwise_and(1) * weight)
+        if not terms:
+            chars.append(literal_column(f"'{_BASE32[known]}'"))
+            continue
+        position = literal_column(str(known + 1))
+        for term in terms:
+            position = position + term
+        chars.append(func.substr(literal_column(f"'{_BASE32}'"), cast(position, Integer), 1))
+    geohash = chars[0]
+    for char in chars[1:]:
+        geohash = geohash.concat(char)
+    # NULL coordinates give a NULL geohash (PostgreSQL's GREATEST would skip them)
+    columns = [value for value in (latitude, longitude) if isinstance(value, ColumnElement)]
+    return case(*[(column.is_(None), null()) for column in columns], else_=geohash)
+
+
+def with_geohash(values: dict) -> dict:
+    """Add the geohash for a row's latitude/longitude, for writes that bypass the ORM"""
+    return {**values, "geohash": encode(values.get("latitude"), values.get("longitude"))}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing the search circle.
+
+    Longitudes are not wrapped, so min_lon may be < -180 or max_lon > 180 near
+    the antimeridian. Near the poles the box spans every longitude.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    if cos_lat <= 1e-9 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    return min_lat, max_lat, longitude - dlon, longitude + dlon
+
+
+def covering_prefixes(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    Return the geohash prefixes whose cells cover the search circle.
+
+    Picks the longest prefix length that needs at most MAX_COVER_CELLS cells,
+    so each prefix becomes one short range scan on the geohash index.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_bits, lon_bits = _bits(precision)
+        lat_lo = _cell_index(min_lat, -90.0, 180.0, lat_bits)
+        lat_hi = _cell_index(max_lat, -90.0, 180.0, lat_bits)
+        lon_cells = 1 << lon_bits
+        lon_lo = int(math.floor((min_lon + 180.0) / 360.0 * lon_cells))
+        lon_hi = int(math.floor((max_lon + 180.0) / 360.0 * lon_cells))
+        lon_count = min(lon_cells, lon_hi - lon_lo + 1)
+        if (lat_hi - lat_lo + 1) * lon_count <= MAX_COVER_CELLS or precision == 1:
+            return sorted({
+                _hash_from_indices(lat_idx, (lon_lo + offset) % lon_cells, precision)
+                for lat_idx in range(lat_lo, lat_hi + 1)
+                for offset in range(lon_count)
+            })
+    return []
@@ -0,0 +1,194 @@
+"""
+Group commit for high-volume inserts
+
+With CALL_REQUEST_GROUP_COMMIT on, POST /api/v1/calls does not insert and
+commit on its own. The handler validates the request, queues it and waits.
+A single flusher task per worker writes everything queued as one multi-row
+INSERT ... RETURNING in one transaction. It flushes as soon as
+CALL_REQUEST_BATCH_SIZE rows are waiting, or CALL_REQUEST_BATCH_WAIT_MS after
+the first row of a batch arrived. Each waiting request then gets its own row
+(id, created_at) back, so clients see the same responses. The point is one
+WAL flush per batch instead of one per call request.
+
+The queue holds at most CALL_REQUEST_QUEUE_SIZE requests. When it is full a
+request waits up to CALL_REQUEST_QUEUE_TIMEOUT_MS for room, then gets a 503
+with Retry-After.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+
+from app.database import AsyncSessionLocal, SessionLocal
+
+CALL_REQUEST_GROUP_COMMIT = os.getenv("CALL_REQUEST_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+# Most rows written by one INSERT
+CALL_REQUEST_BATCH_SIZE = int(os.getenv("CALL_REQUEST_BATCH_SIZE", "200"))
+# Longest a queued row waits for others to join its batch (0: flush whatever is queued)
+CALL_REQUEST_BATCH_WAIT_MS = float(os.getenv("CALL_REQUEST_BATCH_WAIT_MS", "2"))
+# Requests queued at most before new ones are pushed back
+CALL_REQUEST_QUEUE_SIZE = int(os.getenv("CALL_REQUEST_QUEUE_SIZE", "5000"))
+# How long a request waits for room in a full queue before a 503
+CALL_REQUEST_QUEUE_TIMEOUT_MS = float(os.getenv("CALL_REQUEST_QUEUE_TIMEOUT_MS", "200"))
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    """A queued row and the request waiting for it"""
+
+    def __init__(self, values: dict):
+        self.values = values
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class GroupCommitter:
+    """
+    Batches rows for ``write(db, values_list)``, which inserts them on the
+    session it is given and returns, per row in order, the inserted row or an
+    exception for the request. The committer commits each batch. Counters are
+    plain attributes, like the pool statistics.
+    """
+
+    def __init__(
+        self,
+        write: Callable,
+        batch_size: int = CALL_REQUEST_BATCH_SIZE,
+        max_wait_ms: float = CALL_REQUEST_BATCH_WAIT_MS,
+        queue_size: int = CALL_REQUEST_QUEUE_SIZE,
+        queue_timeout_ms: float = CALL_REQUEST_QUEUE_TIMEOUT_MS,
+    ):
+        self.write = write
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.rejected = 0
+        self.fallbacks = 0
+        self.flush_seconds = 0.0
+
+    def start(self):
+        """Start the flusher on the running event loop"""
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued, then stop the flusher"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        self._task = None
+
+    async def submit(self, values: dict):
+        """Queue a row and wait until its batch is committed; returns the inserted row"""
+        if self._task is None:
+            raise RuntimeError("group commit is not running")
+        pending = _Pending(values)
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(pending), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many call requests queued, retry shortly",
+                    headers={"Retry-After": "1"},
+                ) from None
+        # Shielded: a client that disconnects does not take its row out of the batch
+        return await asyncio.shield(pending.future)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[_Pending]):
+        started = time.perf_counter()
+        values = [pending.values for pending in batch]
+        try:
+            results = await self._write(values)
+        except IntegrityError:
+            # A referenced row vanished between the check and the insert: write
+            # rows one by one, so only the offending requests fail
+            self.fallbacks += 1
+            results = []
+            for row_values in values:
+                try:
+                    results += await self._write([row_values])
+                except Exception as error:
+                    results.append(error)
+        except Exception as error:
+            logger.exception("Writing a batch of %d rows failed", len(batch))
+            results = [error] * len(batch)
+        self.batches += 1
+        self.rows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.flush_seconds += time.perf_counter() - started
+        for pending, result in zip(batch, results):
+            if pending.future.done():
+                continue
+            if isinstance(result, Exception):
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+
+    async def _write(self, values: List[dict]) -> list:
+        if AsyncSessionLocal is not None:
+            async with AsyncSessionLocal() as db:
+                results = await db.run_sync(self.write, values)
+                await db.commit()
+                return results
+        return await run_in_threadpool(self._write_sync, values)
+
+    def _write_sync(self, values: List[dict]) -> list:
+        with SessionLocal() as db:
+            results = self.write(db, values)
+            db.commit()
+            return results
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch": round(self.rows / self.batches, 1) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "mean_flush_ms": round(self.flush_seconds / self.batches * 1000, 2) if self.batches else 0,
+            "rejected": self.rejected,
+            "fallbacks": self.fallbacks,
+        }
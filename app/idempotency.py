@@ -0,0 +1,429 @@
+"""
+Idempotency-Key support for POST endpoints
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets
+the response of the first attempt back instead of creating the resource
+again. Completed responses are kept in a bounded in-process LRU and, with
+IDEMPOTENCY_STORE=database (opt-in), in the idempotency_keys table, so a
+retry landing on another worker is answered too. A replay returns the stored status,
+headers and body bytes without running the handler; a duplicate arriving
+while the first attempt is still running waits for it. Reusing a key for a
+different request body is rejected with 422.
+
+Keys are scoped to the request path. Only 2xx responses, and the 409/422
+answers that a retry would get again, are stored; after any other status a
+retry runs the request again. Bodies longer than IDEMPOTENCY_MAX_BODY_BYTES
+(e.g. CSV imports) are not buffered for hashing: such requests pass through
+without the key being applied.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app import models
+
+# memory (this worker only), database (shared by all workers) or off
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory").lower()
+# Completed responses kept in each worker's LRU
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Bytes of response bodies and headers the LRU holds at most
+IDEMPOTENCY_CACHE_BYTES = int(os.getenv("IDEMPOTENCY_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Seconds a stored response is replayed for
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Seconds a duplicate waits for the in-flight request before getting a 409; an
+# unfinished key older than this is treated as abandoned by a dead worker
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# Seconds between background purges of expired keys from the table (0 disables)
+IDEMPOTENCY_PURGE_INTERVAL = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
+# Longest request body buffered to hash; longer requests run without the key
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(1024 * 1024)))
+
+if IDEMPOTENCY_STORE not in ("memory", "database", "off"):
+    raise ValueError(f"IDEMPOTENCY_STORE must be memory, database or off, not {IDEMPOTENCY_STORE!r}")
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+MAX_KEY_LENGTH = 255
+# Seconds between looks at a key another worker is handling
+POLL_INTERVAL = 0.05
+# Client errors that a retry of the same request would get again
+STORED_CLIENT_ERRORS = (409, 422)
+
+logger = logging.getLogger(__name__)
+keys = models.IdempotencyKey.__table__
+
+
+class StoredResponse:
+    """Status, headers and body of a completed response"""
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+    def encode_headers(self) -> str:
+        return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers])
+
+    @classmethod
+    def from_row(cls, row) -> "StoredResponse":
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers)]
+        return cls(row.status_code, headers, bytes(row.body))
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status, "headers": self.headers + [REPLAYED_HEADER]})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class _Entry:
+    """A key in this worker: in flight until ``response`` is set or the entry is released"""
+
+    def __init__(self, request_hash: str):
+        self.request_hash = request_hash
+        self.created = time.monotonic()
+        self.response: Optional[StoredResponse] = None
+        self.size = 0
+        self.done = asyncio.Event()
+
+
+class IdempotencyCache:
+    """
+    LRU of the keys this worker has seen, bounded by entries and by stored
+    bytes. Only touched from the event loop, so checking for a key and
+    claiming it cannot interleave with another request.
+    """
+
+    def __init__(self, size: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL_SECONDS,
+                 max_bytes: int = IDEMPOTENCY_CACHE_BYTES):
+        self.size = size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.replays = 0
+        self.waits = 0
+        self.misses = 0
+        self.mismatches = 0
+        self.oversized = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.response is not None and time.monotonic() - entry.created >= self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def claim(self, key: str, request_hash: str) -> _Entry:
+        if key in self._entries:
+            self._remove(key)
+        entry = self._entries[key] = _Entry(request_hash)
+        # Evicting an in-flight key only costs its duplicates the chance to wait in memory
+        self._evict()
+        return entry
+
+    def complete(self, key: str, entry: _Entry, response: StoredResponse):
+        entry.response = response
+        if self._entries.get(key) is entry:
+            entry.size = response.size()
+            self.bytes += entry.size
+            self._evict()
+        entry.done.set()
+
+    def release(self, key: str, entry: _Entry):
+        """Forget a key whose request failed, waking its duplicates to run it again"""
+        if self._entries.get(key) is entry:
+            self._remove(key)
+        entry.done.set()
+
+    def _remove(self, key: str):
+        self.bytes -= self._entries.pop(key).size
+
+    def _evict(self):
+        """Drop the least recently used keys until both limits hold"""
+        while self._entries and (len(self._entries) > self.size or self.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "store": IDEMPOTENCY_STORE,
+            "size": len(self._entries),
+            "capacity": self.size,
+            "bytes": self.bytes,
+            "capacity_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "replays": self.replays,
+            "waits": self.waits,
+            "misses": self.misses,
+            "mismatches": self.mismatches,
+            "oversized": self.oversized,
+        }
+
+
+cache = IdempotencyCache()
+
+
+def _insert_if_absent(conn, key: str, request_hash: str):
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    return insert(keys).values(key=key, request_hash=request_hash).on_conflict_do_nothing().returning(keys.c.key)
+
+
+def claim_row(engine, key: str, request_hash: str,
+              ttl: float = IDEMPOTENCY_TTL_SECONDS, abandoned_after: float = IDEMPOTENCY_WAIT_SECONDS):
+    """
+    Mark ``key`` in flight for this request. Returns None once claimed, or the
+    row of the request already holding the key
+    """
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        if conn.execute(_insert_if_absent(conn, key, request_hash)).first() is not None:
+            return None
+        # Take over a key whose response expired or whose worker died mid-request
+        reclaimed = conn.execute(
+            update(keys)
+            .where(keys.c.key == key, or_(
+                and_(keys.c.status_code.isnot(None), keys.c.created_at < now - timedelta(seconds=ttl)),
+                and_(keys.c.status_code.is_(None), keys.c.created_at < now - timedelta(seconds=abandoned_after)),
+            ))
+            .values(request_hash=request_hash, status_code=None, headers=None, body=None, created_at=now)
+            .returning(keys.c.key)
+        ).first()
+        if reclaimed is not None:
+            return None
+        return conn.execute(select(keys).where(keys.c.key == key)).first()
+
+
+def complete_row(engine, key: str, response: StoredResponse):
+    with engine.begin() as conn:
+        conn.execute(
+            update(keys).where(keys.c.key == key)
+            .values(status_code=response.status, headers=response.encode_headers(), body=response.body)
+        )
+
+
+def release_row(engine, key: str):
+    with engine.begin() as conn:
+        conn.execute(delete(keys).where(keys.c.key == key, keys.c.status_code.is_(None)))
+
+
+def purge(engine, ttl: float = IDEMPOTENCY_TTL_SECONDS) -> int:
+    """Delete keys older than ``ttl`` seconds; returns how many"""
+    with engine.begin() as conn:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+        return conn.execute(delete(keys).where(keys.c.created_at < cutoff)).rowcount
+
+
+async def maintain_keys(engine, interval: float = IDEMPOTENCY_PURGE_INTERVAL):
+    """Background task purging expired keys from the table"""
+    if interval <= 0:
+        return
+    while True:
+        try:
+            purged = await run_in_threadpool(purge, engine)
+            if purged:
+                logger.info("Purged %d expired idempotency keys", purged)
+        except Exception:
+            logger.exception("Purging idempotency keys failed")
+        await asyncio.sleep(interval)
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware applying Idempotency-Key to POST requests. Add it inside
+    the compression middleware, so stored bodies are the uncompressed ones
+    and each replay is encoded for the client asking.
+    """
+
+    def __init__(self, app, engine=None, cache: IdempotencyCache = cache,
+                 wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS,
+                 max_body_bytes: int = IDEMPOTENCY_MAX_BODY_BYTES):
+        self.app = app
+        # None keeps keys in this worker's memory only
+        self.engine = engine
+        self.cache = cache
+        self.wait_seconds = wait_seconds
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        client_key = Headers(scope=scope).get(HEADER)
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        body, receive = await _buffer_body(receive, self.max_body_bytes)
+        if body is None:
+            self.cache.oversized += 1
+            await self.app(scope, receive, send)
+            return
+        key = hashlib.sha256(f"{scope['path']}\n{client_key}".encode()).hexdigest()
+        digest = hashlib.sha256(scope.get("query_string", b""))
+        digest.update(b"\n")
+        digest.update(body)
+        request_hash = digest.hexdigest()
+
+        deadline = time.monotonic() + self.wait_seconds
+        outcome = await self._claim(key, request_hash, deadline)
+        if not isinstance(outcome, _Entry):
+            await outcome(scope, receive, send)
+            return
+        await self._run(scope, receive, send, key, outcome)
+
+    async def _claim(self, key: str, request_hash: str, deadline: float):
+        """This request's entry once it holds the key, else the response to send instead"""
+        while True:
+            entry = self.cache.get(key)
+            if entry is None:
+                break
+            if entry.request_hash != request_hash:
+                self.cache.mismatches += 1
+                return _error(422, "Idempotency-Key was already used for a different request")
+            if entry.response is not None:
+                self.cache.replays += 1
+                return entry.response
+            # The same request is in flight in this worker: wait for its response
+            self.cache.waits += 1
+            try:
+                await asyncio.wait_for(entry.done.wait(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                return _error(409, "A request with this Idempotency-Key is still in progress")
+
+        entry = self.cache.claim(key, request_hash)
+        if self.engine is None:
+            self.cache.misses += 1
+            return entry
+        try:
+            row = await run_in_threadpool(claim_row, self.engine, key, request_hash)
+            # Held by another worker (or completed before this worker saw it)
+            while row is not None:
+                if row.request_hash != request_hash:
+                    self.cache.mismatches += 1
+                    self.cache.release(key, entry)
+                    return _error(422, "Idempotency-Key was already used for a different request")
+                if row.status_code is not None:
+                    response = StoredResponse.from_row(row)
+                    self.cache.complete(key, entry, response)
+                    self.cache.replays += 1
+                    return response
+                if time.monotonic() >= deadline:
+                    self.cache.release(key, entry)
+                    return _error(409, "A request with this Idempotency-Key is still in progress")
+                self.cache.waits += 1
+                await asyncio.sleep(POLL_INTERVAL)
+                row = await run_in_threadpool(claim_row, self.engine, key, request_hash)
+        except BaseException:
+            self.cache.release(key, entry)
+            raise
+        self.cache.misses += 1
+        return entry
+
+    async def _run(self, scope, receive, send, key: str, entry: _Entry):
+        recorder = _Recorder(send)
+        try:
+            await self.app(scope, receive, recorder.send)
+        except BaseException:
+            await self._release(key, entry)
+            raise
+        if not recorder.complete or not _storable(recorder.status):
+            await self._release(key, entry)
+            return
+        response = StoredResponse(recorder.status, recorder.headers, b"".join(recorder.body))
+        self.cache.complete(key, entry, response)
+        if self.engine is not None:
+            try:
+                await run_in_threadpool(complete_row, self.engine, key, response)
+            except Exception:
+                # Other workers treat the key as abandoned after IDEMPOTENCY_WAIT_SECONDS
+                logger.exception("Storing the response for an idempotency key failed")
+
+    async def _release(self, key: str, entry: _Entry):
+        self.cache.release(key, entry)
+        if self.engine is not None:
+            try:
+                await run_in_threadpool(release_row, self.engine, key)
+            except Exception:
+                logger.exception("Releasing an idempotency key failed")
+
+
+def _storable(status: Optional[int]) -> bool:
+    return status is not None and (200 <= status < 300 or status in STORED_CLIENT_ERRORS)
+
+
+async def _buffer_body(receive, limit: int):
+    """
+    Read the request body, giving up once it is longer than ``limit`` bytes.
+    Returns the body (None if it was too long) and a receive that hands the
+    messages read so far out again
+    """
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if size > limit:
+            return None, _replay(messages, receive)
+        if not message.get("more_body", False):
+            break
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.request")
+    return body, _replay(messages, receive)
+
+
+def _replay(messages: list, receive):
+    pending = list(messages)
+
+    async def replay():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay
+
+
+class _Recorder:
+    """Send wrapper passing a response through while keeping a copy"""
+
+    def __init__(self, send):
+        self.downstream = send
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body: List[bytes] = []
+        self.complete = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = [(bytes(name), bytes(value)) for name, value in message.get("headers", [])]
+        elif message["type"] == "http.response.body":
+            self.body.append(message.get("body", b""))
+            self.complete = not message.get("more_body", False)
+        await self.downstream(message)
@@ -0,0 +1,201 @@
+"""
+Streaming bulk import of CSV/NDJSON rows through a staging table
+"""
+import csv
+import io
+import json
+import tempfile
+import uuid
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Column, MetaData, Table, select, true
+
+from app import crud
+
+# Rows buffered before each COPY / INSERT into the staging table
+IMPORT_BATCH_SIZE = 10000
+# Cap on per-row errors returned, so a bad file cannot blow up the report
+MAX_REPORTED_ERRORS = 1000
+# Request bodies larger than this are spooled to disk while being received
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+def format_from_content_type(content_type: Optional[str]) -> ImportFormat:
+    """Guess the input format when the caller did not pass one explicitly"""
+    if content_type and "csv" in content_type:
+        return ImportFormat.csv
+    return ImportFormat.ndjson
+
+
+async def spool_body(request) -> io.TextIOWrapper:
+    """Receive a request body into a spooled temporary file and reopen it as text"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return io.TextIOWrapper(spool, encoding="utf-8", errors="replace", newline="")
+
+
+def read_records(stream: io.TextIOBase, fmt: ImportFormat) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line, record, parse_error) for every record in the input"""
+    if fmt == ImportFormat.csv:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Empty CSV cells mean "not provided"
+            yield reader.line_num, {key: (value if value != "" else None) for key, value in record.items()}, None
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+class _Report:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+
+def _staging_table(model, columns: List[str]) -> Table:
+    """A constraint-free temporary copy of the target columns"""
+    source = model.__table__
+    return Table(
+        f"import_{source.name}_{uuid.uuid4().hex[:8]}",
+        MetaData(),
+        *[Column(name, source.c[name].type) for name in columns],
+        prefixes=["TEMPORARY"],
+    )
+
+
+def _copy_batch(db, staging: Table, names: List[str], batch: List[dict]):
+    """Load one batch into the staging table: COPY on Postgres, executemany elsewhere"""
+    if crud.dialect_name(db) != "postgresql":
+        db.execute(staging.insert(), batch)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(["\\N" if row[name] is None else row[name] for name in names])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {staging.name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def import_rows(
+    db,
+    model,
+    schema: Type[BaseModel],
+    stream: io.TextIOBase,
+    fmt: ImportFormat,
+    unique_key: str = "phone_number",
+    prepare: Optional[Callable[[Dict], Dict]] = None,
+) -> dict:
+    """
+    Validate rows from ``stream`` against ``schema`` and merge them into ``model``.
+
+    Valid rows are streamed into a temporary staging table in batches, then
+    merged into the target with a single INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING on ``unique_key``. Rows that fail validation, repeat a key
+    earlier in the file, or collide with an existing row are reported by line.
+    ``prepare`` may add derived columns to each validated row.
+    """
+    report = _Report()
+    first_line: Dict[str, int] = {}
+    staging = None
+    names: List[str] = []
+    batch: List[dict] = []
+
+    for line, record, parse_error in read_records(stream, fmt):
+        report.received += 1
+        if parse_error:
+            report.fail(line, parse_error)
+            continue
+        try:
+            values = schema.model_validate(record).model_dump()
+        except ValidationError as e:
+            report.fail(line, _validation_message(e))
+            continue
+
+        key = values[unique_key]
+        if key in first_line:
+            report.fail(line, f"duplicate {unique_key}, first seen on line {first_line[key]}")
+            continue
+        first_line[key] = line
+
+        if prepare is not None:
+            values = prepare(values)
+        if staging is None:
+            names = list(values)
+            staging = _staging_table(model, names)
+            staging.create(db.connection())
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _copy_batch(db, staging, names, batch)
+            batch = []
+
+    if staging is None:
+        return report.as_dict()
+
+    if batch:
+        _copy_batch(db, staging, names, batch)
+
+    # WHERE true keeps SQLite from parsing ON CONFLICT as part of the SELECT
+    target_key = model.__table__.c[unique_key]
+    merge = crud.insert(db, model).from_select(
+        names, select(*[staging.c[name] for name in names]).where(true())
+    ).on_conflict_do_nothing(index_elements=[target_key]).returning(target_key)
+    inserted = set(db.execute(merge).scalars())
+    report.inserted = len(inserted)
+
+    for key, line in first_line.items():
+        if key not in inserted:
+            report.fail(line, f"{unique_key} already exists")
+
+    # On failure the session rollback discards the staging table with the rest
+    staging.drop(db.connection())
+    db.commit()
+    return report.as_dict()
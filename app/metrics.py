@@ -0,0 +1,232 @@
+"""
+Prometheus metrics in the text exposition format
+
+Request latency, in-flight requests and per-request SQL statement counts and
+database time are collected by MetricsMiddleware and the engine events
+installed by instrument_engine(). Metrics are per worker process. Counters
+are plain attribute and list updates, without locks: request metrics are
+only touched from the event loop, and a lost SQL increment under contention
+is an acceptable price for keeping locks off the query path.
+"""
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import anyio.to_thread
+from sqlalchemy import event
+
+from app import compression
+
+# Collect request and SQL metrics; /metrics is still served when disabled
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative histogram keyed by a tuple of label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> per-bucket counts (the last one is +Inf), then the sum
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, lines: List[str]):
+        _header(lines, self.name, self.documentation, "histogram")
+        for labels, series in list(self.series.items()):
+            base = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(base)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(base)} {cumulative}")
+
+
+class RequestStats:
+    """SQL work done on behalf of one request"""
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+class SqlStats:
+    """Totals over every statement, including those run outside requests"""
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to serve a request", ("method", "route", "status"), LATENCY_BUCKETS
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request", ("method", "route"), STATEMENT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ("method", "route"), LATENCY_BUCKETS
+)
+sql = SqlStats()
+in_flight = 0
+
+# Stats of the request being served; copied into threadpool workers with the context
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+def instrument_engine(engine):
+    """Count statements and their execution time on ``engine`` (a sync Engine)"""
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        sql.statements += 1
+        sql.seconds += elapsed
+        stats = _current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method, route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global in_flight
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight -= 1
+            _current_request.reset(token)
+            route = compression.route_path(scope)
+            REQUEST_DURATION.observe((scope["method"], route, str(status_code)), elapsed)
+            REQUEST_STATEMENTS.observe((scope["method"], route), stats.statements)
+            REQUEST_DB_SECONDS.observe((scope["method"], route), stats.seconds)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _header(lines: List[str], name: str, documentation: str, kind: str):
+    lines.append(f"# HELP {name} {documentation}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _metric(lines: List[str], name: str, documentation: str, kind: str, samples: Iterable):
+    """One metric family; ``samples`` are (label pairs, value)"""
+    _header(lines, name, documentation, kind)
+    for pairs, value in samples:
+        lines.append(f"{name}{_labels(pairs)} {value}")
+
+
+def render(pools: Optional[Dict[str, object]] = None, caches: Optional[Dict[str, object]] = None) -> str:
+    """
+    The current metrics as Prometheus text. ``pools`` maps a name to a
+    connection pool and ``caches`` a table name to a ReferenceCache. Must be
+    called from the event loop (it reads the threadpool limiter).
+    """
+    lines: List[str] = []
+    _metric(lines, "http_requests_in_flight", "Requests being served", "gauge", [((), in_flight)])
+    for histogram in (REQUEST_DURATION, REQUEST_STATEMENTS, REQUEST_DB_SECONDS):
+        histogram.render(lines)
+
+    _metric(lines, "db_statements_total", "SQL statements executed", "counter", [((), sql.statements)])
+    _metric(lines, "db_statement_seconds_total", "Time spent executing SQL", "counter", [((), sql.seconds)])
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    _metric(lines, "threadpool_threads_busy", "Threadpool tokens in use", "gauge", [((), limiter.borrowed_tokens)])
+    _metric(lines, "threadpool_threads_max", "Threadpool size", "gauge", [((), limiter.total_tokens)])
+    _metric(
+        lines, "threadpool_queue_depth", "Calls waiting for a threadpool thread", "gauge",
+        [((), limiter.statistics().tasks_waiting)],
+    )
+
+    pools = pools or {}
+    _metric(lines, "db_pool_connections", "Pooled connections by state", "gauge", [
+        ((("pool", name), ("state", state)), value)
+        for name, pool in pools.items()
+        for state, value in (("checked_out", pool.checkedout()), ("idle", pool.checkedin()), ("overflow", max(0, pool.overflow())))
+    ])
+    pool_stats = [(name, pool.stats) for name, pool in pools.items() if getattr(pool, "stats", None) is not None]
+    _metric(lines, "db_pool_checkouts_total", "Connection checkouts", "counter", [
+        ((("pool", name),), stats.checkouts) for name, stats in pool_stats
+    ])
+    _metric(lines, "db_pool_checkout_timeouts_total", "Checkouts that timed out", "counter", [
+        ((("pool", name),), stats.timeouts) for name, stats in pool_stats
+    ])
+    _metric(lines, "db_pool_checkout_wait_seconds_total", "Time spent waiting for a connection", "counter", [
+        ((("pool", name),), stats.wait_seconds_total) for name, stats in pool_stats
+    ])
+
+    routes = compression.stats.routes
+    for key, name, documentation in (
+        ("compressed", "http_responses_compressed_total", "Responses sent compressed"),
+        ("uncompressed", "http_responses_uncompressed_total", "Compressible responses sent as they were"),
+        ("bytes_in", "http_response_compression_bytes_in_total", "Bytes before compression"),
+        ("bytes_out", "http_response_compression_bytes_out_total", "Bytes after compression"),
+        ("cpu_seconds", "http_response_compression_cpu_seconds_total", "CPU time spent compressing"),
+    ):
+        _metric(lines, name, documentation, "counter", [
+            ((("route", route),), entry[key]) for route, entry in list(routes.items())
+        ])
+
+    caches = caches or {}
+    _metric(lines, "reference_cache_hits_total", "Reference cache hits", "counter", [
+        ((("table", name),), cache.hits) for name, cache in caches.items()
+    ])
+    _metric(lines, "reference_cache_misses_total", "Reference cache misses", "counter", [
+        ((("table", name),), cache.misses) for name, cache in caches.items()
+    ])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,128 @@
+"""
+Versioned schema migrations
+
+Each migration is a module in this package with VERSION, DESCRIPTION and an
+upgrade(conn) function, listed in MIGRATIONS in order. Applied versions are
+recorded in the schema_version table.
+
+A database without a schema_version table runs every migration from
+version 0: one created by create_all before migrations existed, or an empty
+one, which first gets the current tables from the models. Migrations must
+therefore tolerate objects that already exist.
+"""
+from typing import List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, exc, func, inspect, select
+
+from app.migrations import (
+    m0001_performance_indexes,
+    m0002_call_rollups,
+    m0003_partition_call_requests,
+    m0004_idempotency_keys,
+    m0005_pending_call_rollups,
+)
+from app.models import Base
+
+MIGRATIONS = [
+    m0001_performance_indexes,
+    m0002_call_rollups,
+    m0003_partition_call_requests,
+    m0004_idempotency_keys,
+    m0005_pending_call_rollups,
+]
+HEAD = MIGRATIONS[-1].VERSION
+# Postgres advisory lock key serializing upgrade_locked() across processes
+MIGRATION_LOCK_KEY = 7263514
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is older than this code expects"""
+
+
+def current_version(conn) -> Optional[int]:
+    """Latest applied version; None if the database has never been migrated"""
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def check(engine) -> int:
+    """Fail fast when migrations are pending; costs one query on a migrated database"""
+    with engine.connect() as conn:
+        try:
+            version = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        except exc.DBAPIError as error:
+            if error.connection_invalidated:
+                raise
+            # Most likely no schema_version table yet; confirm through the catalog
+            conn.rollback()
+            version = current_version(conn)
+    if version is None or version < HEAD:
+        raise SchemaVersionError(
+            f"Database schema is at version {version or 0}, this code needs {HEAD}; run `python init_db.py`"
+        )
+    return version
+
+
+def _stamp(conn, migrations):
+    conn.execute(
+        schema_version.insert(),
+        [{"version": migration.VERSION, "description": migration.DESCRIPTION} for migration in migrations],
+    )
+
+
+def upgrade(engine, target: int = HEAD) -> List[int]:
+    """Apply pending migrations up to ``target`` and return the versions applied"""
+    with engine.begin() as conn:
+        version = current_version(conn)
+        if version is None:
+            existing = set(inspect(conn).get_table_names()) & set(Base.metadata.tables)
+            schema_version.create(conn)
+            if not existing:
+                # Empty database: start from the models, then let migrations
+                # make the changes they cannot express (e.g. partitioning)
+                Base.metadata.create_all(conn)
+            version = 0
+
+    applied = []
+    for migration in MIGRATIONS:
+        if not version < migration.VERSION <= target:
+            continue
+        if getattr(migration, "TRANSACTIONAL", True):
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                _stamp(conn, [migration])
+        else:
+            with engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT")
+                migration.upgrade(conn)
+            with engine.begin() as conn:
+                _stamp(conn, [migration])
+        applied.append(migration.VERSION)
+    return applied
+
+
+def upgrade_locked(engine, target: int = HEAD) -> List[int]:
+    """
+    upgrade() for many workers starting at once: on Postgres they queue on an
+    advisory lock, so the first applies pending migrations and the others
+    find nothing left to do
+    """
+    if engine.dialect.name != "postgresql":
+        return upgrade(engine, target)
+    # Autocommit, so the lock holder has no open transaction for
+    # CREATE INDEX CONCURRENTLY to wait on
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(select(func.pg_advisory_lock(MIGRATION_LOCK_KEY)))
+        try:
+            return upgrade(engine, target)
+        finally:
+            lock.execute(select(func.pg_advisory_unlock(MIGRATION_LOCK_KEY)))
@@ -0,0 +1,56 @@
+"""
+Bring databases created by create_all up to date: indexes, the educator
+geohash column and the unique educator-area mapping
+"""
+from sqlalchemy import text
+
+from app import geo
+from app.migrations import ops
+
+VERSION = 1
+DESCRIPTION = "performance indexes"
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+TRANSACTIONAL = False
+
+# Educators updated per statement while backfilling geohashes
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _backfill_geohash(conn):
+    rows = conn.execute(text(
+        "SELECT id, latitude, longitude FROM educator "
+        "WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+    )).all()
+    values = [{"id": row.id, "geohash": geo.encode(row.latitude, row.longitude)} for row in rows]
+    for start in range(0, len(values), BACKFILL_BATCH_SIZE):
+        conn.execute(text("UPDATE educator SET geohash = :geohash WHERE id = :id"), values[start:start + BACKFILL_BATCH_SIZE])
+
+
+def upgrade(conn):
+    ops.add_column(conn, "educator", "geohash", "VARCHAR(12)")
+    _backfill_geohash(conn)
+
+    # Call request lookups by educator, by student and by time
+    ops.create_index(conn, "ix_call_requests_educator_id", "call_requests", ["educator_id"])
+    ops.create_index(conn, "ix_call_requests_student_id", "call_requests", ["student_id"])
+    ops.create_index(conn, "ix_call_requests_created_at_id", "call_requests", ["created_at", "id"])
+
+    # Keyset pagination
+    ops.create_index(conn, "ix_student_created_at_id", "student", ["created_at", "id"])
+    ops.create_index(conn, "ix_educator_created_at_id", "educator", ["created_at", "id"])
+
+    # Educator search and relation loading
+    ops.create_index(
+        conn, "ix_educator_geohash", "educator", ["geohash"], postgresql_ops={"geohash": "text_pattern_ops"}
+    )
+    ops.create_index(conn, "ix_educator_license_educator_id", "educator_license", ["educator_id"])
+    ops.create_index(conn, "ix_educator_degree_educator_id", "educator_degree", ["educator_id"])
+    ops.create_index(conn, "ix_educator_degree_degree_id_educator_id", "educator_degree", ["degree_id", "educator_id"])
+    ops.create_index(conn, "ix_educator_area_area_id_educator_id", "educator_area", ["area_id", "educator_id"])
+
+    # Duplicates slipped past the old check-then-insert; keep the oldest mapping
+    conn.execute(text(
+        "DELETE FROM educator_area WHERE id NOT IN "
+        "(SELECT MIN(id) FROM educator_area GROUP BY educator_id, area_id)"
+    ))
+    ops.add_unique_constraint(conn, "educator_area_educator_id_area_id_key", "educator_area", ["educator_id", "area_id"])
@@ -0,0 +1,20 @@
+"""
+Daily call request rollups per educator and student, backfilled from
+call_requests
+"""
+from sqlalchemy import select
+
+from app import models, rollups
+
+VERSION = 2
+DESCRIPTION = "call request rollups"
+
+TABLES = (models.EducatorCallStats, models.StudentCallStats, models.EducatorStudentCallStats)
+
+
+def upgrade(conn):
+    for model in TABLES:
+        model.__table__.create(conn, checkfirst=True)
+    # Only backfill once: rebuilding would drop counts for archived calls
+    if conn.execute(select(rollups.educator_stats.c.educator_id).limit(1)).first() is None:
+        rollups.rebuild(conn)
@@ -0,0 +1,66 @@
+"""
+Range-partition call_requests by month on PostgreSQL
+
+The table is rebuilt as a partitioned table and its rows copied over while
+writes are blocked, so run this in a quiet period on large databases. The
+primary key becomes (id, created_at), as PostgreSQL requires the partition
+key in unique constraints; ids still come from the same sequence. Other
+databases keep a plain table.
+"""
+from datetime import timezone
+
+from sqlalchemy import text
+
+from app import partitions
+from app.migrations import ops
+
+VERSION = 3
+DESCRIPTION = "partition call_requests by month"
+
+COPY_TABLE = "call_requests_partitioned"
+
+
+def upgrade(conn):
+    if not ops.is_postgres(conn) or partitions.is_partitioned(conn):
+        return
+
+    # Reads carry on while the copy runs; writes wait for the swap
+    conn.exec_driver_sql("LOCK TABLE call_requests IN EXCLUSIVE MODE")
+    first = conn.execute(text("SELECT min(created_at) FROM call_requests")).scalar()
+
+    conn.exec_driver_sql(f"""
+        CREATE TABLE {COPY_TABLE} (
+            id INTEGER NOT NULL DEFAULT nextval('call_requests_id_seq'),
+            educator_id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT {COPY_TABLE}_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    start = first.astimezone(timezone.utc).date() if first else None
+    partitions.ensure_partitions(conn, start=start, parent=COPY_TABLE)
+    conn.exec_driver_sql(f"""
+        INSERT INTO {COPY_TABLE} (id, educator_id, student_id, created_at)
+        SELECT id, educator_id, student_id, coalesce(created_at, now()) FROM call_requests
+    """)
+
+    # Keep the id sequence alive across the swap
+    conn.exec_driver_sql("ALTER SEQUENCE call_requests_id_seq OWNED BY NONE")
+    conn.exec_driver_sql("DROP TABLE call_requests")
+    conn.exec_driver_sql(f"ALTER TABLE {COPY_TABLE} RENAME TO call_requests")
+    conn.exec_driver_sql(f"ALTER TABLE call_requests RENAME CONSTRAINT {COPY_TABLE}_pkey TO call_requests_pkey")
+    conn.exec_driver_sql("ALTER SEQUENCE call_requests_id_seq OWNED BY call_requests.id")
+
+    conn.exec_driver_sql(
+        "ALTER TABLE call_requests ADD CONSTRAINT call_requests_educator_id_fkey "
+        "FOREIGN KEY (educator_id) REFERENCES educator (id)"
+    )
+    conn.exec_driver_sql(
+        "ALTER TABLE call_requests ADD CONSTRAINT call_requests_student_id_fkey "
+        "FOREIGN KEY (student_id) REFERENCES student (id)"
+    )
+    # Created on the parent, so every current and future partition gets them
+    conn.exec_driver_sql("CREATE INDEX ix_call_requests_id ON call_requests (id)")
+    conn.exec_driver_sql("CREATE INDEX ix_call_requests_educator_id ON call_requests (educator_id)")
+    conn.exec_driver_sql("CREATE INDEX ix_call_requests_student_id ON call_requests (student_id)")
+    conn.exec_driver_sql("CREATE INDEX ix_call_requests_created_at_id ON call_requests (created_at, id)")
@@ -0,0 +1,11 @@
+"""
+Stored responses for POST requests sent with an Idempotency-Key
+"""
+from app import models
+
+VERSION = 4
+DESCRIPTION = "idempotency keys"
+
+
+def upgrade(conn):
+    models.IdempotencyKey.__table__.create(conn, checkfirst=True)
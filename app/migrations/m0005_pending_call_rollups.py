@@ -0,0 +1,11 @@
+"""
+Queue of call request changes for deferred rollup maintenance
+"""
+from app import models
+
+VERSION = 5
+DESCRIPTION = "pending call rollups"
+
+
+def upgrade(conn):
+    models.PendingCallRollup.__table__.create(conn, checkfirst=True)
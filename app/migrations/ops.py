@@ -0,0 +1,64 @@
+"""
+Idempotent DDL helpers for migrations, safe to run against live tables
+"""
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import inspect, text
+
+
+def is_postgres(conn) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return any(existing["name"] == column for existing in inspect(conn).get_columns(table))
+
+
+def add_column(conn, table: str, column: str, ddl_type: str):
+    """ADD COLUMN unless it exists; keep new columns nullable so Postgres does not rewrite the table"""
+    if not has_column(conn, table, column):
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}")
+
+
+def create_index(
+    conn,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    unique: bool = False,
+    postgresql_ops: Optional[Dict[str, str]] = None,
+):
+    """
+    CREATE INDEX IF NOT EXISTS.
+
+    On Postgres the index is built CONCURRENTLY so writes to the table are not
+    blocked, which needs an autocommit connection. An invalid index left behind
+    by an interrupted concurrent build is dropped and built again.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if not is_postgres(conn):
+        conn.exec_driver_sql(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        return
+
+    valid = conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if valid is False:
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    ops = postgresql_ops or {}
+    parts = [f"{column} {ops[column]}" if column in ops else column for column in columns]
+    conn.exec_driver_sql(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(parts)})")
+
+
+def add_unique_constraint(conn, name: str, table: str, columns: Sequence[str]):
+    """
+    Add a unique constraint without a long exclusive lock: build the index
+    concurrently, then attach it as the constraint. SQLite cannot add
+    constraints to a table, so the unique index stands in for it there.
+    """
+    create_index(conn, name, table, columns, unique=True)
+    if not is_postgres(conn):
+        return
+    exists = conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}).first()
+    if not exists:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
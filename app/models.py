@@ -1,11 +1,34 @@
 """
 SQLAlchemy models
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, LargeBinary, Text, Index, UniqueConstraint, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import FunctionElement
+from app import geo
 from app.database import Base
 
+
+class timestamp_now(FunctionElement):
+    """now(), written on SQLite in the format SQLAlchemy uses for datetimes there"""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(timestamp_now)
+def _compile_timestamp_now(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(timestamp_now, "sqlite")
+def _compile_timestamp_now_sqlite(element, compiler, **kw):
+    # SQLite compares timestamps as text, so CURRENT_TIMESTAMP's
+    # '2026-01-01 10:00:00' sorts before a bound '2026-01-01 10:00:00.000000'
+    # and keyset cursors would skip rows created in the same second
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 class Institute(Base):
     __tablename__ = "institute"
 
@@ -37,14 +60,18 @@ class Degree(Base):
 
 class Student(Base):
     __tablename__ = "student"
+    __table_args__ = (
+        # Keyset pagination sort key
+        Index("ix_student_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(20), unique=True, nullable=False)
     name = Column(String(255), nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=timestamp_now())
+    updated_at = Column(DateTime(timezone=True), onupdate=timestamp_now())
 
     # Relationship
     call_requests = relationship("CallRequest", back_populates="student")
@@ -52,6 +79,13 @@ class Student(Base):
 
 class Educator(Base):
     __tablename__ = "educator"
+    __table_args__ = (
+        # Keyset pagination sort key
+        Index("ix_educator_created_at_id", "created_at", "id"),
+        # Prefix scans for nearby search; text_pattern_ops lets Postgres use
+        # the B-tree for LIKE 'prefix%' regardless of the database collation
+        Index("ix_educator_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(20), unique=True, nullable=False)
@@ -59,9 +93,11 @@ class Educator(Base):
     description = Column(Text, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    # Derived from latitude/longitude, see _set_educator_geohash
+    geohash = Column(String(12), nullable=True)
     is_licensed = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=timestamp_now())
+    updated_at = Column(DateTime(timezone=True), onupdate=timestamp_now())
 
     # Relationships
     licenses = relationship("EducatorLicense", back_populates="educator", cascade="all, delete-orphan")
@@ -70,11 +106,18 @@ class Educator(Base):
     call_requests = relationship("CallRequest", back_populates="educator")
 
 
+@event.listens_for(Educator, "before_insert")
+@event.listens_for(Educator, "before_update")
+def _set_educator_geohash(mapper, connection, target):
+    """Keep the geohash in sync with the educator's coordinates"""
+    target.geohash = geo.encode(target.latitude, target.longitude)
+
+
 class EducatorLicense(Base):
     __tablename__ = "educator_license"
 
     id = Column(Integer, primary_key=True, index=True)
-    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False)
+    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False, index=True)
     registration_number = Column(String(255), nullable=True)
     issuing_authority = Column(String(255), nullable=True)
 
@@ -84,9 +127,13 @@ class EducatorLicense(Base):
 
 class EducatorDegree(Base):
     __tablename__ = "educator_degree"
+    __table_args__ = (
+        # Educator search by degree
+        Index("ix_educator_degree_degree_id_educator_id", "degree_id", "educator_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False)
+    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False, index=True)
     degree_id = Column(Integer, ForeignKey("degree.id"), nullable=False)
     institute_id = Column(Integer, ForeignKey("institute.id"), nullable=True)
 
@@ -98,6 +145,12 @@ class EducatorDegree(Base):
 
 class EducatorArea(Base):
     __tablename__ = "educator_area"
+    __table_args__ = (
+        # Educator search by area
+        Index("ix_educator_area_area_id_educator_id", "area_id", "educator_id"),
+        # One mapping per educator and area
+        UniqueConstraint("educator_id", "area_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False)
@@ -110,12 +163,80 @@ class EducatorArea(Base):
 
 class CallRequest(Base):
     __tablename__ = "call_requests"
+    __table_args__ = (
+        # Keyset pagination sort key; also serves created_at range scans
+        Index("ix_call_requests_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False)
-    student_id = Column(Integer, ForeignKey("student.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    educator_id = Column(Integer, ForeignKey("educator.id"), nullable=False, index=True)
+    student_id = Column(Integer, ForeignKey("student.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=timestamp_now())
 
     # Relationships
     educator = relationship("Educator", back_populates="call_requests")
     student = relationship("Student", back_populates="call_requests")
+
+
+# Call request rollups, maintained by app.rollups. Keys carry no foreign keys:
+# the counts outlive the call requests they were built from.
+class EducatorCallStats(Base):
+    __tablename__ = "educator_call_stats"
+
+    educator_id = Column(Integer, primary_key=True)
+    # UTC day of the calls
+    day = Column(Date, primary_key=True)
+    call_count = Column(Integer, nullable=False, default=0)
+    distinct_students = Column(Integer, nullable=False, default=0)
+    last_called_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class StudentCallStats(Base):
+    __tablename__ = "student_call_stats"
+
+    student_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    call_count = Column(Integer, nullable=False, default=0)
+    last_called_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class EducatorStudentCallStats(Base):
+    # One row per educator, student and day; backs distinct_students
+    __tablename__ = "educator_student_call_stats"
+
+    educator_id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    call_count = Column(Integer, nullable=False, default=0)
+
+
+class PendingCallRollup(Base):
+    # Call request changes queued for the rollups when CALL_ROLLUP_MODE=deferred
+    __tablename__ = "pending_call_rollups"
+
+    id = Column(Integer, primary_key=True)
+    educator_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, nullable=False)
+    # created_at of the call request, which picks the rollup day
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    # +1 counts the call request, -1 uncounts it
+    change = Column(Integer, nullable=False)
+
+
+class IdempotencyKey(Base):
+    # Responses of POST requests sent with an Idempotency-Key, see app.idempotency
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Purging expired keys
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    # SHA-256 of the request path and the client's key
+    key = Column(String(64), primary_key=True)
+    # SHA-256 of the request body, to reject a key reused for another request
+    request_hash = Column(String(64), nullable=False)
+    # NULL while the first request is still being handled
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=timestamp_now(), nullable=False)
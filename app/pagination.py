@@ -0,0 +1,85 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import DateTime, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return"),
+        after: Optional[str] = Query(None, description="Opaque cursor taken from a previous page's next_cursor"),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """Decode a cursor back into sort key values for the given columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        values = []
+        for column, value in zip(columns, payload):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, int):
+                raise ValueError("cursor does not match sort key")
+            values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset(query, columns: Sequence, params: PageParams):
+    """
+    Restrict a query or select() to one page of rows after the cursor.
+
+    ``columns`` is the sort key, e.g. ``(Model.created_at, Model.id)``; its last
+    column must be unique. One extra row is fetched so split_page can tell
+    whether another page exists. Every page is an index range scan starting at
+    the cursor, so deep pages cost the same as the first one.
+    """
+    if params.after:
+        values = decode_cursor(params.after, columns)
+        if len(columns) == 1:
+            query = query.filter(columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    return query.order_by(*columns).limit(params.limit + 1)
+
+
+def split_page(rows: Sequence, columns: Sequence, params: PageParams):
+    """Turn the rows fetched by a keyset query into ``(items, next_cursor)``"""
+    if len(rows) <= params.limit:
+        return list(rows), None
+
+    rows = rows[:params.limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return list(rows), next_cursor
+
+
+def paginate(query, columns: Sequence, params: PageParams):
+    """Apply keyset pagination to a query; returns ``(items, next_cursor)``"""
+    return split_page(keyset(query, columns, params).all(), columns, params)
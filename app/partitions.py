@@ -0,0 +1,191 @@
+"""
+Monthly range partitions of call_requests on PostgreSQL: creation ahead of
+time, and retention by archiving and dropping whole partitions
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+TABLE = "call_requests"
+DEFAULT_PARTITION = f"{TABLE}_default"
+# Months of empty partitions kept ready beyond the current one
+PARTITION_MONTHS_AHEAD = int(os.getenv("CALL_REQUESTS_PARTITION_MONTHS_AHEAD", "3"))
+# Seconds between background checks for missing future partitions (0 disables)
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("CALL_REQUESTS_PARTITION_MAINTENANCE_INTERVAL", "21600"))
+# Retention defaults for manage_partitions.py; 0 months keeps everything
+RETENTION_MONTHS = int(os.getenv("CALL_REQUESTS_RETENTION_MONTHS", "0"))
+ARCHIVE_DIR = os.getenv("CALL_REQUESTS_ARCHIVE_DIR") or None
+# Rows fetched per round trip while writing an archive
+ARCHIVE_BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+# Serializes partition DDL across workers
+_ADVISORY_LOCK_KEY = 0x63616C6C  # "call"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def is_partitioned(conn) -> bool:
+    """Whether call_requests is a partitioned table (PostgreSQL only)"""
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": TABLE}).scalar()
+    return relkind == "p"
+
+
+def partition_names(conn, parent: str = TABLE) -> List[str]:
+    """Names of the partitions currently attached to ``parent``"""
+    return list(conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent) ORDER BY c.relname"
+        ),
+        {"parent": parent},
+    ).scalars())
+
+
+def ensure_partitions(
+    conn,
+    start: Optional[date] = None,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    parent: str = TABLE,
+) -> List[str]:
+    """
+    Create the monthly partitions from ``start`` (default: this month) up to
+    ``months_ahead`` months from now, plus the default partition. Must run in
+    a transaction. Returns the partitions created.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    existing = set(partition_names(conn, parent))
+    month = month_start(start or _utc_today())
+    last = add_months(month_start(_utc_today()), months_ahead)
+    created = []
+    while month <= last:
+        following = add_months(month, 1)
+        name = partition_name(month)
+        if name not in existing:
+            conn.exec_driver_sql(
+                f"CREATE TABLE {name} PARTITION OF {parent} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+            )
+            created.append(name)
+        month = following
+    # Catches rows outside every monthly range, so inserts never fail; it should stay empty
+    if DEFAULT_PARTITION not in existing:
+        conn.exec_driver_sql(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {parent} DEFAULT")
+        created.append(DEFAULT_PARTITION)
+    return created
+
+
+def expired_partitions(conn, keep_months: int, today: Optional[date] = None) -> List[str]:
+    """Monthly partitions entirely older than the current month minus ``keep_months``"""
+    horizon = add_months(month_start(today or _utc_today()), -keep_months)
+    return [
+        name for name in partition_names(conn)
+        if partition_month(name) is not None and partition_month(name) < horizon
+    ]
+
+
+def archive_partition(engine, name: str, directory: str) -> dict:
+    """Write every row of a partition to ``directory/<name>.ndjson.gz``"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.ndjson.gz")
+    partial = f"{path}.partial"
+    rows = 0
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=ARCHIVE_BATCH_SIZE).execute(
+            text(f"SELECT id, educator_id, student_id, created_at FROM {name} ORDER BY id")
+        )
+        with gzip.open(partial, "wt", encoding="utf-8") as out:
+            for batch in result.partitions():
+                out.write("".join(
+                    json.dumps({
+                        "id": row.id,
+                        "educator_id": row.educator_id,
+                        "student_id": row.student_id,
+                        "created_at": row.created_at.isoformat() if row.created_at else None,
+                    }) + "\n"
+                    for row in batch
+                ))
+                rows += len(batch)
+    # Only a complete archive gets the final name
+    os.replace(partial, path)
+    return {"path": path, "rows": rows}
+
+
+def apply_retention(engine, keep_months: int = RETENTION_MONTHS, archive_dir: Optional[str] = ARCHIVE_DIR) -> List[dict]:
+    """
+    Retire partitions older than ``keep_months``.
+
+    With ``archive_dir`` each partition is first written out as compressed
+    NDJSON, then detached and dropped; without it the partition is only
+    detached, leaving a standalone table to deal with by hand. Call request
+    rollups are unaffected.
+    """
+    if keep_months <= 0:
+        return []
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            raise RuntimeError(f"{TABLE} is not partitioned; retention needs PostgreSQL and migration 3")
+        expired = expired_partitions(conn, keep_months)
+
+    retired = []
+    for name in expired:
+        archive = archive_partition(engine, name, archive_dir) if archive_dir else None
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            if archive is not None:
+                conn.exec_driver_sql(f"DROP TABLE {name}")
+        retired.append({"partition": name, "dropped": archive is not None, "archive": archive})
+    return retired
+
+
+def _ensure_future_partitions(engine) -> Optional[List[str]]:
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return None
+        return ensure_partitions(conn)
+
+
+async def maintain_partitions(engine, interval: float = PARTITION_MAINTENANCE_INTERVAL):
+    """Background task that keeps future partitions created; returns if the table is not partitioned"""
+    if interval <= 0:
+        return
+    while True:
+        try:
+            if await run_in_threadpool(_ensure_future_partitions, engine) is None:
+                return
+        except Exception:
+            # A database outage must not end maintenance for the life of the process
+            logger.exception("Creating call_requests partitions failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,134 @@
+"""
+Connection pool configuration and checkout statistics
+"""
+import asyncio
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Counters for time spent waiting on pool checkouts"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        # Plain attribute updates: a lost increment under contention is an
+        # acceptable price for keeping a lock off the checkout path
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+        self.wait_seconds_total += waited
+        if waited > self.wait_seconds_max:
+            self.wait_seconds_max = waited
+
+
+class _InstrumentedPoolMixin:
+    """Time every checkout, including the wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def engine_options(is_async: bool = False, dialect: str = "postgresql") -> dict:
+    """
+    Build create_engine keyword arguments from the PG_DB_POOL_* variables.
+
+    Defaults match SQLAlchemy's own QueuePool defaults; PG_DB_STATEMENT_TIMEOUT
+    (milliseconds, 0 disables it) is applied as a server setting on connect.
+    SQLite databases get the same pool, shared across threadpool threads.
+    """
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": int(os.getenv("PG_DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("PG_DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("PG_DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("PG_DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": _env_bool("PG_DB_POOL_PRE_PING", False),
+    }
+    if dialect == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+    statement_timeout = int(os.getenv("PG_DB_STATEMENT_TIMEOUT", "0"))
+    if statement_timeout > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def prewarm(engine, connections: int) -> int:
+    """Open up to ``connections`` pooled connections (at most the pool size) ahead of traffic"""
+    connections = min(connections, getattr(engine.pool, "size", lambda: connections)())
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        # Closing returns them to the pool, where they stay open
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+async def prewarm_async(async_engine, connections: int) -> int:
+    """prewarm() for an AsyncEngine, connecting concurrently"""
+    connections = min(connections, getattr(async_engine.pool, "size", lambda: connections)())
+    opened = await asyncio.gather(*(async_engine.connect().start() for _ in range(connections)))
+    for conn in opened:
+        await conn.close()
+    return len(opened)
+
+
+def pool_status(pool) -> dict:
+    """Snapshot of a pool's connections and checkout wait times"""
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update({
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.timeouts,
+            "checkout_wait_ms_total": round(stats.wait_seconds_total * 1000, 3),
+            "checkout_wait_ms_avg": round(stats.wait_seconds_total * 1000 / stats.checkouts, 3) if stats.checkouts else 0.0,
+            "checkout_wait_ms_max": round(stats.wait_seconds_max * 1000, 3),
+        })
+    return status
@@ -0,0 +1,183 @@
+"""
+Slow-query log and N+1 detection
+
+Every statement slower than SLOW_QUERY_MS is logged with its normalized SQL
+and bind count. Requests picked by QUERY_LOG_MODE (every request in ``dev``,
+a QUERY_LOG_SAMPLE_RATE fraction in ``sample``) also record all of their
+statements; a SELECT shape repeated N_PLUS_ONE_THRESHOLD times or more in one
+request, typically a lazy relationship load inside a loop, is reported as a
+likely N+1. With QUERY_LOG_RAISE the request fails instead, so tests catch it.
+"""
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app import compression
+
+# off, dev (record every request) or sample (record QUERY_LOG_SAMPLE_RATE of them)
+QUERY_LOG_MODE = os.getenv("QUERY_LOG_MODE", "off").lower()
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "0.01"))
+# Statements slower than this are logged in every mode but off (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Executions of one SELECT shape within a request that count as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Raise NPlusOneError at the end of an offending request, e.g. in CI
+QUERY_LOG_RAISE = os.getenv("QUERY_LOG_RAISE", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LIBRARY_DIRS = (os.sep + "site-packages" + os.sep, os.sep + "sqlalchemy" + os.sep)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+# Bind markers of every paramstyle: ?, %s, %(name)s, $1 and :name
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+# Expanded IN lists and multi-row VALUES collapse to one entry
+_LIST = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+_VALUES = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+class NPlusOneError(AssertionError):
+    """A request repeated the same query shape too often"""
+
+
+def normalize(statement: str) -> str:
+    """Statement shape: literals and binds replaced by ?, lists collapsed, whitespace squeezed"""
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?)", shape)
+    shape = _VALUES.sub(r"\1", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def bind_count(parameters, executemany: bool) -> int:
+    """Bound values sent with a statement, over every row of an executemany"""
+    if executemany:
+        return sum(len(row) for row in parameters)
+    return len(parameters) if parameters else 0
+
+
+def _caller() -> str:
+    """Innermost application frame outside SQLAlchemy, to point at the code issuing a query"""
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(_APP_DIR) and filename != __file__ and not any(part in filename for part in _LIBRARY_DIRS):
+            return f"{os.path.relpath(filename, _APP_DIR)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class QueryLog:
+    """Statements recorded for one request (or one capture() block)"""
+
+    def __init__(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.threshold = threshold
+        self.statements: List[dict] = []
+        self.shapes: Counter = Counter()
+        # First call site of each shape that reached the threshold
+        self.callers: Dict[str, str] = {}
+
+    def record(self, shape: str, seconds: float, binds: int):
+        self.statements.append({"sql": shape, "ms": round(seconds * 1000, 3), "binds": binds})
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold and shape.upper().startswith("SELECT"):
+            self.callers[shape] = _caller()
+
+    def n_plus_one(self) -> List[dict]:
+        """Repeated SELECT shapes, most frequent first"""
+        return [
+            {"sql": shape, "count": count, "caller": self.callers.get(shape, "unknown")}
+            for shape, count in self.shapes.most_common()
+            if count >= self.threshold and shape in self.callers
+        ]
+
+    def report(self, where: str, raise_errors: bool = False):
+        """Log N+1 suspects; raise NPlusOneError if asked to and there are any"""
+        suspects = self.n_plus_one()
+        for suspect in suspects:
+            logger.warning(
+                "Possible N+1 in %s: %d x %s (first repeated at %s)",
+                where, suspect["count"], suspect["sql"], suspect["caller"],
+            )
+        if suspects and raise_errors:
+            worst = suspects[0]
+            raise NPlusOneError(
+                f"{where} ran {worst['count']} x {worst['sql']} (first repeated at {worst['caller']})"
+            )
+
+
+_current_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+def instrument_engine(engine):
+    """
+    Time statements on ``engine`` (a sync Engine) for the slow-query log and
+    request logs; the app does this unless QUERY_LOG_MODE is off, tests can
+    do it for their own engines
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._querylog_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._querylog_started
+        log = _current_log.get()
+        slow = SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS
+        if log is None and not slow:
+            return
+        shape = normalize(statement)
+        binds = bind_count(parameters, executemany)
+        if slow:
+            logger.warning("Slow query (%.1f ms, %d binds): %s", elapsed * 1000, binds, shape)
+        if log is not None:
+            log.record(shape, elapsed, binds)
+
+
+@contextmanager
+def capture(threshold: int = N_PLUS_ONE_THRESHOLD, raise_errors: bool = True):
+    """
+    Record the statements run inside the block on instrumented engines, e.g.
+    in a test; raises NPlusOneError on exit if a SELECT shape repeats
+    ``threshold`` times, unless ``raise_errors`` is False
+    """
+    log = QueryLog(threshold)
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+    log.report("capture()", raise_errors)
+
+
+class QueryLogMiddleware:
+    """ASGI middleware recording the statements of dev-mode or sampled requests"""
+
+    def __init__(self, app, mode: str = QUERY_LOG_MODE, sample_rate: float = QUERY_LOG_SAMPLE_RATE):
+        self.app = app
+        self.mode = mode
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.mode != "dev" and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_log.reset(token)
+        log.report(f"{scope['method']} {compression.route_path(scope)}", QUERY_LOG_RAISE)
@@ -0,0 +1,130 @@
+"""
+Read replica routing
+
+GET handlers read through database.get_read_db, which picks a replica from
+PG_DB_REPLICA_URLS (round robin, or the one with the fewest checked-out
+connections) and falls back to the primary when none is reachable. A replica
+that fails to connect or drops a connection is skipped for
+PG_DB_REPLICA_RETRY_SECONDS. After a successful write a client is sent a
+cookie that keeps its reads on the primary for READ_AFTER_WRITE_SECONDS, so it
+sees its own writes despite replication lag.
+"""
+import itertools
+import os
+import time
+from http.cookies import SimpleCookie
+from typing import List, Optional
+
+# Comma-separated SQLAlchemy URLs of read replicas; empty sends every read to the primary
+PG_DB_REPLICA_URLS = [url.strip() for url in os.getenv("PG_DB_REPLICA_URLS", "").split(",") if url.strip()]
+# round_robin or least_connections
+PG_DB_REPLICA_BALANCE = os.getenv("PG_DB_REPLICA_BALANCE", "round_robin").lower()
+# Seconds a failed replica is left out before it is tried again
+PG_DB_REPLICA_RETRY_SECONDS = float(os.getenv("PG_DB_REPLICA_RETRY_SECONDS", "30"))
+# Seconds a client's reads stay on the primary after it writes (0 disables)
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+
+STICKY_COOKIE = "read_primary_until"
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class Replica:
+    """One replica's engines and health"""
+
+    def __init__(self, name: str, engine, async_engine=None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    def is_up(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def mark_down(self, retry_seconds: float = PG_DB_REPLICA_RETRY_SECONDS):
+        self.failures += 1
+        self.down_until = time.monotonic() + retry_seconds
+
+    def checked_out(self, is_async: bool = False) -> int:
+        engine = self.async_engine if is_async else self.engine
+        return engine.pool.checkedout()
+
+    def status(self) -> dict:
+        return {
+            "up": self.is_up(time.monotonic()),
+            "reads": self.reads,
+            "failures": self.failures,
+        }
+
+
+class ReplicaSet:
+    """
+    Replicas in the order reads should try them. Counters are plain
+    attributes, like the pool statistics, so no lock is taken per read.
+    """
+
+    def __init__(self, replicas: List[Replica], balance: str = PG_DB_REPLICA_BALANCE):
+        if balance not in ("round_robin", "least_connections"):
+            raise ValueError(f"unknown replica balance {balance!r}")
+        self.replicas = replicas
+        self.balance = balance
+        self.primary_reads = 0
+        self._turn = itertools.count()
+
+    def candidates(self, is_async: bool = False) -> List[Replica]:
+        """Replicas that are up, best first"""
+        now = time.monotonic()
+        up = [replica for replica in self.replicas if replica.is_up(now)]
+        if len(up) < 2:
+            return up
+        if self.balance == "least_connections":
+            return sorted(up, key=lambda replica: replica.checked_out(is_async))
+        start = next(self._turn) % len(up)
+        return up[start:] + up[:start]
+
+    def status(self) -> dict:
+        return {
+            "balance": self.balance,
+            "primary_reads": self.primary_reads,
+            "replicas": {replica.name: replica.status() for replica in self.replicas},
+        }
+
+
+def reads_from_primary(cookies: dict, now: Optional[float] = None) -> bool:
+    """Whether a client's read-after-write window is still open"""
+    try:
+        until = float(cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > (time.time() if now is None else now)
+
+
+class ReadAfterWriteMiddleware:
+    """
+    ASGI middleware sending the read-after-write cookie with every successful
+    write response; it holds a wall-clock deadline, so any worker honours it
+    """
+
+    def __init__(self, app, window: float = READ_AFTER_WRITE_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS or self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[STICKY_COOKIE] = f"{time.time() + self.window:.3f}"
+                cookie[STICKY_COOKIE]["max-age"] = int(self.window + 1)
+                cookie[STICKY_COOKIE]["path"] = "/"
+                cookie[STICKY_COOKIE]["httponly"] = True
+                cookie[STICKY_COOKIE]["samesite"] = "lax"
+                header = cookie.output(header="").strip().encode("latin-1")
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", header)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
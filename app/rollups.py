@@ -0,0 +1,307 @@
+"""
+Daily call request rollups per educator and per student
+
+Stats endpoints read a handful of rollup rows per day instead of scanning
+call_requests. With CALL_ROLLUP_MODE=sync the rollups are updated in the
+transaction of every call request insert, update and delete: three upserts
+per created call, and writes for the same educator or student and day wait
+on each other's rollup row locks until they commit. With deferred, a write
+only appends its changes to pending_call_rollups, and maintain_rollups
+applies them every CALL_ROLLUP_INTERVAL seconds, summed per rollup row, so
+stats trail the writes by about that long.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Date, cast, delete, func, insert, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from app import crud, models
+
+# sync (in each write's transaction) or deferred (applied by maintain_rollups)
+CALL_ROLLUP_MODE = os.getenv("CALL_ROLLUP_MODE", "sync").lower()
+# Seconds between applications of pending changes in deferred mode
+CALL_ROLLUP_INTERVAL = float(os.getenv("CALL_ROLLUP_INTERVAL", "1"))
+# Pending changes applied per transaction
+CALL_ROLLUP_BATCH_SIZE = int(os.getenv("CALL_ROLLUP_BATCH_SIZE", "10000"))
+# Rollup keys written per INSERT ... ON CONFLICT statement
+ROLLUP_BATCH_SIZE = 1000
+
+if CALL_ROLLUP_MODE not in ("sync", "deferred"):
+    raise ValueError(f"CALL_ROLLUP_MODE must be sync or deferred, not {CALL_ROLLUP_MODE!r}")
+
+logger = logging.getLogger(__name__)
+
+# Serializes the application of pending changes across workers
+_ADVISORY_LOCK_KEY = 0x726F6C6C  # "roll"
+
+calls = models.CallRequest.__table__
+educator_stats = models.EducatorCallStats.__table__
+student_stats = models.StudentCallStats.__table__
+pair_stats = models.EducatorStudentCallStats.__table__
+pending = models.PendingCallRollup.__table__
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; the server default stores UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def utc_day(value: datetime) -> date:
+    return _as_utc(value).date()
+
+
+def day_bounds(day: date):
+    """[start, end) of a UTC day as timestamps"""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _later(db, current, new):
+    """Later of two timestamps, treating a NULL current value as missing"""
+    if crud.dialect_name(db) == "postgresql":
+        return func.greatest(current, new)
+    # SQLite's two-argument max() is scalar, and NULL if either side is
+    return func.max(func.coalesce(current, new), new)
+
+
+def _upsert(db, table, keys: Sequence[str], rows: List[Dict], increments: Sequence[str], latest: Optional[str] = None):
+    """
+    Add ``rows`` to ``table`` with one INSERT ... ON CONFLICT per batch,
+    incrementing the ``increments`` columns of existing rows and keeping the
+    later ``latest`` timestamp. Returns the resulting rows.
+    """
+    result = []
+    for start in range(0, len(rows), ROLLUP_BATCH_SIZE):
+        stmt = crud.insert(db, table).values(rows[start:start + ROLLUP_BATCH_SIZE])
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in increments}
+        if latest:
+            set_[latest] = _later(db, table.c[latest], stmt.excluded[latest])
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c[key] for key in keys], set_=set_)
+        result.extend(db.execute(stmt.returning(*table.columns)).all())
+    return result
+
+
+def add_calls(db, rows: Iterable, mode: Optional[str] = None):
+    """Count new call requests; rows need educator_id, student_id and created_at"""
+    if (mode or CALL_ROLLUP_MODE) == "deferred":
+        _queue(db, rows, 1)
+        return
+    _apply_added(db, rows)
+
+
+def remove_calls(db, rows: Iterable, mode: Optional[str] = None):
+    """Uncount call requests; call after they are deleted from (or moved within) call_requests"""
+    if (mode or CALL_ROLLUP_MODE) == "deferred":
+        _queue(db, rows, -1)
+        return
+    _apply_removed(db, rows)
+
+
+def _queue(db, rows: Iterable, change: int):
+    values = [
+        {"educator_id": row.educator_id, "student_id": row.student_id, "created_at": row.created_at, "change": change}
+        for row in rows
+    ]
+    if values:
+        db.execute(insert(pending), values)
+
+
+def _apply_added(db, rows: Iterable):
+    pairs = Counter()
+    educator_last: Dict = {}
+    student_last: Dict = {}
+    for row in rows:
+        day = utc_day(row.created_at)
+        created_at = _as_utc(row.created_at)
+        pairs[(row.educator_id, row.student_id, day)] += 1
+        for last, key in ((educator_last, (row.educator_id, day)), (student_last, (row.student_id, day))):
+            if key not in last or last[key] < created_at:
+                last[key] = created_at
+    if not pairs:
+        return
+
+    # Sorted keys keep concurrent writers locking rollup rows in the same order
+    returned = _upsert(
+        db,
+        pair_stats,
+        ("educator_id", "student_id", "day"),
+        [
+            {"educator_id": educator_id, "student_id": student_id, "day": day, "call_count": count}
+            for (educator_id, student_id, day), count in sorted(pairs.items())
+        ],
+        ("call_count",),
+    )
+    # A pair whose count is exactly what was just added is a new student for that day
+    new_students = Counter(
+        (row.educator_id, row.day) for row in returned
+        if row.call_count == pairs[(row.educator_id, row.student_id, row.day)]
+    )
+
+    educator_counts = Counter()
+    student_counts = Counter()
+    for (educator_id, student_id, day), count in pairs.items():
+        educator_counts[(educator_id, day)] += count
+        student_counts[(student_id, day)] += count
+
+    _upsert(
+        db,
+        educator_stats,
+        ("educator_id", "day"),
+        [
+            {
+                "educator_id": educator_id,
+                "day": day,
+                "call_count": count,
+                "distinct_students": new_students[(educator_id, day)],
+                "last_called_at": educator_last[(educator_id, day)],
+            }
+            for (educator_id, day), count in sorted(educator_counts.items())
+        ],
+        ("call_count", "distinct_students"),
+        latest="last_called_at",
+    )
+    _upsert(
+        db,
+        student_stats,
+        ("student_id", "day"),
+        [
+            {"student_id": student_id, "day": day, "call_count": count, "last_called_at": student_last[(student_id, day)]}
+            for (student_id, day), count in sorted(student_counts.items())
+        ],
+        ("call_count",),
+        latest="last_called_at",
+    )
+
+
+def _decrement(db, table, key: Dict, changes: Dict, calls_column):
+    """
+    Subtract ``changes`` from one rollup row and recompute its last_called_at
+    from the call requests left that day; delete the row once it counts nothing.
+    """
+    criteria = [table.c[name] == value for name, value in key.items()]
+    values = {name: table.c[name] - amount for name, amount in changes.items()}
+    if "last_called_at" in table.c:
+        start, end = day_bounds(key["day"])
+        values["last_called_at"] = (
+            select(func.max(calls.c.created_at))
+            .where(calls_column == key[calls_column.name], calls.c.created_at >= start, calls.c.created_at < end)
+            .scalar_subquery()
+        )
+    remaining = db.execute(update(table).where(*criteria).values(values).returning(table.c.call_count)).scalar()
+    if remaining is not None and remaining <= 0:
+        db.execute(table.delete().where(*criteria))
+        return True
+    return False
+
+
+def _apply_removed(db, rows: Iterable):
+    pairs = Counter()
+    for row in rows:
+        pairs[(row.educator_id, row.student_id, utc_day(row.created_at))] += 1
+
+    gone_students = Counter()
+    educator_counts = Counter()
+    student_counts = Counter()
+    for (educator_id, student_id, day), count in sorted(pairs.items()):
+        key = {"educator_id": educator_id, "student_id": student_id, "day": day}
+        if _decrement(db, pair_stats, key, {"call_count": count}, None):
+            gone_students[(educator_id, day)] += 1
+        educator_counts[(educator_id, day)] += count
+        student_counts[(student_id, day)] += count
+
+    for (educator_id, day), count in sorted(educator_counts.items()):
+        _decrement(
+            db,
+            educator_stats,
+            {"educator_id": educator_id, "day": day},
+            {"call_count": count, "distinct_students": gone_students[(educator_id, day)]},
+            calls.c.educator_id,
+        )
+    for (student_id, day), count in sorted(student_counts.items()):
+        _decrement(db, student_stats, {"student_id": student_id, "day": day}, {"call_count": count}, calls.c.student_id)
+
+
+def apply_pending(db, batch_size: int = CALL_ROLLUP_BATCH_SIZE) -> Optional[int]:
+    """
+    Apply the oldest queued changes to the rollups and drop them from the
+    queue, in the session's transaction. Returns how many were applied, or
+    None if another worker holds the lock and is applying them already.
+    """
+    if crud.dialect_name(db) == "postgresql":
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}).scalar():
+            return None
+    oldest = select(pending.c.id).order_by(pending.c.id).limit(batch_size).scalar_subquery()
+    rows = db.execute(delete(pending).where(pending.c.id.in_(oldest)).returning(*pending.columns)).all()
+    # Additions first: a call created and moved or deleted within one batch
+    # must be counted before it is uncounted
+    _apply_added(db, [row for row in rows for _ in range(row.change)])
+    _apply_removed(db, [row for row in rows for _ in range(-row.change)])
+    return len(rows)
+
+
+def apply_all_pending(engine, batch_size: int = CALL_ROLLUP_BATCH_SIZE) -> int:
+    """Apply batches until the queue is empty; returns how many changes were applied"""
+    applied = 0
+    while True:
+        with Session(engine) as db, db.begin():
+            count = apply_pending(db, batch_size)
+        applied += count or 0
+        if not count or count < batch_size:
+            return applied
+
+
+async def maintain_rollups(engine, interval: float = CALL_ROLLUP_INTERVAL):
+    """Background task applying queued rollup changes in deferred mode"""
+    if CALL_ROLLUP_MODE != "deferred" or interval <= 0:
+        return
+    while True:
+        try:
+            await run_in_threadpool(apply_all_pending, engine)
+        except Exception:
+            # A database outage must not end maintenance for the life of the process
+            logger.exception("Applying pending call rollups failed")
+        await asyncio.sleep(interval)
+
+
+def _day_expression(dialect_name: str, column):
+    if dialect_name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+
+def rebuild(conn):
+    """
+    Recompute every rollup from call_requests, e.g. to backfill new rollup
+    tables. Counts for call requests no longer in the table are lost, and
+    queued changes are dropped, since the rebuild already counts them.
+    """
+    day = _day_expression(conn.dialect.name, calls.c.created_at).label("day")
+    for table in (pair_stats, educator_stats, student_stats):
+        conn.execute(table.delete())
+    # Absent while migration 2 backfills
+    if inspect(conn).has_table(pending.name):
+        conn.execute(pending.delete())
+
+    conn.execute(pair_stats.insert().from_select(
+        ["educator_id", "student_id", "day", "call_count"],
+        select(calls.c.educator_id, calls.c.student_id, day, func.count())
+        .group_by(calls.c.educator_id, calls.c.student_id, day),
+    ))
+    conn.execute(educator_stats.insert().from_select(
+        ["educator_id", "day", "call_count", "distinct_students", "last_called_at"],
+        select(
+            calls.c.educator_id, day, func.count(), func.count(calls.c.student_id.distinct()), func.max(calls.c.created_at)
+        ).group_by(calls.c.educator_id, day),
+    ))
+    conn.execute(student_stats.insert().from_select(
+        ["student_id", "day", "call_count", "last_called_at"],
+        select(calls.c.student_id, day, func.count(), func.max(calls.c.created_at)).group_by(calls.c.student_id, day),
+    ))
@@ -0,0 +1,23 @@
+# Async router exports
+from fastapi import APIRouter
+
+from . import area, degree, student, educator, educator_area, call_request
+
+__all__ = ["area", "degree", "student", "educator", "educator_area", "call_request", "overlay"]
+
+
+def overlay(sync_router: APIRouter, async_router: APIRouter) -> APIRouter:
+    """
+    Merge an async router over its sync counterpart.
+
+    Routes implemented by the async router replace the sync route with the same
+    path and methods; everything else keeps running on the threadpool. Route
+    order follows the sync router so static paths still win over path params.
+    """
+    async_routes = {(route.path, frozenset(route.methods)): route for route in async_router.routes}
+    router = APIRouter()
+    router.routes = [
+        async_routes.get((route.path, frozenset(route.methods)), route)
+        for route in sync_router.routes
+    ]
+    return router
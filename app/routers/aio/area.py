@@ -0,0 +1,86 @@
+"""
+Area router - async API endpoints for Area model
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app import cache, crud, models, schemas
+from app.database import get_async_db
+from app.pagination import PageParams
+from app.routers.area import WRITE_ERRORS
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.Area])
+async def list_areas(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    """List areas, one page at a time, from the reference cache"""
+    body = await db.run_sync(cache.areas.page, page.limit, page.after)
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("", response_model=schemas.Area, status_code=status.HTTP_201_CREATED)
+async def create_area(area: schemas.AreaCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new area"""
+    db_area = await db.run_sync(crud.insert_one, models.Area, area.model_dump(), WRITE_ERRORS)
+    await db.commit()
+    cache.areas.invalidate()
+    return db_area
+
+
+@router.post("/bulk", response_model=schemas.BulkResult[schemas.Area], status_code=status.HTTP_201_CREATED)
+async def bulk_create_areas(
+    areas: List[schemas.AreaCreate],
+    on_conflict: crud.OnConflict = crud.OnConflict.fail,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create multiple areas in bulk with a single INSERT ... ON CONFLICT"""
+    names = crud.unique_names([area.name for area in areas], on_conflict, "Area")
+    if not names:
+        return {"items": [], "skipped": []}
+
+    result = await db.execute(crud.bulk_insert_names_statement(db, models.Area, names, on_conflict))
+    items, skipped = crud.split_returned(names, result.all())
+    if skipped and on_conflict == crud.OnConflict.fail:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Area with name '{skipped[0]}' already exists"
+        )
+    await db.commit()
+    cache.areas.invalidate()
+    return {"items": items, "skipped": skipped}
+
+
+@router.get("/{area_id}", response_model=schemas.Area)
+async def get_area(area_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific area by ID"""
+    area = await db.run_sync(cache.areas.get, area_id)
+    if not area:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
+    return area
+
+
+@router.put("/{area_id}", response_model=schemas.Area)
+async def update_area(area_id: int, area_update: schemas.AreaUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update an area"""
+    area = await db.run_sync(crud.update_one, models.Area, area_id, area_update.model_dump(), WRITE_ERRORS)
+    if not area:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
+    await db.commit()
+    cache.areas.invalidate()
+    return area
+
+
+@router.delete("/{area_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_area(area_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete an area"""
+    area = await db.get(models.Area, area_id)
+    if not area:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
+
+    await db.delete(area)
+    await db.commit()
+    cache.areas.invalidate()
+    return None
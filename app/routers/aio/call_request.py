@@ -0,0 +1,65 @@
+"""
+CallRequest router - async API endpoints for CallRequest model
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas, serialization
+from app.database import get_async_db, get_async_read_db
+from app.pagination import PageParams, keyset, split_page
+from app.routers.call_request import (
+    LIST_COLUMNS, PAGE_KEY, delete_call_request_row, insert_call_request, update_call_request_row
+)
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.CallRequest])
+async def list_call_requests(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    """List call requests, one page at a time"""
+    result = await db.execute(keyset(select(*LIST_COLUMNS), PAGE_KEY, page))
+    call_requests, next_cursor = split_page(result.all(), PAGE_KEY, page)
+    return serialization.render({"items": call_requests, "next_cursor": next_cursor})
+
+
+@router.post("", response_model=schemas.CallRequest, status_code=status.HTTP_201_CREATED)
+async def create_call_request(call_request: schemas.CallRequestCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new call request"""
+    db_call_request = await db.run_sync(insert_call_request, call_request.model_dump())
+    await db.commit()
+    return db_call_request
+
+
+@router.get("/{call_request_id}", response_model=schemas.CallRequest)
+async def get_call_request(call_request_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific call request by ID"""
+    call_request = await db.get(models.CallRequest, call_request_id)
+    if not call_request:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call request not found")
+    return call_request
+
+
+@router.put("/{call_request_id}", response_model=schemas.CallRequest)
+async def update_call_request(call_request_id: int, call_request_update: schemas.CallRequestCreate, db: AsyncSession = Depends(get_async_db)):
+    """Update a call request"""
+    call_request = await db.run_sync(update_call_request_row, call_request_id, call_request_update.model_dump())
+    if not call_request:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call request not found")
+    await db.commit()
+    return call_request
+
+
+@router.patch("/{call_request_id}", response_model=schemas.CallRequest)
+async def partial_update_call_request(call_request_id: int, call_request_update: schemas.CallRequestCreate, db: AsyncSession = Depends(get_async_db)):
+    """Partially update a call request"""
+    return await update_call_request(call_request_id, call_request_update, db)
+
+
+@router.delete("/{call_request_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_call_request(call_request_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a call request"""
+    if not await db.run_sync(delete_call_request_row, call_request_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call request not found")
+    await db.commit()
+    return None
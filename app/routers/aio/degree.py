@@ -0,0 +1,86 @@
+"""
+Degree router - async API endpoints for Degree model
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app import cache, crud, models, schemas
+from app.database import get_async_db
+from app.pagination import PageParams
+from app.routers.degree import WRITE_ERRORS
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.Degree])
+async def list_degrees(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    """List degrees, one page at a time, from the reference cache"""
+    body = await db.run_sync(cache.degrees.page, page.limit, page.after)
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("", response_model=schemas.Degree, status_code=status.HTTP_201_CREATED)
+async def create_degree(degree: schemas.DegreeCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new degree"""
+    db_degree = await db.run_sync(crud.insert_one, models.Degree, degree.model_dump(), WRITE_ERRORS)
+    await db.commit()
+    cache.degrees.invalidate()
+    return db_degree
+
+
+@router.post("/bulk", response_model=schemas.BulkResult[schemas.Degree], status_code=status.HTTP_201_CREATED)
+async def bulk_create_degrees(
+    degrees: List[schemas.DegreeCreate],
+    on_conflict: crud.OnConflict = crud.OnConflict.fail,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create multiple degrees in bulk with a single INSERT ... ON CONFLICT"""
+    names = crud.unique_names([degree.name for degree in degrees], on_conflict, "Degree")
+    if not names:
+        return {"items": [], "skipped": []}
+
+    result = await db.execute(crud.bulk_insert_names_statement(db, models.Degree, names, on_conflict))
+    items, skipped = crud.split_returned(names, result.all())
+    if skipped and on_conflict == crud.OnConflict.fail:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Degree with name '{skipped[0]}' already exists"
+        )
+    await db.commit()
+    cache.degrees.invalidate()
+    return {"items": items, "skipped": skipped}
+
+
+@router.get("/{degree_id}", response_model=schemas.Degree)
+async def get_degree(degree_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a specific degree by ID"""
+    degree = await db.run_sync(cache.degrees.get, degree_id)
+    if not degree:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Degree not found")
+    return degree
+
+
+@router.put("/{degree_id}", response_model=schemas.Degree)
+async def update_degree(degree_id: int, degree_update: schemas.DegreeUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update a degree"""
+    degree = await db.run_sync(crud.update_one, models.Degree, degree_id, degree_update.model_dump(), WRITE_ERRORS)
+    if not degree:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Degree not found")
+    await db.commit()
+    cache.degrees.invalidate()
+    return degree
+
+
+@router.delete("/{degree_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_degree(degree_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a degree"""
+    degree = await db.get(models.Degree, degree_id)
+    if not degree:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Degree not found")
+
+    await db.delete(degree)
+    await db.commit()
+    cache.degrees.invalidate()
+    return None
@@ -0,0 +1,126 @@
+"""
+Educator router - async API endpoints for Educator model
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app import conditional, crud, geo, models, schemas, serialization
+from app.database import get_async_db, get_async_read_db
+from app.pagination import PageParams, keyset, split_page
+from app.routers.educator import (
+    LIST_COLUMNS, PAGE_KEY, VERSION_COLUMNS, WRITE_ERRORS, educator_filters, parse_expand, update_educator_row
+)
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.EducatorExpanded], response_model_exclude_unset=True)
+async def list_educators(
+    request: Request,
+    response: Response,
+    area_id: Optional[int] = Query(None, description="Only educators teaching this area"),
+    degree_id: Optional[int] = Query(None, description="Only educators holding this degree"),
+    institute_id: Optional[int] = Query(None, description="Only educators with a degree from this institute"),
+    is_licensed: Optional[bool] = None,
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: areas, degrees, licenses"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """List educators matching the given filters, one page at a time"""
+    relations = parse_expand(expand)
+    criteria = educator_filters(area_id, degree_id, institute_id, is_licensed)
+
+    # Expanded relations change without touching educator.updated_at, so only
+    # plain listings carry validators
+    cacheable = not relations
+    if cacheable and conditional.is_conditional(request):
+        # Revalidate against the page's version columns before loading full rows
+        result = await db.execute(keyset(select(*VERSION_COLUMNS).where(*criteria), PAGE_KEY, page))
+        versions, next_cursor = split_page(result.all(), PAGE_KEY, page)
+        etag = conditional.collection_etag(request, versions, next_cursor is not None)
+        if conditional.not_modified(request, etag):
+            return conditional.not_modified_response(etag)
+
+    if cacheable:
+        result = await db.execute(keyset(select(*LIST_COLUMNS).where(*criteria), PAGE_KEY, page))
+        educators, next_cursor = split_page(result.all(), PAGE_KEY, page)
+        conditional.set_validators(response, conditional.collection_etag(request, educators, next_cursor is not None))
+        return serialization.render({"items": educators, "next_cursor": next_cursor}, response)
+
+    # Expanded relations are fetched in one batched IN query each
+    stmt = select(models.Educator).where(*criteria).options(
+        *[selectinload(getattr(models.Educator, relation)) for relation in relations]
+    )
+    result = await db.scalars(keyset(stmt, PAGE_KEY, page))
+    educators, next_cursor = split_page(result.all(), PAGE_KEY, page)
+
+    items = []
+    for educator in educators:
+        item = schemas.Educator.model_validate(educator).model_dump()
+        for relation in relations:
+            item[relation] = getattr(educator, relation)
+        items.append(schemas.EducatorExpanded(**item))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("", response_model=schemas.Educator, status_code=status.HTTP_201_CREATED)
+async def create_educator(educator: schemas.EducatorCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new educator"""
+    db_educator = await db.run_sync(
+        crud.insert_one, models.Educator, geo.with_geohash(educator.model_dump()), WRITE_ERRORS
+    )
+    await db.commit()
+    return db_educator
+
+
+@router.get("/{educator_id}", response_model=schemas.Educator)
+async def get_educator(educator_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific educator by ID"""
+    if conditional.is_conditional(request):
+        # Revalidate with a column-only query; the row is only loaded if it changed
+        version = (await db.execute(select(*VERSION_COLUMNS).where(models.Educator.id == educator_id))).first()
+        if not version:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+        modified_at = version.updated_at or version.created_at
+        etag = conditional.entity_etag(educator_id, modified_at)
+        if conditional.not_modified(request, etag, modified_at):
+            return conditional.not_modified_response(etag, modified_at)
+
+    educator = await db.get(models.Educator, educator_id)
+    if not educator:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+    modified_at = educator.updated_at or educator.created_at
+    conditional.set_validators(response, conditional.entity_etag(educator.id, modified_at), modified_at)
+    return educator
+
+
+@router.put("/{educator_id}", response_model=schemas.Educator)
+async def update_educator(educator_id: int, educator_update: schemas.EducatorUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update an educator"""
+    educator = await db.run_sync(update_educator_row, educator_id, educator_update.model_dump(exclude_unset=True))
+    if not educator:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+    await db.commit()
+    return educator
+
+
+@router.patch("/{educator_id}", response_model=schemas.Educator)
+async def partial_update_educator(educator_id: int, educator_update: schemas.EducatorUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Partially update an educator"""
+    return await update_educator(educator_id, educator_update, db)
+
+
+@router.delete("/{educator_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_educator(educator_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete an educator"""
+    educator = await db.get(models.Educator, educator_id)
+    if not educator:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+
+    await db.delete(educator)
+    await db.commit()
+    return None
@@ -0,0 +1,66 @@
+"""
+EducatorArea router - async API endpoints for EducatorArea model
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas, serialization
+from app.database import get_async_db, get_async_read_db
+from app.pagination import PageParams, keyset, split_page
+from app.routers.educator_area import LIST_COLUMNS, PAGE_KEY, UPDATE_ERRORS, WRITE_ERRORS
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.EducatorArea])
+async def list_educator_areas(page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    """List educator-area relations, one page at a time"""
+    result = await db.execute(keyset(select(*LIST_COLUMNS), PAGE_KEY, page))
+    educator_areas, next_cursor = split_page(result.all(), PAGE_KEY, page)
+    return serialization.render({"items": educator_areas, "next_cursor": next_cursor})
+
+
+@router.post("", response_model=schemas.EducatorArea, status_code=status.HTTP_201_CREATED)
+async def create_educator_area(educator_area: schemas.EducatorAreaCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new educator-area relation"""
+    db_ea = await db.run_sync(crud.insert_one, models.EducatorArea, educator_area.model_dump(), WRITE_ERRORS)
+    await db.commit()
+    return db_ea
+
+
+@router.get("/{educator_area_id}", response_model=schemas.EducatorArea)
+async def get_educator_area(educator_area_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific educator-area relation by ID"""
+    ea = await db.get(models.EducatorArea, educator_area_id)
+    if not ea:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="EducatorArea not found")
+    return ea
+
+
+@router.put("/{educator_area_id}", response_model=schemas.EducatorArea)
+async def update_educator_area(educator_area_id: int, ea_update: schemas.EducatorAreaCreate, db: AsyncSession = Depends(get_async_db)):
+    """Update an educator-area relation"""
+    ea = await db.run_sync(crud.update_one, models.EducatorArea, educator_area_id, ea_update.model_dump(), UPDATE_ERRORS)
+    if not ea:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="EducatorArea not found")
+    await db.commit()
+    return ea
+
+
+@router.patch("/{educator_area_id}", response_model=schemas.EducatorArea)
+async def partial_update_educator_area(educator_area_id: int, ea_update: schemas.EducatorAreaCreate, db: AsyncSession = Depends(get_async_db)):
+    """Partially update an educator-area relation"""
+    return await update_educator_area(educator_area_id, ea_update, db)
+
+
+@router.delete("/{educator_area_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_educator_area(educator_area_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete an educator-area relation"""
+    ea = await db.get(models.EducatorArea, educator_area_id)
+    if not ea:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="EducatorArea not found")
+
+    await db.delete(ea)
+    await db.commit()
+    return None
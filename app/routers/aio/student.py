@@ -0,0 +1,89 @@
+"""
+Student router - async API endpoints for Student model
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import conditional, crud, models, schemas, serialization
+from app.database import get_async_db, get_async_read_db
+from app.pagination import PageParams, keyset, split_page
+from app.routers.student import LIST_COLUMNS, PAGE_KEY, VERSION_COLUMNS, WRITE_ERRORS
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.Page[schemas.Student])
+async def list_students(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_read_db)):
+    """List students, one page at a time"""
+    if conditional.is_conditional(request):
+        # Revalidate against the page's version columns before loading full rows
+        result = await db.execute(keyset(select(*VERSION_COLUMNS), PAGE_KEY, page))
+        versions, next_cursor = split_page(result.all(), PAGE_KEY, page)
+        etag = conditional.collection_etag(request, versions, next_cursor is not None)
+        if conditional.not_modified(request, etag):
+            return conditional.not_modified_response(etag)
+
+    result = await db.execute(keyset(select(*LIST_COLUMNS), PAGE_KEY, page))
+    students, next_cursor = split_page(result.all(), PAGE_KEY, page)
+    conditional.set_validators(response, conditional.collection_etag(request, students, next_cursor is not None))
+    return serialization.render({"items": students, "next_cursor": next_cursor}, response)
+
+
+@router.post("", response_model=schemas.Student, status_code=status.HTTP_201_CREATED)
+async def create_student(student: schemas.StudentCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new student"""
+    db_student = await db.run_sync(crud.insert_one, models.Student, student.model_dump(), WRITE_ERRORS)
+    await db.commit()
+    return db_student
+
+
+@router.get("/{student_id}", response_model=schemas.Student)
+async def get_student(student_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific student by ID"""
+    if conditional.is_conditional(request):
+        # Revalidate with a column-only query; the row is only loaded if it changed
+        version = (await db.execute(select(*VERSION_COLUMNS).where(models.Student.id == student_id))).first()
+        if not version:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+        modified_at = version.updated_at or version.created_at
+        etag = conditional.entity_etag(student_id, modified_at)
+        if conditional.not_modified(request, etag, modified_at):
+            return conditional.not_modified_response(etag, modified_at)
+
+    student = await db.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+    modified_at = student.updated_at or student.created_at
+    conditional.set_validators(response, conditional.entity_etag(student.id, modified_at), modified_at)
+    return student
+
+
+@router.put("/{student_id}", response_model=schemas.Student)
+async def update_student(student_id: int, student_update: schemas.StudentUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update a student"""
+    student = await db.run_sync(
+        crud.update_one, models.Student, student_id, student_update.model_dump(exclude_unset=True), WRITE_ERRORS
+    )
+    if not student:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+    await db.commit()
+    return student
+
+
+@router.patch("/{student_id}", response_model=schemas.Student)
+async def partial_update_student(student_id: int, student_update: schemas.StudentUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Partially update a student"""
+    return await update_student(student_id, student_update, db)
+
+
+@router.delete("/{student_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a student"""
+    student = await db.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+
+    await db.delete(student)
+    await db.commit()
+    return None
@@ -1,66 +1,66 @@
 """
 Area router - API endpoints for Area model
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app import models, schemas
+from app import cache, crud, models, schemas
 from app.database import get_db
+from app.pagination import PageParams
 
 router = APIRouter()
 
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "area_name_key": (status.HTTP_400_BAD_REQUEST, "Area with this name already exists"),
+}
 
-@router.get("", response_model=List[schemas.Area])
-def list_areas(db: Session = Depends(get_db)):
-    """List all areas"""
-    areas = db.query(models.Area).all()
-    return areas
+
+@router.get("", response_model=schemas.Page[schemas.Area])
+def list_areas(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    """List areas, one page at a time, from the reference cache"""
+    body = cache.areas.page(db, page.limit, page.after)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("", response_model=schemas.Area, status_code=status.HTTP_201_CREATED)
 def create_area(area: schemas.AreaCreate, db: Session = Depends(get_db)):
     """Create a new area"""
-    # Check if area with same name exists
-    existing_area = db.query(models.Area).filter(models.Area.name == area.name).first()
-    if existing_area:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Area with this name already exists"
-        )
-    
-    db_area = models.Area(**area.model_dump())
-    db.add(db_area)
+    db_area = crud.insert_one(db, models.Area, area.model_dump(), WRITE_ERRORS)
     db.commit()
-    db.refresh(db_area)
+    cache.areas.invalidate()
     return db_area
 
 
-@router.post("/bulk", response_model=List[schemas.Area], status_code=status.HTTP_201_CREATED)
-def bulk_create_areas(areas: List[schemas.AreaCreate], db: Session = Depends(get_db)):
-    """Create multiple areas in bulk"""
-    db_areas = []
-    for area in areas:
-        # Check if area with same name exists
-        existing_area = db.query(models.Area).filter(models.Area.name == area.name).first()
-        if existing_area:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Area with name '{area.name}' already exists"
-            )
-        db_areas.append(models.Area(**area.model_dump()))
-    
-    db.add_all(db_areas)
+@router.post("/bulk", response_model=schemas.BulkResult[schemas.Area], status_code=status.HTTP_201_CREATED)
+def bulk_create_areas(
+    areas: List[schemas.AreaCreate],
+    on_conflict: crud.OnConflict = crud.OnConflict.fail,
+    db: Session = Depends(get_db),
+):
+    """Create multiple areas in bulk with a single INSERT ... ON CONFLICT"""
+    names = crud.unique_names([area.name for area in areas], on_conflict, "Area")
+    if not names:
+        return {"items": [], "skipped": []}
+
+    result = db.execute(crud.bulk_insert_names_statement(db, models.Area, names, on_conflict))
+    items, skipped = crud.split_returned(names, result.all())
+    if skipped and on_conflict == crud.OnConflict.fail:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Area with name '{skipped[0]}' already exists"
+        )
     db.commit()
-    for db_area in db_areas:
-        db.refresh(db_area)
-    return db_areas
+    cache.areas.invalidate()
+    return {"items": items, "skipped": skipped}
 
 
 @router.get("/{area_id}", response_model=schemas.Area)
 def get_area(area_id: int, db: Session = Depends(get_db)):
     """Get a specific area by ID"""
-    area = db.query(models.Area).filter(models.Area.id == area_id).first()
+    area = cache.areas.get(db, area_id)
     if not area:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
     return area
@@ -69,24 +69,11 @@ def get_area(area_id: int, db: Session = Depends(get_db)):
 @router.put("/{area_id}", response_model=schemas.Area)
 def update_area(area_id: int, area_update: schemas.AreaUpdate, db: Session = Depends(get_db)):
     """Update an area"""
-    area = db.query(models.Area).filter(models.Area.id == area_id).first()
+    area = crud.update_one(db, models.Area, area_id, area_update.model_dump(), WRITE_ERRORS)
     if not area:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
-    
-    # Check if new name conflicts with existing area
-    if area_update.name != area.name:
-        existing_area = db.query(models.Area).filter(models.Area.name == area_update.name).first()
-        if existing_area:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Area with this name already exists"
-            )
-    
-    for key, value in area_update.model_dump().items():
-        setattr(area, key, value)
-    
     db.commit()
-    db.refresh(area)
+    cache.areas.invalidate()
     return area
 
 
@@ -99,4 +86,5 @@ def delete_area(area_id: int, db: Session = Depends(get_db)):
     
     db.delete(area)
     db.commit()
+    cache.areas.invalidate()
     return None
@@ -1,55 +1,324 @@
 """
 CallRequest router - API endpoints for CallRequest model
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
 
-from app import models, schemas
-from app.database import get_db
+from app import crud, group_commit, models, rollups, schemas, serialization
+from app.database import get_db, get_read_db, read_session
+from app.pagination import PageParams, paginate
 
 router = APIRouter()
+# Replaces POST "" when CALL_REQUEST_GROUP_COMMIT is on, see main.py
+group_commit_router = APIRouter()
+
+# Sort key for list pages
+PAGE_KEY = (models.CallRequest.created_at, models.CallRequest.id)
+# Columns of a list item, selected without loading ORM objects
+LIST_COLUMNS = serialization.columns(models.CallRequest, schemas.CallRequest)
+# Rows fetched per round trip from the server-side cursor during export
+EXPORT_BATCH_SIZE = 5000
+EXPORT_COLUMNS = ("id", "educator_id", "student_id", "created_at")
+# Upper bound on items accepted by one bulk create
+MAX_BULK_CALL_REQUESTS = 10000
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "call_requests_educator_id_fkey": (status.HTTP_404_NOT_FOUND, "Educator not found"),
+    "call_requests_student_id_fkey": (status.HTTP_404_NOT_FOUND, "Student not found"),
+}
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def insert_call_request(db: Session, values: dict):
+    """INSERT a call request with RETURNING and count it in the rollups"""
+    call_request = crud.insert_one(db, models.CallRequest, values, WRITE_ERRORS)
+    rollups.add_calls(db, [call_request])
+    return call_request
+
+
+def existing_ids(db: Session, model, ids: set) -> set:
+    """The ids among ``ids`` that have a row, in one IN query"""
+    return set(db.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def insert_call_requests(db: Session, values: List[dict]) -> list:
+    """
+    INSERT many call requests in one multi-row statement and count them in the
+    rollups. Foreign keys are checked up front with one IN query per table;
+    returns, per item in order, the inserted row or why it was rejected
+    """
+    known_educators = existing_ids(db, models.Educator, {item["educator_id"] for item in values})
+    known_students = existing_ids(db, models.Student, {item["student_id"] for item in values})
+
+    results = [None] * len(values)
+    valid = []
+    for index, item in enumerate(values):
+        if item["educator_id"] not in known_educators:
+            results[index] = "Educator not found"
+        elif item["student_id"] not in known_students:
+            results[index] = "Student not found"
+        else:
+            valid.append(index)
+
+    if valid:
+        # Rows come back in parameter order
+        stmt = insert(models.CallRequest).returning(
+            models.CallRequest.id,
+            models.CallRequest.educator_id,
+            models.CallRequest.student_id,
+            models.CallRequest.created_at,
+            sort_by_parameter_order=True,
+        )
+        rows = db.execute(stmt, [values[index] for index in valid]).all()
+        rollups.add_calls(db, rows)
+        for index, row in zip(valid, rows):
+            results[index] = row
+    return results
+
+
+def insert_call_requests_isolated(db: Session, values: List[dict]) -> list:
+    """
+    insert_call_requests in a SAVEPOINT. An educator or student deleted
+    between the check and the INSERT fails the statement; the batch is then
+    checked and inserted again, and if that fails too, item by item, so only
+    the affected items are rejected
+    """
+    for _ in range(2):
+        try:
+            with db.begin_nested():
+                return insert_call_requests(db, values)
+        except IntegrityError:
+            pass
+    return [_insert_call_request_item(db, item) for item in values]
+
+
+def _insert_call_request_item(db: Session, values: dict):
+    try:
+        with db.begin_nested():
+            return insert_call_requests(db, [values])[0]
+    except IntegrityError as error:
+        name = crud.constraint_name(db, error, models.CallRequest, values)
+        if name not in WRITE_ERRORS:
+            raise
+        return WRITE_ERRORS[name][1]
 
 
-@router.get("", response_model=List[schemas.CallRequest])
-def list_call_requests(db: Session = Depends(get_db)):
-    """List all call requests"""
-    call_requests = db.query(models.CallRequest).all()
-    return call_requests
+def _write_batch(db: Session, values: List[dict]) -> list:
+    """Group commit writer: rejected items become 404s for their requests"""
+    return [
+        HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=result) if isinstance(result, str) else result
+        for result in insert_call_requests(db, values)
+    ]
+
+
+# Flushes POST "" requests in batches when CALL_REQUEST_GROUP_COMMIT is on
+committer = group_commit.GroupCommitter(_write_batch)
+
+
+def update_call_request_row(db: Session, call_request_id: int, values: dict):
+    """UPDATE a call request and move it between rollup rows; None if it does not exist"""
+    call_request, previous = crud.update_one_with_previous(
+        db, models.CallRequest, call_request_id, values, ("educator_id", "student_id", "created_at"), WRITE_ERRORS
+    )
+    if not call_request:
+        return None
+    if (previous.educator_id, previous.student_id) != (call_request.educator_id, call_request.student_id):
+        rollups.remove_calls(db, [previous])
+        rollups.add_calls(db, [call_request])
+    return call_request
+
+
+def delete_call_request_row(db: Session, call_request_id: int) -> bool:
+    """DELETE a call request with RETURNING and uncount it; False if it does not exist"""
+    call_request = db.execute(
+        delete(models.CallRequest)
+        .where(models.CallRequest.id == call_request_id)
+        .returning(*models.CallRequest.__table__.columns)
+    ).first()
+    if not call_request:
+        return False
+    rollups.remove_calls(db, [call_request])
+    return True
+
+
+@router.get("", response_model=schemas.Page[schemas.CallRequest])
+def list_call_requests(page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    """List call requests, one page at a time"""
+    call_requests, next_cursor = paginate(db.query(*LIST_COLUMNS), PAGE_KEY, page)
+    return serialization.render({"items": call_requests, "next_cursor": next_cursor})
 
 
 @router.post("", response_model=schemas.CallRequest, status_code=status.HTTP_201_CREATED)
 def create_call_request(call_request: schemas.CallRequestCreate, db: Session = Depends(get_db)):
     """Create a new call request"""
-    # Verify educator exists
-    educator = db.query(models.Educator).filter(
-        models.Educator.id == call_request.educator_id
-    ).first()
-    if not educator:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Educator not found"
-        )
-    
-    # Verify student exists
-    student = db.query(models.Student).filter(
-        models.Student.id == call_request.student_id
-    ).first()
-    if not student:
+    db_call_request = insert_call_request(db, call_request.model_dump())
+    db.commit()
+    return db_call_request
+
+
+@group_commit_router.post("", response_model=schemas.CallRequest, status_code=status.HTTP_201_CREATED)
+async def create_call_request_batched(call_request: schemas.CallRequestCreate):
+    """Create a new call request, committed together with others arriving at the same time"""
+    return await committer.submit(call_request.model_dump())
+
+
+@router.post("/bulk", response_model=List[schemas.CallRequestBulkItem])
+def bulk_create_call_requests(call_requests: List[schemas.CallRequestCreate], db: Session = Depends(get_db)):
+    """Create many call requests at once, reporting success or failure per item"""
+    if len(call_requests) > MAX_BULK_CALL_REQUESTS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_CALL_REQUESTS} call requests can be created at once"
         )
-    
-    db_call_request = models.CallRequest(**call_request.model_dump())
-    db.add(db_call_request)
+    if not call_requests:
+        return []
+
+    results = insert_call_requests_isolated(db, [call_request.model_dump() for call_request in call_requests])
     db.commit()
-    db.refresh(db_call_request)
-    return db_call_request
+    return [
+        {"index": index, "error": result} if isinstance(result, str) else {"index": index, "call_request": result}
+        for index, result in enumerate(results)
+    ]
+
+
+def _export_batches(request: Request, created_from: Optional[datetime], created_to: Optional[datetime]):
+    """Yield batches of call request rows read through a server-side cursor"""
+    # The export owns its session: the request-scoped one must not be held
+    # open (or closed underneath us) while the body is still streaming
+    db = read_session(request)
+    try:
+        stmt = select(
+            models.CallRequest.id,
+            models.CallRequest.educator_id,
+            models.CallRequest.student_id,
+            models.CallRequest.created_at,
+        ).order_by(models.CallRequest.id)
+        if created_from is not None:
+            stmt = stmt.where(models.CallRequest.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(models.CallRequest.created_at < created_to)
+
+        # yield_per turns on stream_results, so rows arrive in fixed-size
+        # batches instead of the whole result being buffered client-side
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def _ndjson_chunks(batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps({
+                "id": row.id,
+                "educator_id": row.educator_id,
+                "student_id": row.student_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }) + "\n"
+            for row in batch
+        )
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (row.id, row.educator_id, row.student_id, row.created_at.isoformat() if row.created_at else "")
+            for row in batch
+        )
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+def export_call_requests(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    created_from: Optional[datetime] = Query(None, description="Only export calls created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only export calls created before this time"),
+):
+    """Stream all call requests as NDJSON or CSV"""
+    batches = _export_batches(request, created_from, created_to)
+    if format == ExportFormat.csv:
+        return StreamingResponse(
+            _csv_chunks(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="call_requests.csv"'},
+        )
+    return StreamingResponse(_ndjson_chunks(batches), media_type="application/x-ndjson")
+
+
+@router.get("/stats/educators/{educator_id}", response_model=schemas.EducatorCallStats)
+def get_educator_call_stats(
+    educator_id: int,
+    day_from: Optional[date] = Query(None, description="First UTC day to include"),
+    day_to: Optional[date] = Query(None, description="Last UTC day to include"),
+    db: Session = Depends(get_read_db),
+):
+    """Calls per day for an educator, read from the rollup"""
+    stats = models.EducatorCallStats
+    query = db.query(stats).filter(stats.educator_id == educator_id)
+    if day_from is not None:
+        query = query.filter(stats.day >= day_from)
+    if day_to is not None:
+        query = query.filter(stats.day <= day_to)
+    days = query.order_by(stats.day).all()
+    if not days and not db.get(models.Educator, educator_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+    return {
+        "educator_id": educator_id,
+        "call_count": sum(day.call_count for day in days),
+        "last_called_at": max((day.last_called_at for day in days), default=None),
+        "days": days,
+    }
+
+
+@router.get("/stats/students/{student_id}", response_model=schemas.StudentCallStats)
+def get_student_call_stats(
+    student_id: int,
+    day_from: Optional[date] = Query(None, description="First UTC day to include"),
+    day_to: Optional[date] = Query(None, description="Last UTC day to include"),
+    db: Session = Depends(get_read_db),
+):
+    """Calls per day for a student, read from the rollup"""
+    stats = models.StudentCallStats
+    query = db.query(stats).filter(stats.student_id == student_id)
+    if day_from is not None:
+        query = query.filter(stats.day >= day_from)
+    if day_to is not None:
+        query = query.filter(stats.day <= day_to)
+    days = query.order_by(stats.day).all()
+    if not days and not db.get(models.Student, student_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+    return {
+        "student_id": student_id,
+        "call_count": sum(day.call_count for day in days),
+        "last_called_at": max((day.last_called_at for day in days), default=None),
+        "days": days,
+    }
 
 
 @router.get("/{call_request_id}", response_model=schemas.CallRequest)
-def get_call_request(call_request_id: int, db: Session = Depends(get_db)):
+def get_call_request(call_request_id: int, db: Session = Depends(get_read_db)):
     """Get a specific call request by ID"""
     call_request = db.query(models.CallRequest).filter(
         models.CallRequest.id == call_request_id
@@ -62,37 +331,10 @@ def get_call_request(call_request_id: int, db: Session = Depends(get_db)):
 @router.put("/{call_request_id}", response_model=schemas.CallRequest)
 def update_call_request(call_request_id: int, call_request_update: schemas.CallRequestCreate, db: Session = Depends(get_db)):
     """Update a call request"""
-    call_request = db.query(models.CallRequest).filter(
-        models.CallRequest.id == call_request_id
-    ).first()
+    call_request = update_call_request_row(db, call_request_id, call_request_update.model_dump())
     if not call_request:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call request not found")
-    
-    # Verify educator exists
-    educator = db.query(models.Educator).filter(
-        models.Educator.id == call_request_update.educator_id
-    ).first()
-    if not educator:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Educator not found"
-        )
-    
-    # Verify student exists
-    student = db.query(models.Student).filter(
-        models.Student.id == call_request_update.student_id
-    ).first()
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
-        )
-    
-    for key, value in call_request_update.model_dump().items():
-        setattr(call_request, key, value)
-    
     db.commit()
-    db.refresh(call_request)
     return call_request
 
 
@@ -105,12 +347,7 @@ def partial_update_call_request(call_request_id: int, call_request_update: schem
 @router.delete("/{call_request_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_call_request(call_request_id: int, db: Session = Depends(get_db)):
     """Delete a call request"""
-    call_request = db.query(models.CallRequest).filter(
-        models.CallRequest.id == call_request_id
-    ).first()
-    if not call_request:
+    if not delete_call_request_row(db, call_request_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Call request not found")
-    
-    db.delete(call_request)
     db.commit()
     return None
@@ -1,66 +1,66 @@
 """
 Degree router - API endpoints for Degree model
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app import models, schemas
+from app import cache, crud, models, schemas
 from app.database import get_db
+from app.pagination import PageParams
 
 router = APIRouter()
 
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "degree_name_key": (status.HTTP_400_BAD_REQUEST, "Degree with this name already exists"),
+}
 
-@router.get("", response_model=List[schemas.Degree])
-def list_degrees(db: Session = Depends(get_db)):
-    """List all degrees"""
-    degrees = db.query(models.Degree).all()
-    return degrees
+
+@router.get("", response_model=schemas.Page[schemas.Degree])
+def list_degrees(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    """List degrees, one page at a time, from the reference cache"""
+    body = cache.degrees.page(db, page.limit, page.after)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("", response_model=schemas.Degree, status_code=status.HTTP_201_CREATED)
 def create_degree(degree: schemas.DegreeCreate, db: Session = Depends(get_db)):
     """Create a new degree"""
-    # Check if degree with same name exists
-    existing_degree = db.query(models.Degree).filter(models.Degree.name == degree.name).first()
-    if existing_degree:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Degree with this name already exists"
-        )
-    
-    db_degree = models.Degree(**degree.model_dump())
-    db.add(db_degree)
+    db_degree = crud.insert_one(db, models.Degree, degree.model_dump(), WRITE_ERRORS)
     db.commit()
-    db.refresh(db_degree)
+    cache.degrees.invalidate()
     return db_degree
 
 
-@router.post("/bulk", response_model=List[schemas.Degree], status_code=status.HTTP_201_CREATED)
-def bulk_create_degrees(degrees: List[schemas.DegreeCreate], db: Session = Depends(get_db)):
-    """Create multiple degrees in bulk"""
-    db_degrees = []
-    for degree in degrees:
-        # Check if degree with same name exists
-        existing_degree = db.query(models.Degree).filter(models.Degree.name == degree.name).first()
-        if existing_degree:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Degree with name '{degree.name}' already exists"
-            )
-        db_degrees.append(models.Degree(**degree.model_dump()))
-    
-    db.add_all(db_degrees)
+@router.post("/bulk", response_model=schemas.BulkResult[schemas.Degree], status_code=status.HTTP_201_CREATED)
+def bulk_create_degrees(
+    degrees: List[schemas.DegreeCreate],
+    on_conflict: crud.OnConflict = crud.OnConflict.fail,
+    db: Session = Depends(get_db),
+):
+    """Create multiple degrees in bulk with a single INSERT ... ON CONFLICT"""
+    names = crud.unique_names([degree.name for degree in degrees], on_conflict, "Degree")
+    if not names:
+        return {"items": [], "skipped": []}
+
+    result = db.execute(crud.bulk_insert_names_statement(db, models.Degree, names, on_conflict))
+    items, skipped = crud.split_returned(names, result.all())
+    if skipped and on_conflict == crud.OnConflict.fail:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Degree with name '{skipped[0]}' already exists"
+        )
     db.commit()
-    for db_degree in db_degrees:
-        db.refresh(db_degree)
-    return db_degrees
+    cache.degrees.invalidate()
+    return {"items": items, "skipped": skipped}
 
 
 @router.get("/{degree_id}", response_model=schemas.Degree)
 def get_degree(degree_id: int, db: Session = Depends(get_db)):
     """Get a specific degree by ID"""
-    degree = db.query(models.Degree).filter(models.Degree.id == degree_id).first()
+    degree = cache.degrees.get(db, degree_id)
     if not degree:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Degree not found")
     return degree
@@ -69,24 +69,11 @@ def get_degree(degree_id: int, db: Session = Depends(get_db)):
 @router.put("/{degree_id}", response_model=schemas.Degree)
 def update_degree(degree_id: int, degree_update: schemas.DegreeUpdate, db: Session = Depends(get_db)):
     """Update a degree"""
-    degree = db.query(models.Degree).filter(models.Degree.id == degree_id).first()
+    degree = crud.update_one(db, models.Degree, degree_id, degree_update.model_dump(), WRITE_ERRORS)
     if not degree:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Degree not found")
-    
-    # Check if new name conflicts with existing degree
-    if degree_update.name != degree.name:
-        existing_degree = db.query(models.Degree).filter(models.Degree.name == degree_update.name).first()
-        if existing_degree:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Degree with this name already exists"
-            )
-    
-    for key, value in degree_update.model_dump().items():
-        setattr(degree, key, value)
-    
     db.commit()
-    db.refresh(degree)
+    cache.degrees.invalidate()
     return degree
 
 
@@ -99,4 +86,5 @@ def delete_degree(degree_id: int, db: Session = Depends(get_db)):
     
     db.delete(degree)
     db.commit()
+    cache.degrees.invalidate()
     return None
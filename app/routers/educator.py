@@ -1,75 +1,248 @@
 """
 Educator router - API endpoints for Educator model
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app import models, schemas
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+
+from app import conditional, crud, geo, importer, models, schemas, serialization
+from app.database import get_db, get_read_db
+from app.pagination import PageParams, paginate
 
 router = APIRouter()
 
+# Relationships that can be requested through ?expand=
+EXPANDABLE_RELATIONS = ("areas", "degrees", "licenses")
+# Sort key for list pages
+PAGE_KEY = (models.Educator.created_at, models.Educator.id)
+# Columns that identify a version of an educator, for conditional GETs
+VERSION_COLUMNS = (models.Educator.id, models.Educator.created_at, models.Educator.updated_at)
+# Columns of an unexpanded list item, selected without loading ORM objects
+LIST_COLUMNS = serialization.columns(models.Educator, schemas.Educator)
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "educator_phone_number_key": (status.HTTP_400_BAD_REQUEST, "Educator with this phone number already exists"),
+}
+
+
+def update_educator_row(db: Session, educator_id: int, values: dict):
+    """UPDATE an educator with RETURNING, keeping its geohash in step with its location"""
+    moved = values.keys() & {"latitude", "longitude"}
+    if len(moved) == 2:
+        values = geo.with_geohash(values)
+    elif moved:
+        # The geohash also depends on the stored coordinate that was not sent,
+        # so compute it in the same statement (SET sees the old row)
+        table = models.Educator.__table__
+        values = {**values, "geohash": geo.encode_sql(
+            values.get("latitude", table.c.latitude), values.get("longitude", table.c.longitude), crud.dialect_name(db),
+        )}
+    return crud.update_one(db, models.Educator, educator_id, values, WRITE_ERRORS)
+
+
+def parse_expand(expand: Optional[str]) -> List[str]:
+    """Split and validate the expand query parameter"""
+    if not expand:
+        return []
+    relations = [relation.strip() for relation in expand.split(",") if relation.strip()]
+    unknown = [relation for relation in relations if relation not in EXPANDABLE_RELATIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot expand: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys(relations))
+
+
+def educator_filters(
+    area_id: Optional[int],
+    degree_id: Optional[int],
+    institute_id: Optional[int],
+    is_licensed: Optional[bool],
+) -> list:
+    """Build the WHERE criteria for an educator search"""
+    # Relationship filters become EXISTS subqueries so the search is one statement
+    criteria = []
+    if area_id is not None:
+        criteria.append(models.Educator.areas.any(models.EducatorArea.area_id == area_id))
+    degree_filters = []
+    if degree_id is not None:
+        degree_filters.append(models.EducatorDegree.degree_id == degree_id)
+    if institute_id is not None:
+        degree_filters.append(models.EducatorDegree.institute_id == institute_id)
+    if degree_filters:
+        criteria.append(models.Educator.degrees.any(and_(*degree_filters)))
+    if is_licensed is not None:
+        criteria.append(models.Educator.is_licensed == is_licensed)
+    return criteria
+
 
-@router.get("", response_model=List[schemas.Educator])
-def list_educators(db: Session = Depends(get_db)):
-    """List all educators"""
-    educators = db.query(models.Educator).all()
-    return educators
+@router.get("", response_model=schemas.Page[schemas.EducatorExpanded], response_model_exclude_unset=True)
+def list_educators(
+    request: Request,
+    response: Response,
+    area_id: Optional[int] = Query(None, description="Only educators teaching this area"),
+    degree_id: Optional[int] = Query(None, description="Only educators holding this degree"),
+    institute_id: Optional[int] = Query(None, description="Only educators with a degree from this institute"),
+    is_licensed: Optional[bool] = None,
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: areas, degrees, licenses"),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """List educators matching the given filters, one page at a time"""
+    relations = parse_expand(expand)
+    criteria = educator_filters(area_id, degree_id, institute_id, is_licensed)
+
+    # Expanded relations change without touching educator.updated_at, so only
+    # plain listings carry validators
+    cacheable = not relations
+    if cacheable and conditional.is_conditional(request):
+        # Revalidate against the page's version columns before loading full rows
+        versions, next_cursor = paginate(db.query(*VERSION_COLUMNS).filter(*criteria), PAGE_KEY, page)
+        etag = conditional.collection_etag(request, versions, next_cursor is not None)
+        if conditional.not_modified(request, etag):
+            return conditional.not_modified_response(etag)
+
+    if cacheable:
+        educators, next_cursor = paginate(db.query(*LIST_COLUMNS).filter(*criteria), PAGE_KEY, page)
+        conditional.set_validators(response, conditional.collection_etag(request, educators, next_cursor is not None))
+        return serialization.render({"items": educators, "next_cursor": next_cursor}, response)
+
+    # Expanded relations are fetched in one batched IN query each
+    query = db.query(models.Educator).filter(*criteria).options(
+        *[selectinload(getattr(models.Educator, relation)) for relation in relations]
+    )
+    educators, next_cursor = paginate(query, PAGE_KEY, page)
+
+    items = []
+    for educator in educators:
+        item = schemas.Educator.model_validate(educator).model_dump()
+        for relation in relations:
+            item[relation] = getattr(educator, relation)
+        items.append(schemas.EducatorExpanded(**item))
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("", response_model=schemas.Educator, status_code=status.HTTP_201_CREATED)
 def create_educator(educator: schemas.EducatorCreate, db: Session = Depends(get_db)):
     """Create a new educator"""
-    # Check if educator with same phone number exists
-    existing_educator = db.query(models.Educator).filter(
-        models.Educator.phone_number == educator.phone_number
-    ).first()
-    if existing_educator:
+    db_educator = crud.insert_one(db, models.Educator, geo.with_geohash(educator.model_dump()), WRITE_ERRORS)
+    db.commit()
+    return db_educator
+
+
+@router.get("/nearby", response_model=List[schemas.EducatorNearby])
+def list_nearby_educators(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    student_id: Optional[int] = Query(None, description="Search around this student's location instead of lat/lon"),
+    radius_km: float = Query(10.0, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    """List educators within radius_km of a point, nearest first"""
+    if student_id is not None:
+        student = db.query(models.Student.latitude, models.Student.longitude).filter(
+            models.Student.id == student_id
+        ).first()
+        if not student:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+        if student.latitude is None or student.longitude is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Student has no location"
+            )
+        lat, lon = student.latitude, student.longitude
+    elif lat is None or lon is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Educator with this phone number already exists"
+            detail="Either lat and lon or student_id is required"
         )
-    
-    db_educator = models.Educator(**educator.model_dump())
-    db.add(db_educator)
-    db.commit()
-    db.refresh(db_educator)
-    return db_educator
+
+    # Candidate rows come from a handful of geohash prefix range scans,
+    # narrowed by the bounding box before exact distances are computed
+    min_lat, max_lat, min_lon, max_lon = geo.bounding_box(lat, lon, radius_km)
+    query = db.query(models.Educator.id, models.Educator.latitude, models.Educator.longitude).filter(
+        or_(*[models.Educator.geohash.startswith(prefix) for prefix in geo.covering_prefixes(lat, lon, radius_km)]),
+        models.Educator.latitude.between(min_lat, max_lat),
+    )
+    if min_lon >= -180.0 and max_lon <= 180.0:
+        query = query.filter(models.Educator.longitude.between(min_lon, max_lon))
+
+    distances = []
+    for candidate in query:
+        distance = geo.haversine_km(lat, lon, candidate.latitude, candidate.longitude)
+        if distance <= radius_km:
+            distances.append((distance, candidate.id))
+    distances.sort()
+    distances = distances[:limit]
+    if not distances:
+        return []
+
+    # Only the final page of educators is loaded as full rows
+    educators = {
+        educator.id: educator
+        for educator in db.query(models.Educator).filter(
+            models.Educator.id.in_([educator_id for _, educator_id in distances])
+        )
+    }
+    return [
+        schemas.EducatorNearby(
+            **schemas.Educator.model_validate(educators[educator_id]).model_dump(),
+            distance_km=round(distance, 3),
+        )
+        for distance, educator_id in distances
+    ]
+
+
+@router.post("/import", response_model=schemas.ImportReport)
+async def import_educators(
+    request: Request,
+    format: Optional[importer.ImportFormat] = Query(None, description="Defaults to csv for text/csv bodies, ndjson otherwise"),
+    db: Session = Depends(get_db),
+):
+    """Bulk import educators from a CSV or NDJSON request body"""
+    fmt = format or importer.format_from_content_type(request.headers.get("content-type"))
+    body = await importer.spool_body(request)
+    try:
+        return await run_in_threadpool(
+            importer.import_rows, db, models.Educator, schemas.EducatorCreate, body, fmt, prepare=geo.with_geohash
+        )
+    finally:
+        body.close()
 
 
 @router.get("/{educator_id}", response_model=schemas.Educator)
-def get_educator(educator_id: int, db: Session = Depends(get_db)):
+def get_educator(educator_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Get a specific educator by ID"""
+    if conditional.is_conditional(request):
+        # Revalidate with a column-only query; the row is only loaded if it changed
+        version = db.query(*VERSION_COLUMNS).filter(models.Educator.id == educator_id).first()
+        if not version:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+        modified_at = version.updated_at or version.created_at
+        etag = conditional.entity_etag(educator_id, modified_at)
+        if conditional.not_modified(request, etag, modified_at):
+            return conditional.not_modified_response(etag, modified_at)
+
     educator = db.query(models.Educator).filter(models.Educator.id == educator_id).first()
     if not educator:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
+    modified_at = educator.updated_at or educator.created_at
+    conditional.set_validators(response, conditional.entity_etag(educator.id, modified_at), modified_at)
     return educator
 
 
 @router.put("/{educator_id}", response_model=schemas.Educator)
 def update_educator(educator_id: int, educator_update: schemas.EducatorUpdate, db: Session = Depends(get_db)):
     """Update an educator"""
-    educator = db.query(models.Educator).filter(models.Educator.id == educator_id).first()
+    educator = update_educator_row(db, educator_id, educator_update.model_dump(exclude_unset=True))
     if not educator:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
-    
-    # Check if phone number conflicts with existing educator
-    if educator_update.phone_number and educator_update.phone_number != educator.phone_number:
-        existing_educator = db.query(models.Educator).filter(
-            models.Educator.phone_number == educator_update.phone_number
-        ).first()
-        if existing_educator:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Educator with this phone number already exists"
-            )
-    
-    for key, value in educator_update.model_dump(exclude_unset=True).items():
-        setattr(educator, key, value)
-    
     db.commit()
-    db.refresh(educator)
     return educator
 
 
@@ -3,51 +3,48 @@ EducatorArea router - API endpoints for EducatorArea model
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
 
-from app import models, schemas
-from app.database import get_db
+from app import crud, models, schemas, serialization
+from app.database import get_db, get_read_db
+from app.pagination import PageParams, paginate
 
 router = APIRouter()
 
-
-@router.get("", response_model=List[schemas.EducatorArea])
-def list_educator_areas(db: Session = Depends(get_db)):
-    """List all educator-area relations"""
-    educator_areas = db.query(models.EducatorArea).all()
-    return educator_areas
+# Sort key for list pages
+PAGE_KEY = (models.EducatorArea.id,)
+# Columns of a list item, selected without loading ORM objects
+LIST_COLUMNS = serialization.columns(models.EducatorArea, schemas.EducatorArea)
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "educator_area_educator_id_fkey": (status.HTTP_404_NOT_FOUND, "Educator not found"),
+    "educator_area_area_id_fkey": (status.HTTP_404_NOT_FOUND, "Area not found"),
+    "educator_area_educator_id_area_id_key": (status.HTTP_400_BAD_REQUEST, "EducatorArea already exists"),
+}
+UPDATE_ERRORS = {
+    **WRITE_ERRORS,
+    "educator_area_educator_id_area_id_key": (
+        status.HTTP_400_BAD_REQUEST, "Another EducatorArea with same educator and area exists"
+    ),
+}
+
+
+@router.get("", response_model=schemas.Page[schemas.EducatorArea])
+def list_educator_areas(page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    """List educator-area relations, one page at a time"""
+    educator_areas, next_cursor = paginate(db.query(*LIST_COLUMNS), PAGE_KEY, page)
+    return serialization.render({"items": educator_areas, "next_cursor": next_cursor})
 
 
 @router.post("", response_model=schemas.EducatorArea, status_code=status.HTTP_201_CREATED)
 def create_educator_area(educator_area: schemas.EducatorAreaCreate, db: Session = Depends(get_db)):
     """Create a new educator-area relation"""
-    # Verify educator exists
-    educator = db.query(models.Educator).filter(models.Educator.id == educator_area.educator_id).first()
-    if not educator:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
-
-    # Verify area exists
-    area = db.query(models.Area).filter(models.Area.id == educator_area.area_id).first()
-    if not area:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
-
-    # Prevent duplicate mapping
-    existing = db.query(models.EducatorArea).filter(
-        models.EducatorArea.educator_id == educator_area.educator_id,
-        models.EducatorArea.area_id == educator_area.area_id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="EducatorArea already exists")
-
-    db_ea = models.EducatorArea(**educator_area.model_dump())
-    db.add(db_ea)
+    db_ea = crud.insert_one(db, models.EducatorArea, educator_area.model_dump(), WRITE_ERRORS)
     db.commit()
-    db.refresh(db_ea)
     return db_ea
 
 
 @router.get("/{educator_area_id}", response_model=schemas.EducatorArea)
-def get_educator_area(educator_area_id: int, db: Session = Depends(get_db)):
+def get_educator_area(educator_area_id: int, db: Session = Depends(get_read_db)):
     """Get a specific educator-area relation by ID"""
     ea = db.query(models.EducatorArea).filter(models.EducatorArea.id == educator_area_id).first()
     if not ea:
@@ -58,34 +55,10 @@ def get_educator_area(educator_area_id: int, db: Session = Depends(get_db)):
 @router.put("/{educator_area_id}", response_model=schemas.EducatorArea)
 def update_educator_area(educator_area_id: int, ea_update: schemas.EducatorAreaCreate, db: Session = Depends(get_db)):
     """Update an educator-area relation"""
-    ea = db.query(models.EducatorArea).filter(models.EducatorArea.id == educator_area_id).first()
+    ea = crud.update_one(db, models.EducatorArea, educator_area_id, ea_update.model_dump(), UPDATE_ERRORS)
     if not ea:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="EducatorArea not found")
-
-    # Verify educator exists
-    educator = db.query(models.Educator).filter(models.Educator.id == ea_update.educator_id).first()
-    if not educator:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Educator not found")
-
-    # Verify area exists
-    area = db.query(models.Area).filter(models.Area.id == ea_update.area_id).first()
-    if not area:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Area not found")
-
-    # Prevent duplicate mapping (except self)
-    existing = db.query(models.EducatorArea).filter(
-        models.EducatorArea.educator_id == ea_update.educator_id,
-        models.EducatorArea.area_id == ea_update.area_id,
-        models.EducatorArea.id != educator_area_id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Another EducatorArea with same educator and area exists")
-
-    for key, value in ea_update.model_dump().items():
-        setattr(ea, key, value)
-
     db.commit()
-    db.refresh(ea)
     return ea
 
 
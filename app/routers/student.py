@@ -1,75 +1,101 @@
 """
 Student router - API endpoints for Student model
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
 
-from app import models, schemas
-from app.database import get_db
+from app import conditional, crud, importer, models, schemas, serialization
+from app.database import get_db, get_read_db
+from app.pagination import PageParams, paginate
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[schemas.Student])
-def list_students(db: Session = Depends(get_db)):
-    """List all students"""
-    students = db.query(models.Student).all()
-    return students
+# Sort key for list pages
+PAGE_KEY = (models.Student.created_at, models.Student.id)
+# Columns that identify a version of a student, for conditional GETs
+VERSION_COLUMNS = (models.Student.id, models.Student.created_at, models.Student.updated_at)
+# Columns of a list item, selected without loading ORM objects
+LIST_COLUMNS = serialization.columns(models.Student, schemas.Student)
+# Constraint violations reported by writes, instead of checking beforehand
+WRITE_ERRORS = {
+    "student_phone_number_key": (status.HTTP_400_BAD_REQUEST, "Student with this phone number already exists"),
+}
+
+
+@router.get("", response_model=schemas.Page[schemas.Student])
+def list_students(request: Request, response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    """List students, one page at a time"""
+    if conditional.is_conditional(request):
+        # Revalidate against the page's version columns before loading full rows
+        versions, next_cursor = paginate(db.query(*VERSION_COLUMNS), PAGE_KEY, page)
+        etag = conditional.collection_etag(request, versions, next_cursor is not None)
+        if conditional.not_modified(request, etag):
+            return conditional.not_modified_response(etag)
+
+    students, next_cursor = paginate(db.query(*LIST_COLUMNS), PAGE_KEY, page)
+    conditional.set_validators(response, conditional.collection_etag(request, students, next_cursor is not None))
+    return serialization.render({"items": students, "next_cursor": next_cursor}, response)
 
 
 @router.post("", response_model=schemas.Student, status_code=status.HTTP_201_CREATED)
 def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)):
     """Create a new student"""
-    # Check if student with same phone number exists
-    existing_student = db.query(models.Student).filter(
-        models.Student.phone_number == student.phone_number
-    ).first()
-    if existing_student:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Student with this phone number already exists"
-        )
-    
-    db_student = models.Student(**student.model_dump())
-    db.add(db_student)
+    db_student = crud.insert_one(db, models.Student, student.model_dump(), WRITE_ERRORS)
     db.commit()
-    db.refresh(db_student)
     return db_student
 
 
+@router.post("/import", response_model=schemas.ImportReport)
+async def import_students(
+    request: Request,
+    format: Optional[importer.ImportFormat] = Query(None, description="Defaults to csv for text/csv bodies, ndjson otherwise"),
+    db: Session = Depends(get_db),
+):
+    """Bulk import students from a CSV or NDJSON request body"""
+    fmt = format or importer.format_from_content_type(request.headers.get("content-type"))
+    body = await importer.spool_body(request)
+    try:
+        return await run_in_threadpool(
+            importer.import_rows, db, models.Student, schemas.StudentCreate, body, fmt
+        )
+    finally:
+        body.close()
+
+
 @router.get("/{student_id}", response_model=schemas.Student)
-def get_student(student_id: int, db: Session = Depends(get_db)):
+def get_student(student_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Get a specific student by ID"""
+    if conditional.is_conditional(request):
+        # Revalidate with a column-only query; the row is only loaded if it changed
+        version = db.query(*VERSION_COLUMNS).filter(models.Student.id == student_id).first()
+        if not version:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+        modified_at = version.updated_at or version.created_at
+        etag = conditional.entity_etag(student_id, modified_at)
+        if conditional.not_modified(request, etag, modified_at):
+            return conditional.not_modified_response(etag, modified_at)
+
     student = db.query(models.Student).filter(models.Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
+    modified_at = student.updated_at or student.created_at
+    conditional.set_validators(response, conditional.entity_etag(student.id, modified_at), modified_at)
     return student
 
 
 @router.put("/{student_id}", response_model=schemas.Student)
 def update_student(student_id: int, student_update: schemas.StudentUpdate, db: Session = Depends(get_db)):
     """Update a student"""
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+    student = crud.update_one(
+        db, models.Student, student_id, student_update.model_dump(exclude_unset=True), WRITE_ERRORS
+    )
     if not student:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
-    
-    # Check if phone number conflicts with existing student
-    if student_update.phone_number and student_update.phone_number != student.phone_number:
-        existing_student = db.query(models.Student).filter(
-            models.Student.phone_number == student_update.phone_number
-        ).first()
-        if existing_student:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Student with this phone number already exists"
-            )
-    
-    for key, value in student_update.model_dump(exclude_unset=True).items():
-        setattr(student, key, value)
-    
     db.commit()
-    db.refresh(student)
     return student
 
 
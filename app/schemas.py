@@ -2,8 +2,23 @@
 Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Generic, TypeVar
+from datetime import date, datetime
+
+T = TypeVar("T")
+
+
+# Pagination schemas
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+# Bulk create schemas
+class BulkResult(BaseModel, Generic[T]):
+    items: List[T]
+    # Names that already existed and were left untouched
+    skipped: List[str] = []
 
 
 # Area schemas
@@ -87,6 +102,7 @@ class EducatorLicense(EducatorLicenseBase):
 # EducatorDegree schemas
 class EducatorDegreeBase(BaseModel):
     degree_id: int
+    institute_id: Optional[int] = None
 
 
 class EducatorDegreeCreate(EducatorDegreeBase):
@@ -144,6 +160,17 @@ class Educator(EducatorBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class EducatorExpanded(Educator):
+    # Only present when requested through ?expand=
+    areas: Optional[List[EducatorArea]] = None
+    degrees: Optional[List[EducatorDegree]] = None
+    licenses: Optional[List[EducatorLicense]] = None
+
+
+class EducatorNearby(Educator):
+    distance_km: float
+
+
 # CallRequest schemas
 class CallRequestBase(BaseModel):
     educator_id: int
@@ -158,3 +185,51 @@ class CallRequest(CallRequestBase):
     id: int
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+
+class CallRequestBulkItem(BaseModel):
+    # Position of the item in the submitted array
+    index: int
+    call_request: Optional[CallRequest] = None
+    error: Optional[str] = None
+
+
+# Call request stats schemas
+class EducatorCallDay(BaseModel):
+    day: date
+    call_count: int
+    distinct_students: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EducatorCallStats(BaseModel):
+    educator_id: int
+    call_count: int
+    last_called_at: Optional[datetime] = None
+    days: List[EducatorCallDay]
+
+
+class StudentCallDay(BaseModel):
+    day: date
+    call_count: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StudentCallStats(BaseModel):
+    student_id: int
+    call_count: int
+    last_called_at: Optional[datetime] = None
+    days: List[StudentCallDay]
+
+
+# Bulk import schemas
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
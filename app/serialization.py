@@ -0,0 +1,65 @@
+"""
+Fast JSON path for list endpoints
+
+List handlers select only the columns of their item schema and return the
+``Row`` tuples, never hydrating ORM objects. With FAST_JSON on, those rows are
+rendered straight to JSON with orjson instead of being validated again by the
+route's response_model, which stays declared so the OpenAPI schema does not
+change; without it FastAPI validates and encodes them as usual.
+"""
+import os
+from typing import Optional, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # only needed with FAST_JSON
+    orjson = None
+
+# Render list pages with orjson, and use it as the default response class
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+if FAST_JSON and orjson is None:
+    raise RuntimeError("FAST_JSON needs the orjson package; install it with `pip install orjson`")
+
+DEFAULT_RESPONSE_CLASS = ORJSONResponse if FAST_JSON else JSONResponse
+
+# Pydantic writes UTC datetimes with a Z suffix; match it byte for byte
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z if orjson is not None else 0
+
+
+def columns(model, schema: Type[BaseModel]) -> tuple:
+    """The model attributes backing each field of ``schema``, in field order"""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def _default(value):
+    if isinstance(value, Row):
+        return value._asdict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def render_json(content, headers: Optional[dict] = None) -> Response:
+    """Encode ``content`` (dicts, lists and Rows of JSON-ready values) with orjson"""
+    return Response(
+        orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def render(content, response: Optional[Response] = None):
+    """
+    Pre-render ``content`` when FAST_JSON is on, carrying over headers set on
+    the injected ``response``; otherwise return it for response_model to handle
+    """
+    if not FAST_JSON:
+        return content
+    headers = None
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return render_json(content, headers)
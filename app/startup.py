@@ -0,0 +1,111 @@
+"""
+Startup modes and timing
+
+SCHEMA_STARTUP picks what a worker does with the database before serving:
+
+- ``check`` (default): verify the schema version, failing startup if
+  migrations are pending or the database is unreachable
+- ``migrate``: apply pending migrations; on Postgres workers take turns on
+  an advisory lock, so one migrates per deployment and the rest only check
+- ``background``: connect lazily and verify in the background, retrying
+  while the database is unreachable; /health/ready answers 503 until then
+- ``skip``: no startup check at all
+
+Imported first by main.py, so its timer also covers import time.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+SCHEMA_STARTUP = os.getenv("SCHEMA_STARTUP", "check").lower()
+# Connections each pool opens in the background once the worker is up (0 disables)
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "0"))
+# Longest wait between background schema checks while the database is unreachable
+SCHEMA_CHECK_MAX_BACKOFF = 30.0
+
+SCHEMA_STARTUP_MODES = ("check", "migrate", "background", "skip")
+if SCHEMA_STARTUP not in SCHEMA_STARTUP_MODES:
+    raise ValueError(f"SCHEMA_STARTUP must be one of {', '.join(SCHEMA_STARTUP_MODES)}, not {SCHEMA_STARTUP!r}")
+
+logger = logging.getLogger(__name__)
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc on Linux; None elsewhere"""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields after it are fixed
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class StartupTimer:
+    """Durations of the startup phases of this worker, in milliseconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Time spent before this module was imported (interpreter and uvicorn boot)
+        self.before_import = process_age()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.ready_after: Optional[float] = None
+        self.schema = "pending"
+        self.schema_version: Optional[int] = None
+        self.schema_error: Optional[str] = None
+        self.prewarmed: Dict[str, int] = {}
+
+    def mark(self, phase: str):
+        """Close a phase that ran since the previous mark"""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block as its own phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 1)
+            self._last = time.perf_counter()
+
+    def ready(self):
+        """The worker accepts requests from now on"""
+        self.ready_after = time.perf_counter() - self.started
+        logger.info(
+            "Worker ready %.0f ms after import (%s)%s", self.ready_after * 1000,
+            ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items()),
+            f", {(self.before_import + self.ready_after) * 1000:.0f} ms after process start"
+            if self.before_import is not None else "",
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """Started, and the schema was verified (or deliberately not)"""
+        return self.ready_after is not None and self.schema in ("ok", "skipped")
+
+    def report(self) -> dict:
+        return {
+            "schema_startup": SCHEMA_STARTUP,
+            "schema": self.schema,
+            "schema_version": self.schema_version,
+            "schema_error": self.schema_error,
+            "phases_ms": dict(self.phases),
+            "import_to_ready_ms": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            "process_start_to_import_ms": round(self.before_import * 1000, 1) if self.before_import is not None else None,
+            "process_start_to_ready_ms": (
+                round((self.before_import + self.ready_after) * 1000, 1)
+                if self.before_import is not None and self.ready_after is not None else None
+            ),
+            "prewarmed_connections": dict(self.prewarmed),
+        }
+
+
+timer = StartupTimer()
@@ -0,0 +1,280 @@
+"""
+Generate a synthetic dataset: reference data, students and educators clustered
+around city centres, educators' areas, degrees and licenses, and call requests
+skewed towards popular educators.
+
+Rows are generated with NumPy in vectorized chunks, deterministically from
+--random-seed, and loaded with COPY on PostgreSQL or multi-row inserts
+elsewhere. The database must not have students yet; run it with
+``python init_db.py --seed``.
+"""
+import csv
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+from app import geo, migrations, models, partitions, rollups
+
+# Rows generated and loaded per step, bounding memory for large tables
+CHUNK_SIZE = 500000
+# Rows per INSERT round trip on databases without COPY
+BATCH_SIZE = 10000
+# City centres students and educators cluster around, with their share of people
+CENTRES = [(12.97, 77.59), (28.61, 77.21), (19.08, 72.88), (13.08, 80.27), (22.57, 88.36), (17.39, 78.49)]
+CENTRE_WEIGHTS = [0.25, 0.25, 0.2, 0.12, 0.1, 0.08]
+# Spread around a centre, in degrees: most people live near a neighbourhood
+# hub, the rest anywhere in the metro area
+NEIGHBOURHOODS_PER_CENTRE = 40
+NEIGHBOURHOOD_SPREAD = 0.02
+METRO_SPREAD = 0.15
+# Zipf exponent of educator and area popularity; higher is more skewed
+POPULARITY_EXPONENT = 0.8
+LICENSED_SHARE = 0.4
+DESCRIPTION_WORDS = ("maths", "physics", "chemistry", "tuition", "exam", "online", "home", "board", "coaching", "english")
+
+DEFAULTS = {
+    "areas": 50,
+    "degrees": 40,
+    "institutes": 200,
+    "students": 10000,
+    "educators": 1000,
+    "calls": 100000,
+    "days": 180,
+}
+
+Columns = Dict[str, list]
+
+
+def _chunks(total: int):
+    for start in range(0, total, CHUNK_SIZE):
+        yield start, min(CHUNK_SIZE, total - start)
+
+
+def _load(conn, model, columns: Columns):
+    """Write one chunk of column lists: COPY on Postgres, multi-row inserts elsewhere"""
+    names = list(columns)
+    rows = zip(*columns.values())
+    if conn.dialect.name != "postgresql":
+        rows = [dict(zip(names, row)) for row in rows]
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+        return
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)", buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _load_chunks(conn, model, total: int, make_chunk: Callable[[int, int], Columns]):
+    for start, count in _chunks(total):
+        _load(conn, model, make_chunk(start, count))
+
+
+def _ids(conn, model) -> np.ndarray:
+    return np.fromiter(conn.execute(select(model.id).order_by(model.id)).scalars(), dtype=np.int64)
+
+
+def _popularity(count: int) -> np.ndarray:
+    """Zipf-like probabilities: the first of ``count`` items is the most popular"""
+    weights = 1.0 / np.arange(1, count + 1) ** POPULARITY_EXPONENT
+    return weights / weights.sum()
+
+
+def _labels(prefix: str, start: int, count: int, width: int = 0) -> list:
+    numbers = np.arange(start, start + count).astype(str)
+    if width:
+        numbers = np.char.zfill(numbers, width)
+    return np.char.add(prefix, numbers).tolist()
+
+
+def locations(rng: np.random.Generator, count: int, hubs: np.ndarray):
+    """Clustered coordinates: a city by weight, then mostly near one of its neighbourhood hubs"""
+    centre = rng.choice(len(CENTRES), size=count, p=CENTRE_WEIGHTS)
+    hub = rng.integers(NEIGHBOURHOODS_PER_CENTRE, size=count)
+    near_hub = rng.random(count) < 0.8
+    points = np.where(
+        near_hub[:, None],
+        hubs[centre, hub] + rng.normal(0.0, NEIGHBOURHOOD_SPREAD, size=(count, 2)),
+        np.asarray(CENTRES)[centre] + rng.normal(0.0, METRO_SPREAD, size=(count, 2)),
+    )
+    return np.round(points[:, 0], 6), np.round(points[:, 1], 6)
+
+
+def geohashes(latitudes: np.ndarray, longitudes: np.ndarray, precision: int = geo.GEOHASH_PRECISION) -> list:
+    """geo.encode over whole arrays"""
+    lat_bits, lon_bits = geo._bits(precision)
+    lat_index = np.clip(((latitudes + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lon_index = np.clip(((longitudes + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1)
+    # Interleave the bits, longitude first, five to a character
+    values = np.zeros((len(latitudes), precision), dtype=np.uint8)
+    for i in range(precision * 5):
+        if i % 2 == 0:
+            lon_bits -= 1
+            bit = (lon_index >> lon_bits) & 1
+        else:
+            lat_bits -= 1
+            bit = (lat_index >> lat_bits) & 1
+        values[:, i // 5] = (values[:, i // 5] << 1) | bit.astype(np.uint8)
+    alphabet = np.frombuffer(geo._BASE32.encode(), dtype=np.uint8)
+    return alphabet[values].view(f"S{precision}").ravel().astype(str).tolist()
+
+
+def timestamps(rng: np.random.Generator, start: int, count: int, total: int, now: np.datetime64, days: int,
+               postgres: bool) -> list:
+    """
+    Creation times of rows ``start`` to ``start + count`` out of ``total``,
+    spread over the last ``days`` days in ascending order, so ids grow with
+    time as they do in production (and index inserts stay mostly appends)
+    """
+    window = days * 86400e6
+    fractions = (start + np.sort(rng.random(count)) * count) / total
+    values = now - (window * (1.0 - fractions)).astype("timedelta64[us]")
+    if postgres:
+        return np.datetime_as_string(values, unit="us", timezone="UTC").tolist()
+    return [value.replace(tzinfo=timezone.utc) for value in values.astype(datetime)]
+
+
+def _skip_foreign_key_checks(conn):
+    """
+    Generated rows only reference rows inserted before them, so on Postgres a
+    superuser can skip the per-row foreign key triggers for the transaction
+    """
+    if conn.dialect.name == "postgresql" and conn.exec_driver_sql("SHOW is_superuser").scalar() == "on":
+        conn.exec_driver_sql("SET LOCAL session_replication_role = replica")
+
+
+def seed(engine, sizes: dict, random_seed: int = 42) -> dict:
+    """Migrate and fill an empty database; returns row counts and timings"""
+    sizes = {**DEFAULTS, **sizes}
+    rng = np.random.default_rng(random_seed)
+    now = datetime.now(timezone.utc)
+    now64 = np.datetime64(now.replace(tzinfo=None), "us")
+    hubs = np.asarray(CENTRES)[:, None, :] + rng.normal(0.0, METRO_SPREAD, size=(len(CENTRES), NEIGHBOURHOODS_PER_CENTRE, 2))
+    migrations.upgrade(engine)
+    postgres = engine.dialect.name == "postgresql"
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(models.Student)).scalar():
+            raise RuntimeError("database already has students; seed an empty database")
+
+    timings = {}
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for model, prefix, count in (
+            (models.Area, "Area ", sizes["areas"]),
+            (models.Degree, "Degree ", sizes["degrees"]),
+            (models.Institute, "Institute ", sizes["institutes"]),
+        ):
+            _load_chunks(conn, model, count, lambda start, n, prefix=prefix: {"name": _labels(prefix, start, n)})
+        area_ids, degree_ids, institute_ids = (
+            _ids(conn, model) for model in (models.Area, models.Degree, models.Institute)
+        )
+    timings["reference_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        def students(start: int, count: int) -> Columns:
+            latitudes, longitudes = locations(rng, count, hubs)
+            return {
+                "phone_number": _labels("s", start, count, 10),
+                "name": _labels("Student ", start, count),
+                "latitude": latitudes.tolist(),
+                "longitude": longitudes.tolist(),
+                "created_at": timestamps(rng, start, count, sizes["students"], now64, sizes["days"], postgres),
+            }
+        _load_chunks(conn, models.Student, sizes["students"], students)
+        student_ids = _ids(conn, models.Student)
+    timings["students_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    descriptions = [
+        " ".join(rng.choice(DESCRIPTION_WORDS, size=rng.integers(10, 60)).tolist()) for _ in range(1000)
+    ]
+    with engine.begin() as conn:
+        _skip_foreign_key_checks(conn)
+
+        def educators(start: int, count: int) -> Columns:
+            latitudes, longitudes = locations(rng, count, hubs)
+            return {
+                "phone_number": _labels("e", start, count, 10),
+                "name": _labels("Educator ", start, count),
+                "description": [descriptions[i] for i in rng.integers(len(descriptions), size=count)],
+                "latitude": latitudes.tolist(),
+                "longitude": longitudes.tolist(),
+                "geohash": geohashes(latitudes, longitudes),
+                "is_licensed": (rng.random(count) < LICENSED_SHARE).tolist(),
+                "created_at": timestamps(rng, start, count, sizes["educators"], now64, sizes["days"], postgres),
+            }
+        _load_chunks(conn, models.Educator, sizes["educators"], educators)
+        educator_ids = _ids(conn, models.Educator)
+        licensed = np.fromiter(
+            conn.execute(select(models.Educator.id).where(models.Educator.is_licensed).order_by(models.Educator.id)).scalars(),
+            dtype=np.int64,
+        )
+
+        # One to three distinct areas each: a popular first area, then steps of a
+        # fixed stride, which never wrap back onto an earlier pick
+        per_educator = rng.integers(1, min(3, len(area_ids)) + 1, size=len(educator_ids))
+        owners = np.repeat(educator_ids, per_educator)
+        first = np.repeat(rng.choice(len(area_ids), size=len(educator_ids), p=_popularity(len(area_ids))), per_educator)
+        stride = np.repeat(rng.integers(1, max(1, (len(area_ids) - 1) // 2) + 1, size=len(educator_ids)), per_educator)
+        step = np.arange(len(owners)) - np.repeat(np.cumsum(per_educator) - per_educator, per_educator)
+        areas = area_ids[(first + step * stride) % len(area_ids)]
+        _load(conn, models.EducatorArea, {"educator_id": owners.tolist(), "area_id": areas.tolist()})
+
+        per_educator = rng.integers(0, 3, size=len(educator_ids))
+        owners = np.repeat(educator_ids, per_educator)
+        _load(conn, models.EducatorDegree, {
+            "educator_id": owners.tolist(),
+            "degree_id": rng.choice(degree_ids, size=len(owners)).tolist(),
+            "institute_id": rng.choice(institute_ids, size=len(owners)).tolist(),
+        })
+        _load(conn, models.EducatorLicense, {
+            "educator_id": licensed.tolist(),
+            "registration_number": _labels("REG-", 0, len(licensed), 8),
+            "issuing_authority": ["Board"] * len(licensed),
+        })
+    timings["educators_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        _skip_foreign_key_checks(conn)
+        if partitions.is_partitioned(conn):
+            partitions.ensure_partitions(conn, start=(now - timedelta(days=sizes["days"])).date())
+        def calls(start: int, count: int) -> Columns:
+            return {
+                "educator_id": rng.choice(educator_ids, size=count, p=popularity).tolist(),
+                "student_id": rng.choice(student_ids, size=count).tolist(),
+                "created_at": timestamps(rng, start, count, sizes["calls"], now64, sizes["days"], postgres),
+            }
+        if sizes["calls"]:
+            popularity = _popularity(len(educator_ids))
+            _load_chunks(conn, models.CallRequest, sizes["calls"], calls)
+    timings["calls_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        rollups.rebuild(conn)
+    timings["rollups_s"] = round(time.perf_counter() - started, 2)
+    return {"sizes": sizes, "random_seed": random_seed, "timings": timings}
+
+
+def parse_sizes(args) -> dict:
+    return {name: getattr(args, name) for name in DEFAULTS}
+
+
+def add_size_arguments(parser):
+    """Add --students, --calls etc. and --random-seed to an argparse parser or group"""
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name}", type=int, default=default, help=f"default {default}")
+    parser.add_argument("--random-seed", type=int, default=42, help="the same seed gives the same data")
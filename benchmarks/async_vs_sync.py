@@ -0,0 +1,101 @@
+"""
+Compare throughput and tail latency of the sync (threadpool) and async database modes.
+
+Starts uvicorn once per mode against the database configured in .env, seeds a
+few rows, then drives read and write endpoints at increasing concurrency.
+
+    python -m benchmarks.async_vs_sync --concurrency 50 200 800 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.loadgen import run_load
+
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if mode == "async" else "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def seed(client: httpx.AsyncClient, students: int):
+    """Make sure there are students to read; returns their ids"""
+    prefix = f"bench-{int(time.time())}-"
+    ids = []
+    for i in range(students):
+        response = await client.post("/api/v1/students", json={"phone_number": f"{prefix}{i}"[:20]})
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def bench_mode(mode: str, args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(mode, args.port, args.workers)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            student_ids = await seed(client, args.seed_rows)
+            results = {}
+            for concurrency in args.concurrency:
+                results[str(concurrency)] = {
+                    "get_student": await run_load(
+                        client, lambda: f"/api/v1/students/{random.choice(student_ids)}",
+                        concurrency, args.duration,
+                    ),
+                    "list_students": await run_load(
+                        client, "/api/v1/students?limit=20", concurrency, args.duration,
+                    ),
+                }
+            return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed-rows", type=int, default=200)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {mode: await bench_mode(mode, args) for mode in ("sync", "async")}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Throughput vs. latency of POST /api/v1/calls with and without group commit.
+
+Starts uvicorn once per setting against the database configured in .env,
+creates a few students and educators, then posts call requests at each
+concurrency. Settings are ``off`` (one commit per request) or
+``BATCH_SIZE:WAIT_MS`` for CALL_REQUEST_BATCH_SIZE and
+CALL_REQUEST_BATCH_WAIT_MS. The report adds the mean batch size the server
+saw from /health/group_commit.
+
+    python -m benchmarks.group_commit --settings off 50:0 200:2 500:5 --concurrency 16 64 256
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.async_vs_sync import wait_ready
+from benchmarks.loadgen import run_load
+
+
+def start_server(setting: str, args) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if args.db_async else "false", CALL_REQUEST_GROUP_COMMIT="false")
+    if setting != "off":
+        batch_size, wait_ms = setting.split(":")
+        env.update(
+            CALL_REQUEST_GROUP_COMMIT="true",
+            CALL_REQUEST_BATCH_SIZE=batch_size,
+            CALL_REQUEST_BATCH_WAIT_MS=wait_ms,
+            CALL_REQUEST_QUEUE_SIZE=str(args.queue_size),
+        )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+
+
+async def seed(client: httpx.AsyncClient, count: int):
+    """Create students and educators to call; returns their ids"""
+    prefix = f"gc{int(time.time()) % 100000}-"
+    ids = {"students": [], "educators": []}
+    for resource in ids:
+        for i in range(count):
+            response = await client.post(f"/api/v1/{resource}", json={"phone_number": f"{prefix}{i}"[:20]})
+            response.raise_for_status()
+            ids[resource].append(response.json()["id"])
+    return ids
+
+
+async def bench_setting(setting: str, args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(setting, args)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            ids = await seed(client, args.seed_rows)
+            results = {}
+            for concurrency in args.concurrency:
+                before = (await client.get("/health/group_commit")).json()
+                result = await run_load(
+                    client, "/api/v1/calls", concurrency, args.duration, method="POST",
+                    json_body=lambda: {
+                        "educator_id": random.choice(ids["educators"]),
+                        "student_id": random.choice(ids["students"]),
+                    },
+                )
+                after = (await client.get("/health/group_commit")).json()
+                batches = after["batches"] - before["batches"]
+                result["mean_batch"] = round((after["rows"] - before["rows"]) / batches, 1) if batches else None
+                results[str(concurrency)] = result
+            return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", nargs="+", default=["off", "50:0", "200:2", "500:5"],
+                        help="off, or BATCH_SIZE:WAIT_MS")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency")
+    parser.add_argument("--queue-size", type=int, default=5000, help="CALL_REQUEST_QUEUE_SIZE for the server")
+    parser.add_argument("--db-async", action="store_true", help="run the server with DB_ASYNC=true")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--seed-rows", type=int, default=100)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {setting: await bench_setting(setting, args) for setting in args.settings}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
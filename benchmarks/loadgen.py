@@ -0,0 +1,95 @@
+"""
+Closed-loop HTTP load generator
+"""
+import asyncio
+import itertools
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import httpx
+
+# A target is a path, or a callable returning the next path to request
+Target = Union[str, Callable[[], str]]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Summarize per-request latencies (seconds) into throughput and percentiles"""
+    latencies = sorted(latencies)
+    requests = len(latencies) + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    target: Target,
+    concurrency: int,
+    duration: float,
+    method: str = "GET",
+    json_body: Callable[[], object] = None,
+    warmup: float = 1.0,
+    content: Optional[Callable[[], bytes]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    on_response: Optional[Callable[[httpx.Response], None]] = None,
+) -> Dict:
+    """
+    Keep ``concurrency`` requests in flight against ``target`` for ``duration`` seconds.
+
+    Requests issued during the first ``warmup`` seconds are not recorded.
+    Any non-2xx/3xx status or transport error counts as an error.
+    ``json_body`` and ``content`` are called right after ``target`` for every
+    request, so they can share state with it; ``on_response`` sees every
+    successful response, e.g. to collect created ids.
+    """
+    next_path = target if callable(target) else itertools.repeat(target).__next__
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    record_from = started + warmup
+    deadline = record_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            try:
+                response = await client.request(
+                    method,
+                    next_path(),
+                    json=json_body() if json_body else None,
+                    content=content() if content else None,
+                    headers=headers,
+                )
+                failed = response.status_code >= 400
+                if on_response is not None and not failed:
+                    on_response(response)
+            except httpx.HTTPError:
+                failed = True
+            finished = time.perf_counter()
+            if now < record_from:
+                continue
+            if failed:
+                errors += 1
+            else:
+                latencies.append(finished - now)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - record_from)
@@ -0,0 +1,220 @@
+"""
+Load scenarios covering every endpoint of the area, degree, student,
+educator, educator_area and call_request routers
+
+Reads pick from ids sampled before the run; writes use unique values per run.
+Updates and deletes of rows that must not be shared with the seed (areas,
+degrees, students, educators, educator areas) work on rows created by the
+matching create scenario, so creates run first.
+"""
+import csv
+import io
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+ROUTERS = ("area", "degree", "student", "educator", "educator_area", "call_request")
+# Items per bulk create or import request
+BULK_SIZE = 50
+
+
+class Scenario:
+    """One endpoint under load; the callables mirror run_load's arguments"""
+
+    def __init__(
+        self,
+        router: str,
+        name: str,
+        method: str,
+        target: Callable[[], str],
+        json_body: Optional[Callable[[], object]] = None,
+        content: Optional[Callable[[], bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        on_response: Optional[Callable[[httpx.Response], None]] = None,
+    ):
+        self.router = router
+        self.name = name
+        self.method = method
+        self.target = target
+        self.json_body = json_body
+        self.content = content
+        self.headers = headers
+        self.on_response = on_response
+
+
+def build(ids: Dict[str, List[int]], fresh_areas: List[int], days: int, seed: int, run_id: str) -> List[Scenario]:
+    """
+    Scenarios for a seeded database. ``ids`` maps a table to existing ids in
+    ascending order, ``fresh_areas`` are areas no educator has yet, used to create unique
+    educator-area pairs, and ``days`` is how far back call requests go.
+    """
+    rng = random.Random(seed)
+    counter = itertools.count()
+    created: Dict[str, list] = {router: [] for router in ROUTERS}
+    current: Dict[str, dict] = {}
+    now = datetime.now(timezone.utc)
+
+    def pick(table: str) -> int:
+        return rng.choice(ids[table])
+
+    def popular_educator() -> int:
+        # Skewed like the seeded calls: low ids are called far more often
+        educators = ids["educator"]
+        return educators[int(rng.random() ** 2 * len(educators))]
+
+    def unique(prefix: str) -> str:
+        # Phone numbers are at most 20 characters
+        return f"{prefix}{run_id}{next(counter)}"[:20]
+
+    def collect(router: str):
+        return lambda response: created[router].append(response.json())
+
+    def take(router: str) -> int:
+        """Remove and return a row created during this run; 0 (a 404) once they run out"""
+        return created[router].pop()["id"] if created[router] else 0
+
+    def reuse(router: str) -> Optional[dict]:
+        return rng.choice(created[router]) if created[router] else None
+
+    def location() -> dict:
+        return {"latitude": round(rng.uniform(12.5, 13.5), 6), "longitude": round(rng.uniform(77.0, 78.0), 6)}
+
+    def student_body() -> dict:
+        return {"phone_number": unique("s"), "name": "Bench student", **location()}
+
+    def educator_body() -> dict:
+        return {
+            "phone_number": unique("e"), "name": "Bench educator", "description": "Maths and physics " * 10,
+            "is_licensed": rng.random() < 0.5, **location(),
+        }
+
+    def call_body() -> dict:
+        return {"educator_id": popular_educator(), "student_id": pick("student")}
+
+    def csv_body(prefix: str, extra: Optional[dict] = None) -> Callable[[], bytes]:
+        def build_csv() -> bytes:
+            out = io.StringIO()
+            writer = csv.writer(out)
+            fields = ["phone_number", "name", "latitude", "longitude"] + list(extra or {})
+            writer.writerow(fields)
+            for _ in range(BULK_SIZE):
+                row = {"phone_number": unique(prefix), "name": "Imported", **location(), **(extra or {})}
+                writer.writerow([row[field] for field in fields])
+            return out.getvalue().encode()
+        return build_csv
+
+    def educator_area_pair() -> dict:
+        # Walk educators first, then fresh areas, so every pair is new
+        index = next(counter)
+        educators = ids["educator"]
+        return {
+            "educator_id": educators[index % len(educators)],
+            "area_id": fresh_areas[(index // len(educators)) % len(fresh_areas)],
+        }
+
+    def with_row(router: str) -> Callable[[], str]:
+        """Target a created row and remember it, so the body can repeat its values"""
+        def target() -> str:
+            current[router] = reuse(router) or {"id": 0}
+            return f"{router_paths[router]}/{current[router]['id']}"
+        return target
+
+    def window() -> str:
+        start = now - timedelta(seconds=rng.random() * days * 86400)
+        end = start + timedelta(hours=1)
+        return f"created_from={start.isoformat().replace('+00:00', 'Z')}&created_to={end.isoformat().replace('+00:00', 'Z')}"
+
+    def day_range() -> str:
+        return f"day_from={(now - timedelta(days=30)).date()}&day_to={now.date()}"
+
+    router_paths = {
+        "area": "/api/v1/area",
+        "degree": "/api/v1/degree",
+        "student": "/api/v1/students",
+        "educator": "/api/v1/educators",
+        "educator_area": "/api/v1/educator_areas",
+        "call_request": "/api/v1/calls",
+    }
+    area, degree, student, educator = (router_paths[name] for name in ("area", "degree", "student", "educator"))
+    educator_area, calls = router_paths["educator_area"], router_paths["call_request"]
+    csv_headers = {"content-type": "text/csv"}
+
+    scenarios = []
+    for router, path in (("area", area), ("degree", degree)):
+        scenarios += [
+            Scenario(router, f"list_{router}s", "GET", lambda path=path: f"{path}?limit=50"),
+            Scenario(router, f"get_{router}", "GET", lambda path=path, router=router: f"{path}/{pick(router)}"),
+            Scenario(router, f"create_{router}", "POST", lambda path=path: path,
+                     json_body=lambda router=router: {"name": unique(router)}, on_response=collect(router)),
+            Scenario(router, f"bulk_create_{router}s", "POST", lambda path=path: f"{path}/bulk",
+                     json_body=lambda router=router: [{"name": unique(router)} for _ in range(BULK_SIZE)]),
+            Scenario(router, f"update_{router}", "PUT", with_row(router),
+                     json_body=lambda router=router: {"name": unique(router)}),
+            Scenario(router, f"delete_{router}", "DELETE", lambda path=path, router=router: f"{path}/{take(router)}"),
+        ]
+
+    scenarios += [
+        Scenario("student", "list_students", "GET", lambda: f"{student}?limit=50"),
+        Scenario("student", "get_student", "GET", lambda: f"{student}/{pick('student')}"),
+        Scenario("student", "create_student", "POST", lambda: student, json_body=student_body,
+                 on_response=collect("student")),
+        Scenario("student", "import_students", "POST", lambda: f"{student}/import", content=csv_body("i"),
+                 headers=csv_headers),
+        Scenario("student", "update_student", "PUT", lambda: f"{student}/{pick('student')}",
+                 json_body=lambda: {"name": unique("n")}),
+        Scenario("student", "partial_update_student", "PATCH", lambda: f"{student}/{pick('student')}",
+                 json_body=lambda: {"name": unique("n")}),
+        Scenario("student", "delete_student", "DELETE", lambda: f"{student}/{take('student')}"),
+
+        Scenario("educator", "list_educators", "GET", lambda: f"{educator}?limit=50"),
+        Scenario("educator", "search_educators", "GET",
+                 lambda: f"{educator}?area_id={pick('area')}&is_licensed=true&limit=50"),
+        Scenario("educator", "list_educators_expanded", "GET",
+                 lambda: f"{educator}?expand=areas,degrees,licenses&limit=50"),
+        Scenario("educator", "nearby_educators", "GET",
+                 lambda: f"{educator}/nearby?lat={rng.uniform(12.8, 13.1):.4f}&lon={rng.uniform(77.4, 77.7):.4f}&radius_km=5"),
+        Scenario("educator", "nearby_educators_for_student", "GET",
+                 lambda: f"{educator}/nearby?student_id={pick('student')}&radius_km=10"),
+        Scenario("educator", "get_educator", "GET", lambda: f"{educator}/{pick('educator')}"),
+        Scenario("educator", "create_educator", "POST", lambda: educator, json_body=educator_body,
+                 on_response=collect("educator")),
+        Scenario("educator", "import_educators", "POST", lambda: f"{educator}/import",
+                 content=csv_body("j", {"description": "Imported", "is_licensed": "false"}), headers=csv_headers),
+        Scenario("educator", "update_educator", "PUT", lambda: f"{educator}/{pick('educator')}",
+                 json_body=lambda: {"name": unique("n"), **location()}),
+        Scenario("educator", "partial_update_educator", "PATCH", lambda: f"{educator}/{pick('educator')}",
+                 json_body=lambda: {"description": unique("d")}),
+        Scenario("educator", "delete_educator", "DELETE", lambda: f"{educator}/{take('educator')}"),
+
+        Scenario("educator_area", "list_educator_areas", "GET", lambda: f"{educator_area}?limit=50"),
+        Scenario("educator_area", "get_educator_area", "GET", lambda: f"{educator_area}/{pick('educator_area')}"),
+        Scenario("educator_area", "create_educator_area", "POST", lambda: educator_area,
+                 json_body=educator_area_pair, on_response=collect("educator_area")),
+        Scenario("educator_area", "update_educator_area", "PUT", with_row("educator_area"),
+                 json_body=lambda: {key: current["educator_area"].get(key) for key in ("educator_id", "area_id")}),
+        Scenario("educator_area", "partial_update_educator_area", "PATCH", with_row("educator_area"),
+                 json_body=lambda: {key: current["educator_area"].get(key) for key in ("educator_id", "area_id")}),
+        Scenario("educator_area", "delete_educator_area", "DELETE",
+                 lambda: f"{educator_area}/{take('educator_area')}"),
+
+        Scenario("call_request", "list_call_requests", "GET", lambda: f"{calls}?limit=50"),
+        Scenario("call_request", "get_call_request", "GET", lambda: f"{calls}/{pick('call_request')}"),
+        Scenario("call_request", "create_call_request", "POST", lambda: calls, json_body=call_body,
+                 on_response=collect("call_request")),
+        Scenario("call_request", "bulk_create_call_requests", "POST", lambda: f"{calls}/bulk",
+                 json_body=lambda: [call_body() for _ in range(BULK_SIZE)]),
+        Scenario("call_request", "export_call_requests_hour", "GET", lambda: f"{calls}/export?{window()}"),
+        Scenario("call_request", "educator_call_stats", "GET",
+                 lambda: f"{calls}/stats/educators/{popular_educator()}?{day_range()}"),
+        Scenario("call_request", "student_call_stats", "GET",
+                 lambda: f"{calls}/stats/students/{pick('student')}?{day_range()}"),
+        Scenario("call_request", "update_call_request", "PUT", lambda: f"{calls}/{pick('call_request')}",
+                 json_body=call_body),
+        Scenario("call_request", "partial_update_call_request", "PATCH", lambda: f"{calls}/{pick('call_request')}",
+                 json_body=call_body),
+        Scenario("call_request", "delete_call_request", "DELETE", lambda: f"{calls}/{take('call_request')}"),
+    ]
+    return scenarios
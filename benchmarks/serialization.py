@@ -0,0 +1,129 @@
+"""
+Microbenchmark of list serialization: the response_model path against the
+FAST_JSON row path, for large pages of students and educators.
+
+The current path loads ORM objects, validates them through the route's
+response_model and encodes with the stdlib json, exactly as FastAPI does for
+a handler returning them. The fast path selects the schema's columns and
+renders the rows with orjson. Runs against an in-memory SQLite database
+unless --database-url is given, and checks that both paths produce the same
+JSON before timing them.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, schemas, serialization
+
+CASES = (
+    ("students", models.Student, schemas.Student),
+    ("educators", models.Educator, schemas.Educator),
+)
+
+
+def seed(db, rows: int):
+    """Insert ``rows`` students and educators with every column filled"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for model in (models.Student, models.Educator):
+        values = [
+            {
+                "phone_number": f"bench-{index}",
+                "name": f"Bench user {index}",
+                "latitude": 12.9 + index * 1e-5,
+                "longitude": 77.6 - index * 1e-5,
+                "created_at": start + timedelta(seconds=index),
+                "updated_at": start + timedelta(seconds=index, microseconds=123456),
+            }
+            for index in range(rows)
+        ]
+        if model is models.Educator:
+            for value in values:
+                value.update(description="Teaches things", is_licensed=True)
+        db.execute(insert(model), values)
+    db.commit()
+
+
+def current_path(db, model, field) -> bytes:
+    objects = db.query(model).order_by(model.created_at, model.id).all()
+    content = asyncio.run(serialize_response(field=field, response_content={"items": objects, "next_cursor": None}))
+    return JSONResponse(content).body
+
+
+def fast_path(db, model, schema) -> bytes:
+    columns = serialization.columns(model, schema)
+    rows = db.query(*columns).order_by(model.created_at, model.id).all()
+    return serialization.render_json({"items": rows, "next_cursor": None}).body
+
+
+def timed(fn, repeat: int, *args) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2)}
+
+
+def run(args) -> dict:
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)
+
+    with session() as db:
+        if args.seed:
+            seed(db, args.rows)
+
+    results = {"rows": args.rows, "repeat": args.repeat, "cases": {}}
+    for name, model, schema in CASES:
+        field = create_response_field(name=f"Response_{name}", type_=schemas.Page[schema])
+
+        # A fresh session per call, so ORM objects are really loaded each time
+        def current():
+            with session() as db:
+                return current_path(db, model, field)
+
+        def fast():
+            with session() as db:
+                return fast_path(db, model, schema)
+
+        if json.loads(current()) != json.loads(fast()):
+            raise RuntimeError(f"{name}: fast path output differs from the response_model path")
+        baseline = timed(current, args.repeat)
+        optimized = timed(fast, args.repeat)
+        results["cases"][name] = {
+            "current": baseline,
+            "fast": optimized,
+            "speedup": round(baseline["median_ms"] / optimized["median_ms"], 2),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per list")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per path")
+    parser.add_argument("--database-url", help="benchmark an existing database instead of in-memory SQLite")
+    parser.add_argument("--no-seed", dest="seed", action="store_false", help="use the rows already in --database-url")
+    args = parser.parse_args()
+    if serialization.orjson is None:
+        parser.error("the fast path needs orjson; pip install -r requirements.txt")
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measure worker cold start: time from launching uvicorn to the first 200 from
+/health, and to /health/ready, for each SCHEMA_STARTUP mode.
+
+Each run starts a fresh server against the database configured in .env and
+collects the worker's own import/startup breakdown from /health/startup.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --modes check background --prewarm 5 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Seconds between polls while waiting for the server
+POLL_INTERVAL = 0.005
+
+
+def _wait_for(client: httpx.Client, path: str, started: float, timeout: float) -> float:
+    """Poll ``path`` until it answers 200; returns seconds since ``started``"""
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError(f"{path} did not answer 200 within {timeout}s")
+
+
+def cold_start(mode: str, args) -> dict:
+    env = dict(os.environ, SCHEMA_STARTUP=mode, DB_POOL_PREWARM=str(args.prewarm))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=1.0) as client:
+            first_200 = _wait_for(client, "/health", started, args.timeout)
+            ready = _wait_for(client, "/health/ready", started, args.timeout)
+            breakdown = client.get("/health/startup").json()
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "first_200_ms": round(first_200 * 1000, 1),
+        "ready_ms": round(ready * 1000, 1),
+        "phases_ms": breakdown["phases_ms"],
+        "process_start_to_import_ms": breakdown["process_start_to_import_ms"],
+    }
+
+
+def summarize(runs: list) -> dict:
+    summary = {}
+    for key in ("first_200_ms", "ready_ms", "process_start_to_import_ms"):
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[key] = {"median": round(statistics.median(values), 1), "min": min(values), "max": max(values)}
+    phases = {name for run in runs for name in run["phases_ms"]}
+    summary["phases_median_ms"] = {
+        name: round(statistics.median(run["phases_ms"][name] for run in runs if name in run["phases_ms"]), 1)
+        for name in sorted(phases)
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["check", "background", "skip"],
+                        choices=["check", "migrate", "background", "skip"])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per mode")
+    parser.add_argument("--prewarm", type=int, default=0, help="DB_POOL_PREWARM for the server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each start")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.modes:
+        runs = [cold_start(mode, args) for _ in range(args.runs)]
+        report[mode] = {"summary": summarize(runs), "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Load-test every endpoint of the area, degree, student, educator,
+educator_area and call_request routers against a seeded database, and compare
+runs against a saved baseline.
+
+The database configured in .env is seeded first (it must be empty; pass
+--no-seed to reuse one seeded earlier), then each scenario is driven at
+--concurrency for --duration seconds, either in-process through httpx's ASGI
+transport or against uvicorn. The report holds throughput, p50/p95/p99 latency
+and peak RSS per scenario.
+
+    python -m benchmarks.suite run --students 1000000 --educators 100000 --calls 10000000 --output baseline.json
+    python -m benchmarks.suite run --no-seed --mode uvicorn --baseline baseline.json --output current.json
+    python -m benchmarks.suite compare baseline.json current.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app import models, synthetic
+from app.database import engine
+from benchmarks import scenarios
+from benchmarks.async_vs_sync import start_server, wait_ready
+from benchmarks.loadgen import run_load
+
+# Fresh areas created per run, giving educator_area creates unused pairs
+FRESH_AREAS = 20
+# Existing ids sampled per table for reads and updates
+SAMPLE_IDS = 100000
+
+TABLES = {
+    "area": models.Area,
+    "degree": models.Degree,
+    "student": models.Student,
+    "educator": models.Educator,
+    "educator_area": models.EducatorArea,
+    "call_request": models.CallRequest,
+}
+
+
+def sample_ids() -> Dict[str, List[int]]:
+    """Up to SAMPLE_IDS existing ids of every table, spread evenly over its id range"""
+    samples = {}
+    with engine.connect() as conn:
+        for name, model in TABLES.items():
+            low, high = conn.execute(select(func.min(model.id), func.max(model.id))).one()
+            stride = max(1, ((high or 0) - (low or 0)) // SAMPLE_IDS + 1)
+            samples[name] = list(conn.execute(
+                select(model.id).where(model.id % stride == 0).order_by(model.id).limit(SAMPLE_IDS)
+            ).scalars())
+    return samples
+
+
+def create_fresh_areas(run_id: str) -> List[int]:
+    with engine.begin() as conn:
+        conn.execute(insert(models.Area), [{"name": f"Bench {run_id} {i}"} for i in range(FRESH_AREAS)])
+        return list(conn.execute(select(models.Area.id).where(models.Area.name.startswith(f"Bench {run_id} "))).scalars())
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _own_peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _server_peak_rss_mb(pid: int) -> float:
+    """Largest high-water mark over the uvicorn process and its workers"""
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    peak = 0
+    for process in pids:
+        try:
+            with open(f"/proc/{process}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+        except OSError:
+            continue
+    return round(peak / 1024, 1)
+
+
+def _selected(all_scenarios: List[scenarios.Scenario], only: Optional[List[str]]) -> List[scenarios.Scenario]:
+    if not only:
+        return all_scenarios
+    return [scenario for scenario in all_scenarios if scenario.router in only or scenario.name in only]
+
+
+async def drive(client: httpx.AsyncClient, selected: List[scenarios.Scenario], args, peak_rss) -> Dict[str, dict]:
+    results = {}
+    for scenario in selected:
+        summary = await run_load(
+            client, scenario.target, args.concurrency, args.duration,
+            method=scenario.method, json_body=scenario.json_body, warmup=args.warmup,
+            content=scenario.content, headers=scenario.headers, on_response=scenario.on_response,
+        )
+        results[scenario.name] = {"router": scenario.router, "method": scenario.method, **summary,
+                                  "peak_rss_mb": peak_rss()}
+        print(f"{scenario.name}: {summary['throughput_rps']} rps, p99 {summary['p99_ms']} ms, "
+              f"{summary['errors']} errors", file=sys.stderr)
+    return results
+
+
+async def run_inprocess(selected: List[scenarios.Scenario], args) -> Dict[str, dict]:
+    import main
+
+    # ASGITransport does not send lifespan events, so run startup here
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            return await drive(client, selected, args, _own_peak_rss_mb)
+
+
+async def run_uvicorn(selected: List[scenarios.Scenario], args) -> Dict[str, dict]:
+    mode = "async" if os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes") else "sync"
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(mode, args.port, args.workers)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            return await drive(client, selected, args, lambda: _server_peak_rss_mb(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(args) -> dict:
+    sizes = synthetic.parse_sizes(args)
+    seeding = None
+    if not args.no_seed:
+        print("seeding...", file=sys.stderr)
+        seeding = synthetic.seed(engine, sizes, args.random_seed)
+
+    run_id = str(int(time.time()) % 1000000)
+    selected = _selected(
+        scenarios.build(sample_ids(), create_fresh_areas(run_id), sizes["days"], args.random_seed, run_id), args.only,
+    )
+    if not selected:
+        raise SystemExit(f"no scenario matches {args.only}")
+    runner = run_inprocess if args.mode == "inprocess" else run_uvicorn
+    results = asyncio.run(runner(selected, args))
+
+    with engine.connect() as conn:
+        counts = {
+            name: conn.execute(select(func.count()).select_from(model)).scalar()
+            for name, model in TABLES.items()
+        }
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "mode": args.mode,
+            "dialect": engine.dialect.name,
+            "db_async": os.getenv("DB_ASYNC", "false"),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "rows": counts,
+            "seeding": seeding,
+        },
+        "scenarios": results,
+        "peak_rss_mb": max((result["peak_rss_mb"] for result in results.values()), default=0.0),
+    }
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    return round((after - before) / before * 100, 1) if before else None
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    """
+    Per-scenario percentage changes; throughput dropping, or latency or RSS
+    growing, by more than ``threshold`` percent is a regression
+    """
+    worse_if_higher = ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+    changes, regressions = {}, []
+    for name, after in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        entry = {}
+        for key in ("throughput_rps",) + worse_if_higher:
+            change = _change(before[key], after[key])
+            entry[key] = {"baseline": before[key], "current": after[key], "change_pct": change}
+            if change is None:
+                continue
+            if (key == "throughput_rps" and change < -threshold) or (key in worse_if_higher and change > threshold):
+                regressions.append(f"{name} {key}: {before[key]} -> {after[key]} ({change:+}%)")
+        changes[name] = entry
+    # Runs in another mode, dialect or load level are not comparable number for number
+    differing = [
+        key for key in ("mode", "dialect", "db_async", "concurrency", "workers")
+        if baseline["meta"].get(key) != current["meta"].get(key)
+    ]
+    return {
+        "threshold_pct": threshold,
+        "differing_settings": differing,
+        "baseline": baseline["meta"].get("git_commit"),
+        "current": current["meta"].get("git_commit"),
+        "scenarios": changes,
+        "missing": sorted(set(baseline["scenarios"]) - set(current["scenarios"])),
+        "regressions": regressions,
+    }
+
+
+def _write(report: dict, path: Optional[str]):
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed, load-test and report")
+    run_parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    run_parser.add_argument("--no-seed", action="store_true", help="reuse an already seeded database")
+    synthetic.add_size_arguments(run_parser)
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=1.0, help="unrecorded seconds before each scenario")
+    run_parser.add_argument("--only", nargs="+", help="routers or scenario names to run")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    run_parser.add_argument("--port", type=int, default=8765)
+    run_parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    run_parser.add_argument("--baseline", help="also compare against this saved report")
+    run_parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    run_parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    compare_parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        if args.baseline:
+            report["comparison"] = compare(_load(args.baseline), report, args.threshold)
+        _write(report, args.output)
+        comparison = report.get("comparison")
+    else:
+        comparison = compare(_load(args.baseline), _load(args.current), args.threshold)
+        _write(comparison, None)
+
+    if comparison:
+        if comparison["differing_settings"]:
+            print(f"warning: runs differ in {', '.join(comparison['differing_settings'])}", file=sys.stderr)
+        for regression in comparison["regressions"]:
+            print(f"regression: {regression}", file=sys.stderr)
+        if comparison["regressions"] and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
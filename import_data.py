@@ -0,0 +1,44 @@
+"""
+Bulk import script
+Load students or educators from a CSV or NDJSON file, e.g.
+    python import_data.py students students.csv
+    python import_data.py educators educators.ndjson --format ndjson
+"""
+import argparse
+import io
+import os
+
+from app import geo, importer, models, schemas
+from app.database import SessionLocal
+
+TARGETS = {
+    "students": (models.Student, schemas.StudentCreate, None),
+    "educators": (models.Educator, schemas.EducatorCreate, geo.with_geohash),
+}
+
+
+def import_file(target: str, path: str, fmt: importer.ImportFormat):
+    """Import one file and print the per-row report"""
+    model, schema, prepare = TARGETS[target]
+    db = SessionLocal()
+    try:
+        with io.open(path, encoding="utf-8", errors="replace", newline="") as stream:
+            report = importer.import_rows(db, model, schema, stream, fmt, prepare=prepare)
+    finally:
+        db.close()
+
+    print(f"Received {report['received']} rows, inserted {report['inserted']}, failed {report['failed']}")
+    for error in report["errors"]:
+        print(f"  line {error['line']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import students or educators")
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[fmt.value for fmt in importer.ImportFormat],
+                        help="defaults to the file extension (.csv or NDJSON otherwise)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if os.path.splitext(args.path)[1].lower() == ".csv" else "ndjson")
+    import_file(args.target, args.path, importer.ImportFormat(fmt))
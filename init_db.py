@@ -1,17 +1,50 @@
 """
 Database initialization script
-Run this script to create all database tables
+Run this script to create the database tables or apply pending migrations,
+and optionally fill them with synthetic data:
+
+    python init_db.py --seed --students 1000000 --educators 100000 --calls 10000000
 """
+import argparse
+
+from app import migrations, synthetic
 from app.database import engine
-from app.models import Base
 
 
 def init_db():
-    """Initialize the database by creating all tables"""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    """Create the schema on an empty database, or migrate an existing one"""
+    print("Applying database migrations...")
+    applied = migrations.upgrade(engine)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    print(f"Database schema is at version {migrations.HEAD}")
+
+
+def show_status():
+    """Print the applied and expected schema versions"""
+    with engine.connect() as conn:
+        version = migrations.current_version(conn)
+    print(f"Database schema version: {version if version is not None else 'none'} (latest: {migrations.HEAD})")
+
+
+def seed_db(args):
+    """Fill the migrated, empty database with generated data"""
+    print("Seeding synthetic data...")
+    report = synthetic.seed(engine, synthetic.parse_sizes(args), args.random_seed)
+    for step, seconds in report["timings"].items():
+        print(f"  {step[:-2]}: {seconds}s")
 
 
 if __name__ == "__main__":
-    init_db()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="show the schema version without migrating")
+    seeding = parser.add_argument_group("synthetic data")
+    seeding.add_argument("--seed", action="store_true", help="after migrating, fill an empty database with generated rows")
+    synthetic.add_size_arguments(seeding)
+    args = parser.parse_args()
+    if args.status:
+        show_status()
+    else:
+        init_db()
+        if args.seed:
+            seed_db(args)
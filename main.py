@@ -1,29 +1,115 @@
 """
 FastAPI main application file
 """
-from fastapi import FastAPI
+# First, so the startup timer covers the imports below
+from app.startup import timer as startup_timer
+
+import asyncio
+import logging
+
+from fastapi import FastAPI, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy import exc
 
-from app.database import engine
-from app.models import Base
+startup_timer.mark("import_framework")
+
+from app import cache, compression, group_commit, idempotency, metrics, migrations, partitions, pool, querylog, replicas, rollups, serialization, startup
+from app.database import DB_ASYNC, async_engine, engine, read_replicas
+from app.pool import pool_status
 from app.routers import area, degree, educator_area, student, educator, call_request
 
+startup_timer.mark("import_app")
+logger = logging.getLogger(__name__)
+
+
+async def _verify_schema():
+    """Background schema check for SCHEMA_STARTUP=background, retried while the database is unreachable"""
+    delay = 0.5
+    while True:
+        try:
+            startup_timer.schema_version = await run_in_threadpool(migrations.check, engine)
+            startup_timer.schema = "ok"
+            return
+        except migrations.SchemaVersionError as error:
+            startup_timer.schema, startup_timer.schema_error = "error", str(error)
+            logger.error("%s; /health/ready will keep failing", error)
+            return
+        except exc.DBAPIError as error:
+            startup_timer.schema_error = str(error.orig)
+            logger.warning("Schema check failed, retrying in %.1fs: %s", delay, error.orig)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, startup.SCHEMA_CHECK_MAX_BACKOFF)
+
+
+async def _prewarm_pools(connections: int):
+    """Open pooled connections after startup, so first requests skip the connect"""
+    pools = [("primary", engine, False)] + [(replica.name, replica.engine, False) for replica in read_replicas.replicas]
+    if async_engine is not None:
+        pools.append(("primary_async", async_engine, True))
+    pools += [
+        (f"{replica.name}_async", replica.async_engine, True)
+        for replica in read_replicas.replicas if replica.async_engine is not None
+    ]
+    for name, target, is_async in pools:
+        try:
+            if is_async:
+                startup_timer.prewarmed[name] = await pool.prewarm_async(target, connections)
+            else:
+                startup_timer.prewarmed[name] = await run_in_threadpool(pool.prewarm, target, connections)
+        except (exc.DBAPIError, OSError) as error:
+            logger.warning("Pre-warming the %s pool failed: %s", name, error)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create database tables
-    # Note: Using synchronous create_all is acceptable here as it only runs once at startup
-    Base.metadata.create_all(bind=engine)
+    # Startup: make sure the schema is current (see app/startup.py for the modes)
+    background = []
+    with startup_timer.phase("schema"):
+        if startup.SCHEMA_STARTUP == "check":
+            # Refuse to serve against an unmigrated schema (run `python init_db.py`)
+            startup_timer.schema_version = migrations.check(engine)
+            startup_timer.schema = "ok"
+        elif startup.SCHEMA_STARTUP == "migrate":
+            await run_in_threadpool(migrations.upgrade_locked, engine)
+            startup_timer.schema_version = migrations.HEAD
+            startup_timer.schema = "ok"
+        elif startup.SCHEMA_STARTUP == "background":
+            background.append(asyncio.create_task(_verify_schema()))
+        else:
+            startup_timer.schema = "skipped"
+    if group_commit.CALL_REQUEST_GROUP_COMMIT:
+        call_request.committer.start()
+    if startup.DB_POOL_PREWARM > 0:
+        background.append(asyncio.create_task(_prewarm_pools(startup.DB_POOL_PREWARM)))
+    if idempotency.IDEMPOTENCY_STORE == "database":
+        background.append(asyncio.create_task(idempotency.maintain_keys(engine)))
+    # Keep future call_requests partitions created (no-op unless partitioned)
+    background.append(asyncio.create_task(partitions.maintain_partitions(engine)))
+    # Apply queued call request rollup changes (no-op unless CALL_ROLLUP_MODE=deferred)
+    background.append(asyncio.create_task(rollups.maintain_rollups(engine)))
+    startup_timer.ready()
     yield
-    # Shutdown: cleanup if needed
+    # Commit call requests still queued before the pools go away
+    await call_request.committer.stop()
+    for task in background:
+        task.cancel()
+    # Shutdown: release pooled async connections
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in read_replicas.replicas:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
 
 
 app = FastAPI(
     title="App Server API",
     description="FastAPI application with SQLAlchemy",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson rendering when FAST_JSON is on
+    default_response_class=serialization.DEFAULT_RESPONSE_CLASS,
 )
 
 # Configure CORS
@@ -34,14 +120,49 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Replay responses to retried POSTs; innermost, so stored bodies are uncompressed
+if idempotency.IDEMPOTENCY_STORE != "off":
+    app.add_middleware(
+        idempotency.IdempotencyMiddleware,
+        engine=engine if idempotency.IDEMPOTENCY_STORE == "database" else None,
+    )
+# Keep a client's reads on the primary for a moment after it writes
+if read_replicas.replicas:
+    app.add_middleware(replicas.ReadAfterWriteMiddleware)
+# Compress large responses according to Accept-Encoding
+app.add_middleware(compression.CompressionMiddleware)
+# Record request statements for the N+1 detector in dev and sampling modes
+if querylog.QUERY_LOG_MODE in ("dev", "sample"):
+    app.add_middleware(querylog.QueryLogMiddleware)
+# Outermost, so latency includes compression
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+
+def _router(module):
+    """Return a module's router, with async handlers layered on top in async mode"""
+    if not DB_ASYNC:
+        return module.router
+    # Only imported in async mode, sparing sync workers the import
+    from app.routers import aio
+
+    async_module = getattr(aio, module.__name__.rsplit(".", 1)[-1])
+    return aio.overlay(module.router, async_module.router)
+
 
 # Include routers
-app.include_router(area.router, prefix="/api/v1/area", tags=["area"])
-app.include_router(degree.router, prefix="/api/v1/degree", tags=["degree"])
-app.include_router(student.router, prefix="/api/v1/students", tags=["students"])
-app.include_router(educator.router, prefix="/api/v1/educators", tags=["educators"])
-app.include_router(call_request.router, prefix="/api/v1/calls", tags=["calls"])
-app.include_router(educator_area.router, prefix="/api/v1/educator_areas", tags=["educator_areas"])
+app.include_router(_router(area), prefix="/api/v1/area", tags=["area"])
+app.include_router(_router(degree), prefix="/api/v1/degree", tags=["degree"])
+app.include_router(_router(student), prefix="/api/v1/students", tags=["students"])
+app.include_router(_router(educator), prefix="/api/v1/educators", tags=["educators"])
+call_request_router = _router(call_request)
+if group_commit.CALL_REQUEST_GROUP_COMMIT:
+    from app.routers.aio import overlay
+
+    call_request_router = overlay(call_request_router, call_request.group_commit_router)
+app.include_router(call_request_router, prefix="/api/v1/calls", tags=["calls"])
+app.include_router(_router(educator_area), prefix="/api/v1/educator_areas", tags=["educator_areas"])
+startup_timer.mark("routes")
 
 @app.get("/")
 async def root():
@@ -53,3 +174,78 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "1.0.0"}
+
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """503 until startup finished and the schema was verified, for load balancer readiness probes"""
+    if not startup_timer.is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": startup_timer.is_ready, "schema": startup_timer.schema}
+
+
+@app.get("/health/startup")
+async def startup_report():
+    """Time spent importing, registering routes and checking the schema in this worker"""
+    return startup_timer.report()
+
+
+@app.get("/health/db")
+async def db_health_check():
+    """Connection pool statistics for sizing pools per worker"""
+    return {
+        "pool": pool_status(engine.pool),
+        "async_pool": pool_status(async_engine.pool) if async_engine is not None else None,
+        "reads": read_replicas.status(),
+        "replica_pools": {
+            replica.name: {
+                "pool": pool_status(replica.engine.pool),
+                "async_pool": pool_status(replica.async_engine.pool) if replica.async_engine is not None else None,
+            }
+            for replica in read_replicas.replicas
+        },
+    }
+
+
+@app.get("/health/cache")
+async def cache_health_check():
+    """Reference data cache hit/miss counters"""
+    return {
+        "areas": cache.areas.stats(),
+        "degrees": cache.degrees.stats(),
+    }
+
+
+@app.get("/health/idempotency")
+async def idempotency_health_check():
+    """Idempotency-Key replays, waits and misses in this worker"""
+    return idempotency.cache.stats()
+
+
+@app.get("/health/group_commit")
+async def group_commit_health_check():
+    """Batches written by call request group commit in this worker"""
+    return call_request.committer.stats()
+
+
+@app.get("/health/compression")
+async def compression_health_check():
+    """Response compression ratio and CPU time per route"""
+    return {
+        "encodings": compression.available_encodings(),
+        "routes": compression.stats.snapshot(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics for this worker process"""
+    pools = {"sync": engine.pool}
+    if async_engine is not None:
+        pools["async"] = async_engine.pool
+    for replica in read_replicas.replicas:
+        pools[replica.name] = replica.engine.pool
+        if replica.async_engine is not None:
+            pools[f"{replica.name}_async"] = replica.async_engine.pool
+    caches = {"area": cache.areas, "degree": cache.degrees}
+    return Response(metrics.render(pools, caches), media_type=metrics.CONTENT_TYPE)
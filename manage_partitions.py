@@ -0,0 +1,58 @@
+"""
+Call request partition maintenance
+Create upcoming monthly partitions, or retire old ones per the retention policy
+"""
+import argparse
+
+from app import partitions
+from app.database import engine
+
+
+def ensure(months_ahead: int):
+    """Create any missing partitions up to ``months_ahead`` months from now"""
+    with engine.begin() as conn:
+        if not partitions.is_partitioned(conn):
+            print("call_requests is not partitioned (PostgreSQL only, see `python init_db.py`)")
+            return
+        created = partitions.ensure_partitions(conn, months_ahead=months_ahead)
+    print(f"Created partitions: {', '.join(created)}" if created else "All partitions already exist")
+
+
+def retention(keep_months: int, archive_dir):
+    """Archive and drop (or only detach) partitions older than ``keep_months``"""
+    if keep_months <= 0:
+        print("Retention is disabled (keep months is 0)")
+        return
+    for retired in partitions.apply_retention(engine, keep_months, archive_dir):
+        if retired["archive"]:
+            print(f"{retired['partition']}: archived {retired['archive']['rows']} rows to {retired['archive']['path']} and dropped")
+        else:
+            print(f"{retired['partition']}: detached")
+
+
+def show():
+    """List the attached partitions"""
+    with engine.connect() as conn:
+        names = partitions.partition_names(conn) if partitions.is_partitioned(conn) else []
+    print("\n".join(names) if names else "call_requests is not partitioned")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain call_requests partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure_parser.add_argument("--months-ahead", type=int, default=partitions.PARTITION_MONTHS_AHEAD)
+    retention_parser = commands.add_parser("retention", help="retire partitions past the retention period")
+    retention_parser.add_argument("--keep-months", type=int, default=partitions.RETENTION_MONTHS,
+                                  help="months kept before the current one (default: CALL_REQUESTS_RETENTION_MONTHS)")
+    retention_parser.add_argument("--archive-dir", default=partitions.ARCHIVE_DIR,
+                                  help="write <partition>.ndjson.gz here before dropping; without it partitions are only detached")
+    commands.add_parser("list", help="list attached partitions")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        ensure(args.months_ahead)
+    elif args.command == "retention":
+        retention(args.keep_months, args.archive_dir)
+    else:
+        show()
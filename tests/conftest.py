@@ -0,0 +1,59 @@
+"""
+Tests run against a throwaway SQLite file, or against TEST_DATABASE_URL (e.g.
+a scratch PostgreSQL database) when it is set. The settings are fixed before
+the app is imported, since it reads them at import time.
+"""
+import itertools
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.update(
+    DB_ASYNC="false",
+    PG_DB_REPLICA_URLS="",
+    CALL_REQUEST_GROUP_COMMIT="false",
+    QUERY_LOG_MODE="off",
+    SCHEMA_STARTUP="check",
+    CALL_REQUESTS_PARTITION_MAINTENANCE_INTERVAL="0",
+    IDEMPOTENCY_PURGE_INTERVAL="0",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import database, migrations  # noqa: E402
+
+_phone_numbers = itertools.count(1)
+
+
+def phone_number() -> str:
+    """A phone number no other test uses"""
+    return f"+91{next(_phone_numbers):010d}"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    migrations.upgrade(database.engine)
+    return database.engine
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements sent to the primary while the test runs"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,65 @@
+"""
+POST /api/v1/calls/bulk reports an educator deleted between its foreign key
+check and the INSERT as a per-item 'Educator not found', not a 500. The race
+is simulated by a check that does not see the deletion.
+"""
+import pytest
+
+from app.routers import call_request
+from tests.conftest import phone_number
+
+
+@pytest.fixture
+def people(client):
+    def create(resource):
+        return client.post(f"/api/v1/{resource}", json={"phone_number": phone_number()}).json()["id"]
+
+    return {"educators": [create("educators") for _ in range(2)], "student": create("students")}
+
+
+@pytest.fixture
+def stale_checks(monkeypatch):
+    """Make the first ``count`` foreign key checks report every id as existing"""
+    existing_ids = call_request.existing_ids
+    remaining = {"stale": 0}
+
+    def check(db, model, ids):
+        if remaining["stale"] > 0:
+            remaining["stale"] -= 1
+            return set(ids)
+        return existing_ids(db, model, ids)
+
+    monkeypatch.setattr(call_request, "existing_ids", check)
+
+    def stale_for(count: int):
+        remaining["stale"] = count
+
+    return stale_for
+
+
+def _bulk(client, people):
+    items = [{"educator_id": educator, "student_id": people["student"]} for educator in people["educators"]]
+    return client.post("/api/v1/calls/bulk", json=items)
+
+
+def _call_count(client, people) -> int:
+    return client.get(f"/api/v1/calls/stats/students/{people['student']}").json()["call_count"]
+
+
+@pytest.mark.parametrize("stale", [
+    2,  # the first attempt's checks: the second attempt's checks catch it
+    4,  # both attempts' checks: item by item, whose own checks catch it
+    100,  # every check: the violated constraint is looked up per item
+])
+def test_deleted_educator_fails_only_its_item(client, people, stale_checks, stale):
+    deleted = people["educators"][0]
+    assert client.delete(f"/api/v1/educators/{deleted}").status_code == 204
+    stale_checks(stale)
+
+    response = _bulk(client, people)
+
+    assert response.status_code == 200
+    first, second = response.json()
+    assert (first["index"], first["error"]) == (0, "Educator not found")
+    assert second["call_request"]["educator_id"] == people["educators"][1]
+    assert _call_count(client, people) == 1
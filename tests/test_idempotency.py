@@ -0,0 +1,86 @@
+"""
+Which responses IdempotencyMiddleware stores, and which requests it leaves
+alone. The wrapped app answers with the status named by the path and counts
+how often it ran.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import idempotency
+
+
+class Endpoint:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        self.calls += 1
+        await send({"type": "http.response.start", "status": int(scope["path"].strip("/")), "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture
+def endpoint():
+    return Endpoint()
+
+
+@pytest.fixture
+def client(endpoint):
+    middleware = idempotency.IdempotencyMiddleware(endpoint, cache=idempotency.IdempotencyCache(), max_body_bytes=64)
+    return TestClient(middleware)
+
+
+def _post_twice(client, path: str, body: bytes = b"{}"):
+    return [client.post(path, content=body, headers={"Idempotency-Key": "key"}) for _ in range(2)]
+
+
+@pytest.mark.parametrize("status", [200, 201, 409, 422])
+def test_response_is_replayed(client, endpoint, status):
+    first, retry = _post_twice(client, f"/{status}")
+    assert (first.status_code, retry.status_code) == (status, status)
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert endpoint.calls == 1
+
+
+@pytest.mark.parametrize("status", [400, 404, 429, 500])
+def test_retry_runs_again(client, endpoint, status):
+    first, retry = _post_twice(client, f"/{status}")
+    assert "idempotent-replayed" not in retry.headers
+    assert endpoint.calls == 2
+
+
+def test_large_body_passes_through(client, endpoint):
+    body = b"x" * 65
+    first, retry = _post_twice(client, "/201", body)
+    assert first.content == body
+    assert "idempotent-replayed" not in retry.headers
+    assert endpoint.calls == 2
+    assert client.app.cache.oversized == 2
+
+
+def test_body_at_limit_is_keyed(client, endpoint):
+    first, retry = _post_twice(client, "/201", b"x" * 64)
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert endpoint.calls == 1
+
+
+def test_cache_evicts_past_byte_budget(endpoint):
+    cache = idempotency.IdempotencyCache(max_bytes=100)
+    client = TestClient(idempotency.IdempotencyMiddleware(endpoint, cache=cache, max_body_bytes=64))
+
+    client.post("/201", content=b"a" * 60, headers={"Idempotency-Key": "a"})
+    client.post("/201", content=b"b" * 60, headers={"Idempotency-Key": "b"})
+    assert (cache.bytes, cache.evictions) == (60, 1)
+
+    # "b" is still replayed; "a" was evicted, so its retry runs again
+    retry_b = client.post("/201", content=b"b" * 60, headers={"Idempotency-Key": "b"})
+    retry_a = client.post("/201", content=b"a" * 60, headers={"Idempotency-Key": "a"})
+    assert retry_b.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in retry_a.headers
+    assert endpoint.calls == 3
@@ -0,0 +1,92 @@
+"""
+Paging through every list endpoint returns each row exactly once, also when
+many rows share a created_at, as rows inserted by one statement do. Runs
+the sync handlers, and the async ones over their own AsyncEngine.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import database, models
+from app.routers import aio
+from tests.conftest import phone_number
+
+ROWS = 5
+LIST_PATHS = {
+    "/api/v1/students": models.Student,
+    "/api/v1/educators": models.Educator,
+    "/api/v1/educators?expand=areas": models.Educator,
+    "/api/v1/calls": models.CallRequest,
+    "/api/v1/educator_areas": models.EducatorArea,
+    "/api/v1/area": models.Area,
+    "/api/v1/degree": models.Degree,
+}
+
+
+@pytest.fixture(scope="module")
+def same_second_rows(engine):
+    """ROWS of each kind, each kind inserted by a single statement"""
+    def insert_rows(conn, model, rows):
+        return conn.execute(insert(model).returning(model.id), rows).scalars().all()
+
+    with engine.begin() as conn:
+        students = insert_rows(conn, models.Student, [{"phone_number": phone_number()} for _ in range(ROWS)])
+        educators = insert_rows(conn, models.Educator, [{"phone_number": phone_number()} for _ in range(ROWS)])
+        areas = insert_rows(conn, models.Area, [{"name": f"Paged area {phone_number()}"} for _ in range(ROWS)])
+        insert_rows(conn, models.Degree, [{"name": f"Paged degree {phone_number()}"} for _ in range(ROWS)])
+        insert_rows(conn, models.CallRequest, [
+            {"educator_id": educator_id, "student_id": student_id} for educator_id, student_id in zip(educators, students)
+        ])
+        insert_rows(conn, models.EducatorArea, [
+            {"educator_id": educator_id, "area_id": area_id} for educator_id, area_id in zip(educators, areas)
+        ])
+        created = conn.execute(select(models.Student.created_at).where(models.Student.id.in_(students))).scalars()
+        assert len(set(created)) == 1
+
+
+@pytest.fixture(scope="module")
+def async_client(engine):
+    """The async routers on an app of their own, with sessions from an AsyncEngine"""
+    async_engine = create_async_engine(database.async_url(database.DATABASE_URL), poolclass=NullPool)
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_session():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    for module, prefix in ((aio.student, "students"), (aio.educator, "educators"), (aio.call_request, "calls"),
+                           (aio.educator_area, "educator_areas"), (aio.area, "area"), (aio.degree, "degree")):
+        app.include_router(module.router, prefix=f"/api/v1/{prefix}")
+    app.dependency_overrides[database.get_async_db] = get_session
+    app.dependency_overrides[database.get_async_read_db] = get_session
+    with TestClient(app) as client:
+        yield client
+
+
+def _page_through(client, path: str) -> list:
+    separator = "&" if "?" in path else "?"
+    page = client.get(f"{path}{separator}limit=2").json()
+    ids = [item["id"] for item in page["items"]]
+    while page["next_cursor"]:
+        page = client.get(f"{path}{separator}limit=2&after={page['next_cursor']}").json()
+        ids += [item["id"] for item in page["items"]]
+    return ids
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+def test_pages_return_every_row_once(client, engine, same_second_rows, path):
+    ids = _page_through(client, path)
+
+    model = LIST_PATHS[path]
+    with engine.connect() as conn:
+        expected = conn.execute(select(model.id)).scalars().all()
+    assert sorted(ids) == sorted(expected)
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+def test_async_pages_return_every_row_once(async_client, client, engine, same_second_rows, path):
+    assert _page_through(async_client, path) == _page_through(client, path)
@@ -0,0 +1,102 @@
+"""
+The query log normalizes statements, logs slow ones, and flags repeated
+SELECT shapes; with raising on, a lazy Educator.areas load per row fails the
+test or request that runs it. Uses an instrumented engine of its own, since
+the app only instruments its engines when QUERY_LOG_MODE is on.
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app import database, models, querylog
+from tests.conftest import phone_number
+
+EDUCATORS = querylog.N_PLUS_ONE_THRESHOLD + 1
+
+
+@pytest.fixture(scope="module")
+def instrumented(engine):
+    instrumented = create_engine(database.DATABASE_URL)
+    querylog.instrument_engine(instrumented)
+    yield instrumented
+    instrumented.dispose()
+
+
+@pytest.fixture(scope="module")
+def educator_ids(engine):
+    """Educators with one area each"""
+    with engine.begin() as conn:
+        educators = conn.execute(
+            insert(models.Educator).returning(models.Educator.id),
+            [{"phone_number": phone_number()} for _ in range(EDUCATORS)],
+        ).scalars().all()
+        area = conn.execute(
+            insert(models.Area).values(name=f"N+1 area {phone_number()}").returning(models.Area.id)
+        ).scalar_one()
+        conn.execute(insert(models.EducatorArea), [{"educator_id": educator, "area_id": area} for educator in educators])
+    return educators
+
+
+def _area_ids(db: Session, educator_ids, *options) -> list:
+    educators = db.scalars(select(models.Educator).where(models.Educator.id.in_(educator_ids)).options(*options))
+    return [educator_area.area_id for educator in educators for educator_area in educator.areas]
+
+
+def test_normalize_collapses_literals_binds_and_lists():
+    assert querylog.normalize("SELECT * FROM t WHERE a = 'x' AND b = 42 AND c IN (?, ?, ?)") == (
+        "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?)"
+    )
+    assert querylog.normalize("INSERT INTO t (a) VALUES (%(a_m0)s), (%(a_m1)s)") == "INSERT INTO t (a) VALUES (?)"
+    assert querylog.normalize("SELECT  *\n FROM t WHERE id = $1 OR id = :id") == "SELECT * FROM t WHERE id = ? OR id = ?"
+
+
+def test_lazy_load_per_row_raises(instrumented, educator_ids):
+    with Session(instrumented) as db:
+        with pytest.raises(querylog.NPlusOneError, match="educator_area") as error:
+            with querylog.capture():
+                _area_ids(db, educator_ids)
+    assert "tests/test_querylog.py" in str(error.value)
+
+
+def test_eager_load_passes(instrumented, educator_ids):
+    with Session(instrumented) as db:
+        with querylog.capture() as log:
+            area_ids = _area_ids(db, educator_ids, selectinload(models.Educator.areas))
+    assert len(area_ids) == EDUCATORS
+    assert len(log.statements) == 2
+
+
+def test_capture_can_only_report(instrumented, educator_ids, caplog):
+    with Session(instrumented) as db, caplog.at_level(logging.WARNING, querylog.logger.name):
+        with querylog.capture(raise_errors=False) as log:
+            _area_ids(db, educator_ids)
+    [suspect] = log.n_plus_one()
+    assert suspect["count"] == EDUCATORS
+    assert "Possible N+1 in capture()" in caplog.text
+
+
+def test_request_fails_with_raise_on(instrumented, educator_ids, monkeypatch):
+    monkeypatch.setattr(querylog, "QUERY_LOG_RAISE", True)
+    app = FastAPI()
+
+    @app.get("/areas")
+    def list_area_ids():
+        with Session(instrumented) as db:
+            return _area_ids(db, educator_ids)
+
+    client = TestClient(querylog.QueryLogMiddleware(app, mode="dev"))
+    with pytest.raises(querylog.NPlusOneError, match="GET /areas"):
+        client.get("/areas")
+
+
+def test_slow_statement_is_logged(instrumented, monkeypatch, caplog):
+    monkeypatch.setattr(querylog, "SLOW_QUERY_MS", 1e-9)
+    with instrumented.connect() as conn, caplog.at_level(logging.WARNING, querylog.logger.name):
+        conn.execute(select(models.Student.id).where(models.Student.phone_number == "none"))
+    assert "Slow query" in caplog.text
+    assert "1 binds" in caplog.text
+    assert "phone_number = ?" in caplog.text
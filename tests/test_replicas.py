@@ -0,0 +1,119 @@
+"""
+GET handlers read from the replicas in turn, skip one that cannot be reached,
+and stay on the primary for a client that just wrote. The replicas are SQLite
+files holding the same student under a different name each, so the response
+tells which database answered.
+"""
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app import database, migrations, models, replicas
+from tests.conftest import phone_number
+
+
+def _replica(index: int, directory: str, student_id: int) -> replicas.Replica:
+    replica = database._replica(index, f"sqlite:///{directory}/replica{index}.db")
+    migrations.upgrade(replica.engine)
+    with replica.engine.begin() as conn:
+        conn.execute(insert(models.Student).values(id=student_id, phone_number=phone_number(), name=replica.name))
+    return replica
+
+
+def _unreachable(index: int, directory: str) -> replicas.Replica:
+    return database._replica(index, f"sqlite:///{directory}/missing/replica{index}.db")
+
+
+@pytest.fixture
+def student(client):
+    return client.post("/api/v1/students", json={"phone_number": phone_number(), "name": "primary"}).json()
+
+
+@pytest.fixture
+def use_replicas(monkeypatch):
+    """Install a ReplicaSet built by the test; its engines are disposed afterwards"""
+    installed = []
+
+    def install(replica_list):
+        replica_set = replicas.ReplicaSet(replica_list, "round_robin")
+        monkeypatch.setattr(database, "read_replicas", replica_set)
+        installed.extend(replica_list)
+        return replica_set
+
+    yield install
+    for replica in installed:
+        replica.engine.dispose()
+
+
+@pytest.fixture
+def directory():
+    return tempfile.mkdtemp()
+
+
+def _names(client, student_id: int, count: int):
+    return [client.get(f"/api/v1/students/{student_id}").json()["name"] for _ in range(count)]
+
+
+def test_reads_go_to_replicas_in_turn(client, student, use_replicas, directory):
+    replica_set = use_replicas([_replica(index, directory, student["id"]) for index in range(2)])
+
+    assert _names(client, student["id"], 4) == ["replica0", "replica1", "replica0", "replica1"]
+    assert replica_set.primary_reads == 0
+    assert [replica.reads for replica in replica_set.replicas] == [2, 2]
+
+
+def test_unused_read_session_does_not_connect(client, use_replicas, directory):
+    replica_set = use_replicas([_replica(0, directory, 1)])
+
+    checkouts = []
+    event.listen(replica_set.replicas[0].engine, "checkout", lambda *args: checkouts.append(args))
+
+    database.read_session().close()
+
+    assert checkouts == []
+    assert replica_set.replicas[0].reads == 0
+    assert replica_set.primary_reads == 0
+
+
+def test_read_checks_out_one_connection(client, student, use_replicas, directory):
+    replica_set = use_replicas([_replica(0, directory, student["id"])])
+    engine = replica_set.replicas[0].engine
+
+    checkouts = []
+    event.listen(engine, "checkout", lambda *args: checkouts.append(args))
+
+    assert _names(client, student["id"], 2) == ["replica0", "replica0"]
+    assert len(checkouts) == 2
+    assert engine.pool.checkedout() == 0
+
+
+def test_unreachable_replica_is_skipped(client, student, use_replicas, directory):
+    replica_set = use_replicas([_unreachable(0, directory), _replica(1, directory, student["id"])])
+
+    assert _names(client, student["id"], 3) == ["replica1"] * 3
+    down, up = replica_set.replicas
+    assert down.failures == 1
+    assert up.reads == 3
+
+
+def test_reads_fall_back_to_primary_without_replicas(client, student, use_replicas, directory):
+    replica_set = use_replicas([_unreachable(0, directory)])
+
+    assert _names(client, student["id"], 2) == ["primary", "primary"]
+    assert replica_set.primary_reads == 2
+
+
+def test_reads_stay_on_primary_after_write(client, use_replicas, directory):
+    sticky = TestClient(replicas.ReadAfterWriteMiddleware(client.app, window=5))
+    created = sticky.post("/api/v1/students", json={"phone_number": phone_number(), "name": "primary"})
+    assert replicas.STICKY_COOKIE in created.cookies
+    replica_set = use_replicas([_replica(0, directory, created.json()["id"])])
+
+    # Only on the primary until the replica catches up: the writer sees it anyway
+    assert _names(sticky, created.json()["id"], 2) == ["primary", "primary"]
+    assert replica_set.replicas[0].reads == 0
+
+    # A client without the cookie is served by the replica
+    assert _names(client, created.json()["id"], 1) == ["replica0"]
@@ -0,0 +1,62 @@
+"""
+With CALL_ROLLUP_MODE=deferred, call request writes only queue their rollup
+changes; once apply_all_pending has run, the stats match what sync mode
+writes, including calls moved or deleted before the queue was applied.
+"""
+import pytest
+
+from app import rollups
+from tests.conftest import phone_number
+
+
+@pytest.fixture
+def deferred(monkeypatch, engine):
+    rollups.apply_all_pending(engine)
+    monkeypatch.setattr(rollups, "CALL_ROLLUP_MODE", "deferred")
+
+
+@pytest.fixture
+def people(client):
+    def create(resource):
+        return client.post(f"/api/v1/{resource}", json={"phone_number": phone_number()}).json()["id"]
+
+    return {"educator": create("educators"), "students": [create("students") for _ in range(3)]}
+
+
+def _educator_stats(client, educator_id: int):
+    stats = client.get(f"/api/v1/calls/stats/educators/{educator_id}").json()
+    return stats["call_count"], sum(day["distinct_students"] for day in stats["days"])
+
+
+def _student_calls(client, student_id: int) -> int:
+    return client.get(f"/api/v1/calls/stats/students/{student_id}").json()["call_count"]
+
+
+def test_deferred_changes_apply_in_one_batch(client, engine, deferred, people):
+    educator, (first, second, third) = people["educator"], people["students"]
+    calls = [
+        client.post("/api/v1/calls", json={"educator_id": educator, "student_id": student}).json()
+        for student in (first, first, second)
+    ]
+    # Moved to the third student, and deleted, before anything was applied
+    client.put(f"/api/v1/calls/{calls[1]['id']}", json={"educator_id": educator, "student_id": third})
+    client.delete(f"/api/v1/calls/{calls[2]['id']}")
+    assert _educator_stats(client, educator) == (0, 0)
+
+    assert rollups.apply_all_pending(engine) == 6
+
+    assert _educator_stats(client, educator) == (2, 2)
+    assert [_student_calls(client, student) for student in (first, second, third)] == [1, 0, 1]
+    assert rollups.apply_all_pending(engine) == 0
+
+
+def test_deferred_changes_apply_across_batches(client, engine, deferred, people):
+    educator, students = people["educator"], people["students"]
+    items = [{"educator_id": educator, "student_id": student} for student in students for _ in range(2)]
+    created = client.post("/api/v1/calls/bulk", json=items).json()
+    client.delete(f"/api/v1/calls/{created[0]['call_request']['id']}")
+
+    assert rollups.apply_all_pending(engine, batch_size=2) == 7
+
+    assert _educator_stats(client, educator) == (5, 3)
+    assert [_student_calls(client, student) for student in students] == [1, 2, 2]
@@ -0,0 +1,147 @@
+"""
+Creates and updates are one statement each: INSERT/UPDATE ... RETURNING with
+constraint violations mapped to API errors, never a SELECT beforehand
+"""
+import pytest
+from sqlalchemy import text
+
+from app import geo, rollups
+from app.database import engine
+from tests.conftest import phone_number
+
+
+def _single(statements, verb: str, table: str):
+    assert len(statements) == 1, statements
+    assert statements[0].lstrip().upper().startswith(verb)
+    assert table in statements[0]
+    assert "RETURNING" in statements[0].upper()
+
+
+@pytest.fixture
+def student(client):
+    return client.post("/api/v1/students", json={"phone_number": phone_number(), "name": "Student"}).json()
+
+
+@pytest.fixture
+def educator(client):
+    body = {"phone_number": phone_number(), "name": "Educator", "latitude": 12.97, "longitude": 77.59}
+    return client.post("/api/v1/educators", json=body).json()
+
+
+@pytest.mark.parametrize("resource", ["area", "degree"])
+def test_reference_create_and_update(client, statements, resource):
+    response = client.post(f"/api/v1/{resource}", json={"name": f"{resource} {phone_number()}"})
+    assert response.status_code == 201
+    _single(statements, "INSERT", resource)
+
+    statements.clear()
+    response = client.put(f"/api/v1/{resource}/{response.json()['id']}", json={"name": f"{resource} {phone_number()}"})
+    assert response.status_code == 200
+    _single(statements, "UPDATE", resource)
+
+
+def test_student_create_and_update(client, statements):
+    response = client.post("/api/v1/students", json={"phone_number": phone_number()})
+    assert response.status_code == 201
+    _single(statements, "INSERT", "student")
+
+    statements.clear()
+    response = client.patch(f"/api/v1/students/{response.json()['id']}", json={"name": "Renamed"})
+    assert response.status_code == 200
+    _single(statements, "UPDATE", "student")
+
+
+def test_duplicate_phone_number_is_one_statement(client, student, statements):
+    response = client.post("/api/v1/students", json={"phone_number": student["phone_number"]})
+    assert response.status_code == 400
+    # SQLite names the columns, not the constraint; PostgreSQL needs no lookup either
+    assert len(statements) == 1
+
+
+def test_educator_create_and_update(client, statements):
+    body = {"phone_number": phone_number(), "latitude": 12.97, "longitude": 77.59}
+    response = client.post("/api/v1/educators", json=body)
+    assert response.status_code == 201
+    _single(statements, "INSERT", "educator")
+
+    statements.clear()
+    response = client.put(f"/api/v1/educators/{response.json()['id']}", json={"latitude": 28.61, "longitude": 77.21})
+    assert response.status_code == 200
+    _single(statements, "UPDATE", "educator")
+
+
+@pytest.mark.parametrize("moved", [{"latitude": 19.07}, {"longitude": 72.87}, {"latitude": None}])
+def test_educator_update_of_one_coordinate(client, educator, statements, moved):
+    response = client.patch(f"/api/v1/educators/{educator['id']}", json=moved)
+    assert response.status_code == 200
+    _single(statements, "UPDATE", "educator")
+
+    # The geohash was computed in SQL from the sent and the stored coordinate
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT latitude, longitude, geohash FROM educator WHERE id = :id"), {"id": educator["id"]}
+        ).one()
+    assert row.geohash == geo.encode(row.latitude, row.longitude)
+
+
+def test_educator_area_create_and_update(client, educator, statements):
+    areas = [client.post("/api/v1/area", json={"name": f"area {phone_number()}"}).json() for _ in range(2)]
+    statements.clear()
+    response = client.post("/api/v1/educator_areas", json={"educator_id": educator["id"], "area_id": areas[0]["id"]})
+    assert response.status_code == 201
+    _single(statements, "INSERT", "educator_area")
+
+    statements.clear()
+    response = client.put(
+        f"/api/v1/educator_areas/{response.json()['id']}", json={"educator_id": educator["id"], "area_id": areas[1]["id"]}
+    )
+    assert response.status_code == 200
+    _single(statements, "UPDATE", "educator_area")
+
+
+def test_educator_area_with_unknown_area_is_404(client, educator, statements):
+    response = client.post("/api/v1/educator_areas", json={"educator_id": educator["id"], "area_id": 10 ** 9})
+    assert response.status_code == 404
+    if engine.dialect.name == "postgresql":
+        _single(statements, "INSERT", "educator_area")
+    else:
+        # SQLite does not name the violated foreign key: crud.constraint_name
+        # looks up the referenced area, on the error path only
+        assert [statement.lstrip().split()[0].upper() for statement in statements] == ["INSERT", "SELECT"]
+
+
+@pytest.mark.parametrize("mode, tables", [
+    # One upsert each for the pair, educator and student day rollup rows
+    ("sync", ["call_requests", rollups.pair_stats.name, rollups.educator_stats.name, rollups.student_stats.name]),
+    # Queued for maintain_rollups instead
+    ("deferred", ["call_requests", rollups.pending.name]),
+])
+def test_call_request_create(client, educator, student, statements, monkeypatch, mode, tables):
+    monkeypatch.setattr(rollups, "CALL_ROLLUP_MODE", mode)
+    response = client.post("/api/v1/calls", json={"educator_id": educator["id"], "student_id": student["id"]})
+    assert response.status_code == 201
+    assert [statement.split()[:3] for statement in statements] == [["INSERT", "INTO", table] for table in tables]
+
+
+def test_call_request_update(client, educator, student, statements):
+    body = {"educator_id": educator["id"], "student_id": student["id"]}
+    response = client.post("/api/v1/calls", json=body)
+    statements.clear()
+    response = client.put(f"/api/v1/calls/{response.json()['id']}", json=body)
+    assert response.status_code == 200
+    if engine.dialect.name == "postgresql":
+        # The old educator and student come back from the UPDATE itself
+        _single(statements, "UPDATE", "call_requests")
+    else:
+        # SQLite cannot RETURN columns of the joined old row, so reads it first
+        assert [statement.lstrip().split()[0].upper() for statement in statements] == ["SELECT", "UPDATE"]
+
+
+def test_call_request_update_moves_rollups(client, educator, student):
+    other = client.post("/api/v1/students", json={"phone_number": phone_number()}).json()
+    call = client.post("/api/v1/calls", json={"educator_id": educator["id"], "student_id": student["id"]}).json()
+    response = client.put(f"/api/v1/calls/{call['id']}", json={"educator_id": educator["id"], "student_id": other["id"]})
+    assert response.status_code == 200
+    assert response.json()["student_id"] == other["id"]
+    assert client.get(f"/api/v1/calls/stats/students/{student['id']}").json()["call_count"] == 0
+    assert client.get(f"/api/v1/calls/stats/students/{other['id']}").json()["call_count"] == 1
@@ -0,0 +1,45 @@
+"""
+SCHEMA_STARTUP=check refuses to start a worker against a database that
+init_db.py has not migrated, including one built with create_all
+"""
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+import main
+from app import migrations
+from app.database import Base
+
+
+@pytest.fixture
+def unmigrated(monkeypatch):
+    """Point the app at a fresh SQLite file; the test prepares its schema"""
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/unmigrated.db")
+    monkeypatch.setattr(main, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def test_check_refuses_create_all_database(unmigrated):
+    Base.metadata.create_all(unmigrated)
+    with unmigrated.connect() as conn:
+        assert not migrations.current_version(conn)
+
+    with pytest.raises(migrations.SchemaVersionError, match="version 0"):
+        with TestClient(main.app):
+            pass
+
+
+def test_check_refuses_empty_database(unmigrated):
+    with pytest.raises(migrations.SchemaVersionError, match="version 0"):
+        with TestClient(main.app):
+            pass
+
+
+def test_check_accepts_migrated_database(unmigrated):
+    migrations.upgrade(unmigrated)
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200